@@ -1,16 +1,22 @@
-from flask import Flask
+from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 import os
 
+from app.db_profile import RoutingSession
+
 # Inicializar extensões
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 jwt = JWTManager()
 
 def create_app():
     app = Flask(__name__, static_folder='../static')
     
+    # Respostas JSON via orjson quando instalado (json padrão como fallback)
+    from app.utils.serialization import FastJSONProvider
+    app.json = FastJSONProvider(app)
+    
     # Configurações
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL') or 'sqlite:///playball.db'
@@ -18,23 +24,150 @@ def create_app():
     app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-string'
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = False  # Token não expira para desenvolvimento
     app.config['JWT_IDENTITY_CLAIM'] = 'sub'
+    # Tokens só no cabeçalho Authorization; o stream do chat é a única rota que
+    # aceita ?jwt=..., e apenas com o token curto de POST /api/chat/stream-token
+    app.config['JWT_TOKEN_LOCATION'] = ['headers']
+    
+    # Eventos em tempo real (PUBSUB_URL=redis://... para compartilhar entre workers)
+    app.config['PUBSUB_URL'] = os.environ.get('PUBSUB_URL')
+    app.config['SSE_HEARTBEAT_SECONDS'] = int(os.environ.get('SSE_HEARTBEAT_SECONDS', 15))
+    app.config['SSE_TOKEN_EXPIRES_SECONDS'] = int(os.environ.get('SSE_TOKEN_EXPIRES_SECONDS', 60))
+    # Cada stream aberto ocupa um worker até a conexão fechar: em produção use
+    # workers com threads ou assíncronos (gunicorn -k gthread --threads N, ou -k gevent);
+    # com workers síncronos cada cliente conectado prende um processo inteiro
+    
+    # Jobs em segundo plano (análises de AI e importações de estatísticas)
+    app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 4))
+    app.config['JOB_MAX_PENDING'] = int(os.environ.get('JOB_MAX_PENDING', 100))
+    app.config['BATCH_AI_CONCURRENCY'] = int(os.environ.get('BATCH_AI_CONCURRENCY', 8))
+    app.config['BATCH_AI_MAX_CONCURRENCY'] = int(os.environ.get('BATCH_AI_MAX_CONCURRENCY', 16))
+    # Jobs pendentes de uma execução anterior são marcados como falhos ao iniciar;
+    # com vários workers compartilhando o banco, deixe ativo em apenas um processo
+    app.config['JOB_FAIL_INTERRUPTED_ON_START'] = os.environ.get('JOB_FAIL_INTERRUPTED_ON_START', 'true').lower() == 'true'
+    
+    # Importação de estatísticas: arquivos acima do limite (bytes, 0 = nunca) vão para a fila
+    app.config['STATS_ASYNC_THRESHOLD_BYTES'] = int(os.environ.get('STATS_ASYNC_THRESHOLD_BYTES', 10 * 1024 * 1024))
+    app.config['STATS_UPLOAD_FOLDER'] = os.environ.get('STATS_UPLOAD_FOLDER') or os.path.join(app.instance_path, 'stat_uploads')
+    
+    # Mídias dos treinos (vídeos e imagens)
+    app.config['UPLOAD_FOLDER'] = os.environ.get('UPLOAD_FOLDER') or os.path.join(app.instance_path, 'uploads')
+    
+    # Hash de senhas (ex.: pbkdf2:sha256:600000 ou scrypt:32768:8:1);
+    # hashes antigos são atualizados no próximo login
+    app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    app.config['PASSWORD_SALT_LENGTH'] = int(os.environ.get('PASSWORD_SALT_LENGTH', 16))
+    
+    # Limite de tentativas (capacidade/segundos) aplicado antes do hash de senha;
+    # RATE_LIMIT_URL=redis://... compartilha os limites entre workers
+    app.config['RATE_LIMIT_ENABLED'] = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    app.config['RATE_LIMIT_URL'] = os.environ.get('RATE_LIMIT_URL')
+    # Atrás de proxy reverso: quantos proxies confiáveis acrescentam X-Forwarded-For
+    # (0 = usar o endereço da conexão); o limite por IP usa o IP do cliente resultante
+    app.config['TRUSTED_PROXY_COUNT'] = int(os.environ.get('TRUSTED_PROXY_COUNT', 0))
+    app.config['RATE_LIMITS'] = {
+        'login_account': os.environ.get('LOGIN_LIMIT_PER_ACCOUNT', '5/60'),
+        'login_ip': os.environ.get('LOGIN_LIMIT_PER_IP', '20/60'),
+        'change_password_account': os.environ.get('CHANGE_PASSWORD_LIMIT_PER_ACCOUNT', '5/300'),
+        'change_password_ip': os.environ.get('CHANGE_PASSWORD_LIMIT_PER_IP', '20/300')
+    }
+    
+    # Revogação de tokens: intervalo de sincronização com o banco (segundos)
+    app.config['REVOCATION_SYNC_SECONDS'] = float(os.environ.get('REVOCATION_SYNC_SECONDS', 5))
+    app.config['REVOCATION_BLOOM_CAPACITY'] = int(os.environ.get('REVOCATION_BLOOM_CAPACITY', 100000))
+    
+    # Importação de elenco em lote
+    app.config['ROSTER_IMPORT_MAX_ROWS'] = int(os.environ.get('ROSTER_IMPORT_MAX_ROWS', 1000))
+    
+    # Perfil do banco: pool de conexões e, para SQLite em arquivo, WAL, pragmas,
+    # busy timeout e pool somente leitura para as requisições GET
+    app.config['DB_PROFILE_ENABLED'] = os.environ.get('DB_PROFILE_ENABLED', 'true').lower() == 'true'
+    app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 5))
+    app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    app.config['DB_POOL_TIMEOUT'] = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+    # Pool somente leitura para as GETs: desligado até um ganho ser medido (benchmarks/bench_sqlite_profile.py)
+    app.config['DB_READ_ONLY_GET'] = os.environ.get('DB_READ_ONLY_GET', 'false').lower() == 'true'
+    app.config['SQLITE_WAL'] = os.environ.get('SQLITE_WAL', 'true').lower() == 'true'
+    app.config['SQLITE_SYNCHRONOUS'] = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    app.config['SQLITE_CACHE_SIZE_KB'] = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 20000))
+    app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE', 268435456))
+    app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    
+    from app import db_profile
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = db_profile.engine_options(app.config)
+    
+    # Aplicar migrações pendentes ao iniciar (desative e use `flask schema-upgrade` se preferir)
+    app.config['SCHEMA_AUTO_MIGRATE'] = os.environ.get('SCHEMA_AUTO_MIGRATE', 'true').lower() == 'true'
+    
+    # Cache dos usuários autenticados (segundos)
+    app.config['PRINCIPAL_CACHE_TTL'] = float(os.environ.get('PRINCIPAL_CACHE_TTL', 30))
+    
+    if app.config['TRUSTED_PROXY_COUNT'] > 0:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXY_COUNT'],
+                                x_proto=app.config['TRUSTED_PROXY_COUNT'])
     
     # Inicializar extensões com app
     db.init_app(app)
+    db_profile.init_app(app, db)
     jwt.init_app(app)
     CORS(app, origins="*")
     
+    from app.services.pubsub import hub
+    from app.services.job_queue import job_queue
+    from app.utils.principal import principal_cache
+    from app.utils.rate_limit import limiter
+    from app.services.revocation_store import revocation_store
+    hub.init_app(app)
+    job_queue.init_app(app)
+    principal_cache.init_app(app)
+    limiter.init_app(app)
+    revocation_store.init_app(app)
+    
+    # Tokens revogados (logout) e contas desativadas são recusados
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        return revocation_store.is_revoked(jwt_payload)
+    
+    @jwt.revoked_token_loader
+    def revoked_token_response(jwt_header, jwt_payload):
+        return jsonify({'error': 'Token revogado ou conta desativada'}), 401
+    
+    # Tokens com escopo (ex.: o do stream do chat) só valem na rota do escopo
+    from app.utils.principal import token_scope_allowed
+    
+    @jwt.token_verification_loader
+    def check_token_scope(jwt_header, jwt_payload):
+        return token_scope_allowed(jwt_payload)
+    
+    @jwt.token_verification_failed_loader
+    def token_scope_response(jwt_header, jwt_payload):
+        return jsonify({'error': 'Token não é válido para esta rota'}), 401
+    
     # Registrar blueprints
     from app.routes.auth import auth_bp
+    from app.routes.trainer import trainer_bp
+    from app.routes.player import player_bp
+    from app.routes.training import training_bp
+    from app.routes.ai import ai_bp
+    from app.routes.chat import chat_bp
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(trainer_bp, url_prefix='/api/trainer')
+    app.register_blueprint(player_bp, url_prefix='/api/player')
+    app.register_blueprint(training_bp, url_prefix='/api/training')
+    app.register_blueprint(ai_bp, url_prefix='/api/ai')
+    app.register_blueprint(chat_bp, url_prefix='/api/chat')
     
     # Rota para servir a interface
     @app.route('/')
     def index():
         return app.send_static_file('index.html')
     
-    # Criar tabelas
-    with app.app_context():
-        db.create_all()
+    # Criar tabelas e aplicar migrações pendentes (índices e alterações em bancos já existentes)
+    from app import migrations
+    migrations.init_app(app)
+    
+    if app.config['JOB_FAIL_INTERRUPTED_ON_START']:
+        with app.app_context():
+            job_queue.fail_interrupted_jobs()
     
     return app 
\ No newline at end of file
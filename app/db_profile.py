@@ -0,0 +1,138 @@
+"""
+Perfil de produção do banco de dados
+
+Para SQLite em arquivo: modo WAL, pragmas aplicados a cada conexão nova,
+busy timeout e, com DB_READ_ONLY_GET=true, um pool de conexões somente leitura
+usado pelas consultas das requisições GET. Para outros bancos, apenas o
+dimensionamento do pool.
+Tudo configurável por variáveis de ambiente (ver create_app).
+"""
+import weakref
+import sqlalchemy as sa
+from flask import current_app, g, has_app_context, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from typing import Dict, Optional
+
+READ_ONLY_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def _is_sqlite_file(uri: str) -> bool:
+    return uri.startswith('sqlite') and ':memory:' not in uri and uri.rstrip('/') != 'sqlite:'
+
+
+def engine_options(config) -> Dict:
+    """Opções da engine (SQLALCHEMY_ENGINE_OPTIONS) conforme o perfil configurado"""
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    if not config.get('DB_PROFILE_ENABLED', True):
+        return {}
+
+    options = {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT']
+    }
+    if _is_sqlite_file(uri):
+        # O driver espera até `timeout` segundos por um lock antes de "database is locked";
+        # conexões do pool circulam entre as threads do worker
+        options['connect_args'] = {
+            'timeout': config['SQLITE_BUSY_TIMEOUT_MS'] / 1000,
+            'check_same_thread': False
+        }
+    elif uri.startswith('sqlite'):
+        return {}
+    else:
+        options['pool_pre_ping'] = True
+    return options
+
+
+def _sqlite_pragmas(config, read_only: bool = False):
+    """Listener de conexão que aplica os pragmas do perfil"""
+    pragmas = [
+        f"journal_mode={'WAL' if config['SQLITE_WAL'] else 'DELETE'}",
+        f"synchronous={config['SQLITE_SYNCHRONOUS']}",
+        f"cache_size=-{config['SQLITE_CACHE_SIZE_KB']}",
+        f"mmap_size={config['SQLITE_MMAP_SIZE']}",
+        f"busy_timeout={config['SQLITE_BUSY_TIMEOUT_MS']}",
+        'temp_store=MEMORY'
+    ]
+    if read_only:
+        pragmas.append('query_only=ON')
+
+    def apply(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(f'PRAGMA {pragma}')
+        finally:
+            cursor.close()
+
+    return apply
+
+
+class RoutingSession(Session):
+    """
+    Sessão que envia as consultas das requisições de leitura ao pool somente leitura
+    Escritas (flush, INSERT/UPDATE/DELETE, SQL textual) usam sempre a engine principal;
+    depois da primeira escrita, a transação inteira segue nela (lê o que escreveu)
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            is_select = getattr(clause, 'is_select', False)
+            if self._flushing or (clause is not None and not is_select):
+                self.info['db_wrote'] = True
+            elif is_select and not self.info.get('db_wrote') and _read_only_request():
+                engine = _read_only_engine()
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+@event.listens_for(RoutingSession, 'after_rollback')
+def _reset_write_flag(session):
+    session.info.pop('db_wrote', None)
+
+
+def _read_only_request() -> bool:
+    return has_request_context() and g.get('db_read_only', False)
+
+
+def _read_only_engine() -> Optional[sa.engine.Engine]:
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('db_profile', {}).get('read_only_engine')
+
+
+def dispose(app) -> None:
+    """Fecha as conexões do pool somente leitura (a engine principal é do Flask-SQLAlchemy)"""
+    engine = app.extensions.get('db_profile', {}).get('read_only_engine')
+    if engine is not None:
+        engine.dispose()
+
+
+def init_app(app, db) -> None:
+    """Aplica os pragmas às engines e cria o pool somente leitura (após db.init_app)"""
+    state = {'read_only_engine': None}
+    app.extensions['db_profile'] = state
+
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if not app.config.get('DB_PROFILE_ENABLED', True) or not _is_sqlite_file(uri):
+        return
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'connect', _sqlite_pragmas(app.config))
+
+    if app.config.get('DB_READ_ONLY_GET', False):
+        # Mesmo arquivo, pool próprio; PRAGMA query_only recusa qualquer escrita
+        read_only_engine = sa.create_engine(engine.url, **engine_options(app.config))
+        event.listen(read_only_engine, 'connect', _sqlite_pragmas(app.config, read_only=True))
+        state['read_only_engine'] = read_only_engine
+        # Conexões fechadas quando a aplicação é descartada ou o processo termina
+        weakref.finalize(app, read_only_engine.dispose)
+
+        @app.before_request
+        def mark_read_only_request():
+            g.db_read_only = request.method in READ_ONLY_METHODS
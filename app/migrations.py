@@ -0,0 +1,266 @@
+"""
+Migrações versionadas do esquema
+
+db.create_all() só cria tabelas que ainda não existem; alterações em bancos
+já criados (como novos índices) passam por aqui. Cada migração roda uma única
+vez, em sua própria transação, e fica registrada na tabela schema_version.
+
+Uso:
+    flask --app run schema-upgrade     # aplica as migrações pendentes
+    flask --app run schema-version     # versão atual do banco
+    flask --app run schema-check       # EXPLAIN das queries mais usadas
+"""
+from datetime import datetime
+from functools import lru_cache
+import click
+import sqlalchemy as sa
+from sqlalchemy.exc import IntegrityError, OperationalError
+from app import db
+from typing import Callable, Dict, List, Tuple
+
+schema_version = sa.Table(
+    'schema_version', sa.MetaData(),
+    sa.Column('version', sa.Integer, primary_key=True),
+    sa.Column('name', sa.String(200), nullable=False),
+    sa.Column('applied_at', sa.DateTime, nullable=False)
+)
+
+
+# Consultas frequentes das rotas: (nome, índice, tabela, colunas do índice, consulta de exemplo)
+HOT_QUERIES: List[Tuple[str, str, str, Tuple[str, ...], Callable[[sa.Table], sa.Select]]] = [
+    # Histórico da conversa (remetente, destinatário, ordenado por data)
+    ('chat_history', 'ix_chat_messages_sender_receiver_timestamp', 'chat_messages',
+     ('sender_id', 'receiver_id', 'timestamp'),
+     lambda t: sa.select(t.c.id).where(t.c.sender_id == 1, t.c.receiver_id == 2).order_by(t.c.timestamp.desc())),
+    # Mensagens não lidas do destinatário
+    ('chat_unread', 'ix_chat_messages_receiver_is_read', 'chat_messages',
+     ('receiver_id', 'is_read'),
+     lambda t: sa.select(sa.func.count()).select_from(t).where(t.c.receiver_id == 1, t.c.is_read == sa.false())),
+    # Treinos do jogador, dos mais recentes para os mais antigos
+    ('player_trainings', 'ix_trainings_player_created_at', 'trainings',
+     ('player_id', 'created_at'),
+     lambda t: sa.select(t.c.id).where(t.c.player_id == 1).order_by(t.c.created_at.desc())),
+    # Próximos treinos pendentes do jogador
+    ('upcoming_trainings', 'ix_trainings_player_scheduled_completed', 'trainings',
+     ('player_id', 'scheduled_date', 'is_completed'),
+     lambda t: sa.select(t.c.id).where(
+         t.c.player_id == 1, t.c.scheduled_date > datetime(2000, 1, 1), t.c.is_completed == sa.false()
+     )),
+    # Elenco do treinador filtrado por posição
+    ('roster_by_position', 'ix_players_trainer_position', 'players',
+     ('trainer_id', 'position'),
+     lambda t: sa.select(t.c.id).where(t.c.trainer_id == 1, t.c.position == 'PITCHER')),
+    # Histórico de análises de AI do jogador
+    ('analysis_history', 'ix_ai_analyses_player_created_at', 'ai_analyses',
+     ('player_id', 'created_at'),
+     lambda t: sa.select(t.c.id).where(t.c.player_id == 1).order_by(t.c.created_at.desc())),
+]
+
+
+def _table(name: str) -> sa.Table:
+    return db.metadata.tables[name]
+
+
+@lru_cache(maxsize=1)
+def hot_query_indexes() -> Tuple[sa.Index, ...]:
+    """
+    Índices compostos dos filtros mais frequentes das rotas
+    Ficam associados às tabelas, então tabelas novas já os recebem no create_all
+    """
+    return tuple(
+        sa.Index(index_name, *(_table(table_name).c[column] for column in columns))
+        for _, index_name, table_name, columns, _ in HOT_QUERIES
+    )
+
+
+# As migrações abaixo usam DDL fixo, com tabelas e colunas explícitas: o que cada uma
+# faz não depende dos modelos mapeados na versão do código que a executa
+
+
+def _require_table(connection, table_name: str, columns: Tuple[str, ...] = ()) -> None:
+    """Falha a migração se a tabela (ou alguma das colunas) não existir no banco"""
+    inspector = sa.inspect(connection)
+    if not inspector.has_table(table_name):
+        raise RuntimeError(f'Migração requer a tabela {table_name}, que não existe no banco')
+    existing = {column['name'] for column in inspector.get_columns(table_name)}
+    missing = [column for column in columns if column not in existing]
+    if missing:
+        raise RuntimeError(f"Migração requer as colunas {', '.join(missing)} da tabela {table_name}")
+
+
+def _create_index(connection, index_name: str, table_name: str, columns: Tuple[str, ...]) -> None:
+    _require_table(connection, table_name, columns)
+    quote = connection.dialect.identifier_preparer.quote
+    connection.execute(sa.text(
+        f"CREATE INDEX IF NOT EXISTS {quote(index_name)} ON {quote(table_name)} "
+        f"({', '.join(quote(column) for column in columns)})"
+    ))
+
+
+def _add_column(connection, table_name: str, column_name: str, column_type: str) -> None:
+    """Adiciona a coluna se o banco ainda não a tiver"""
+    existing = {column['name'] for column in sa.inspect(connection).get_columns(table_name)}
+    if column_name not in existing:
+        quote = connection.dialect.identifier_preparer.quote
+        connection.execute(sa.text(f'ALTER TABLE {quote(table_name)} ADD COLUMN {quote(column_name)} {column_type}'))
+
+
+def _create_query_indexes(connection) -> None:
+    # O índice do elenco por posição fica para a migração 3, que cria a coluna position
+    _create_index(connection, 'ix_chat_messages_sender_receiver_timestamp', 'chat_messages',
+                  ('sender_id', 'receiver_id', 'timestamp'))
+    _create_index(connection, 'ix_chat_messages_receiver_is_read', 'chat_messages', ('receiver_id', 'is_read'))
+    _create_index(connection, 'ix_trainings_player_created_at', 'trainings', ('player_id', 'created_at'))
+    _create_index(connection, 'ix_trainings_player_scheduled_completed', 'trainings',
+                  ('player_id', 'scheduled_date', 'is_completed'))
+    _create_index(connection, 'ix_ai_analyses_player_created_at', 'ai_analyses', ('player_id', 'created_at'))
+
+
+def _add_stat_import_completed_at(connection) -> None:
+    # Importações anteriores à coluna já estavam concluídas
+    _require_table(connection, 'player_stat_imports', ('created_at',))
+    _add_column(connection, 'player_stat_imports', 'completed_at', 'TIMESTAMP')
+    connection.execute(sa.text(
+        'UPDATE player_stat_imports SET completed_at = created_at WHERE completed_at IS NULL'
+    ))
+
+
+# Colunas do perfil esportivo (nome, tipo SQL); position guarda o nome do membro de Position
+PLAYER_PROFILE_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ('position', 'VARCHAR(12)'),
+    ('team', 'VARCHAR(100)'),
+    ('jersey_number', 'INTEGER'),
+    ('height', 'FLOAT'),
+    ('weight', 'FLOAT'),
+    ('birth_date', 'DATE'),
+    ('strengths', 'TEXT'),
+    ('weaknesses', 'TEXT'),
+    ('batting_average', 'FLOAT'),
+    ('era', 'FLOAT'),
+    ('fielding_percentage', 'FLOAT'),
+    ('notes', 'TEXT'),
+    ('csv_data', 'TEXT'),
+)
+
+
+def _add_player_profile_columns(connection) -> None:
+    # Posição, time, número e demais campos do perfil, e o índice por posição que depende deles
+    _require_table(connection, 'players', ('trainer_id',))
+    for column_name, column_type in PLAYER_PROFILE_COLUMNS:
+        _add_column(connection, 'players', column_name, column_type)
+    _create_index(connection, 'ix_players_trainer_position', 'players', ('trainer_id', 'position'))
+
+
+def _create_analysis_history_index(connection) -> None:
+    # Bancos que aplicaram a migração 1 antes de ela incluir ai_analyses
+    _create_index(connection, 'ix_ai_analyses_player_created_at', 'ai_analyses', ('player_id', 'created_at'))
+
+
+# (versão, descrição, função que recebe a conexão); nunca alterar migrações já publicadas
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, 'Índices compostos das queries mais usadas', _create_query_indexes),
+    (2, 'Conclusão das importações de estatísticas', _add_stat_import_completed_at),
+    (3, 'Perfil esportivo dos jogadores', _add_player_profile_columns),
+    (4, 'Índice do histórico de análises de AI', _create_analysis_history_index),
+]
+
+
+def current_version(connection) -> int:
+    schema_version.create(connection, checkfirst=True)
+    return connection.execute(sa.select(sa.func.max(schema_version.c.version))).scalar() or 0
+
+
+def upgrade(engine=None) -> List[int]:
+    """
+    Aplica as migrações pendentes, em ordem; retorna as versões aplicadas
+    Se outro worker aplicar a mesma migração ao mesmo tempo, ela é ignorada aqui
+    """
+    engine = engine or db.engine
+    with engine.begin() as connection:
+        version = current_version(connection)
+
+    applied = []
+    for number, name, migrate in MIGRATIONS:
+        if number <= version:
+            continue
+        try:
+            with engine.begin() as connection:
+                migrate(connection)
+                connection.execute(sa.insert(schema_version).values(
+                    version=number, name=name, applied_at=datetime.utcnow()
+                ))
+            applied.append(number)
+        except (IntegrityError, OperationalError):
+            with engine.begin() as connection:
+                if current_version(connection) < number:
+                    raise
+    return applied
+
+
+def hot_queries() -> Dict[str, Tuple[str, sa.Select]]:
+    """{nome: (índice esperado, consulta)} das consultas frequentes"""
+    return {
+        name: (index_name, build(_table(table_name)))
+        for name, index_name, table_name, _, build in HOT_QUERIES
+    }
+
+
+def explain_hot_queries(engine=None) -> Dict[str, Dict]:
+    """
+    Plano de execução (EXPLAIN QUERY PLAN, SQLite) de cada consulta frequente
+    uses_index é verdadeiro quando o plano usa o índice criado para a consulta
+    """
+    engine = engine or db.engine
+    if engine.dialect.name != 'sqlite':
+        raise NotImplementedError('Verificação de planos disponível apenas para SQLite')
+
+    report = {}
+    with engine.connect() as connection:
+        for name, (index_name, query) in hot_queries().items():
+            sql = str(query.compile(engine, compile_kwargs={'literal_binds': True}))
+            plan = [row[-1] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}')]
+            full_scan = any(step.startswith('SCAN') and 'INDEX' not in step for step in plan)
+            report[name] = {
+                'index': index_name,
+                'uses_index': not full_scan and any(f'INDEX {index_name}' in step for step in plan),
+                'plan': plan
+            }
+    return report
+
+
+def init_app(app) -> None:
+    """Cria as tabelas, registra os comandos de linha de comando e aplica migrações pendentes"""
+
+    @app.cli.command('schema-upgrade')
+    def schema_upgrade_command():
+        """Aplica as migrações pendentes"""
+        applied = upgrade()
+        click.echo(f'Migrações aplicadas: {applied}' if applied else 'Banco já está atualizado')
+
+    @app.cli.command('schema-version')
+    def schema_version_command():
+        """Mostra a versão atual do esquema"""
+        with db.engine.begin() as connection:
+            click.echo(current_version(connection))
+
+    @app.cli.command('schema-check')
+    def schema_check_command():
+        """Confere se as consultas frequentes usam índices"""
+        report = explain_hot_queries()
+        for name, result in report.items():
+            click.echo(f"{'✅' if result['uses_index'] else '❌'} {name}: {' | '.join(result['plan'])}")
+        if not all(result['uses_index'] for result in report.values()):
+            raise SystemExit(1)
+
+    with app.app_context():
+        # Índices associados antes do create_all: tabelas novas já nascem com eles
+        hot_query_indexes()
+        db.create_all()
+
+        if app.config.get('SCHEMA_AUTO_MIGRATE', True):
+            # Uma migração com falha não impede a aplicação de subir; ela é tentada de novo
+            # no próximo início (ou com `flask schema-upgrade`)
+            try:
+                upgrade()
+            except Exception:
+                app.logger.exception('Falha ao aplicar as migrações pendentes; o esquema atual foi mantido')
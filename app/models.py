@@ -1,12 +1,33 @@
 from app import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import check_password_hash
+from app.utils.password_utils import hash_password, needs_rehash
+from app.utils.fields import subfields, wants
+from app.utils.serialization import get_serializer
 from datetime import datetime
 import enum
+import json
 
 class UserType(enum.Enum):
     TRAINER = "trainer"
     PLAYER = "player"
 
+class Position(enum.Enum):
+    PITCHER = "pitcher"
+    CATCHER = "catcher"
+    FIRST_BASE = "first_base"
+    SECOND_BASE = "second_base"
+    THIRD_BASE = "third_base"
+    SHORTSTOP = "shortstop"
+    LEFT_FIELD = "left_field"
+    CENTER_FIELD = "center_field"
+    RIGHT_FIELD = "right_field"
+
+class JobStatus(enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
 class User(db.Model):
     __tablename__ = 'users'
     
@@ -24,26 +45,24 @@ class User(db.Model):
     # Se é um treinador, pode ter vários jogadores
     players = db.relationship('Player', backref='trainer', lazy=True, foreign_keys='Player.trainer_id')
     
+    # Nunca incluído nas respostas
+    __serialize_exclude__ = ('password_hash',)
+    
     def set_password(self, password):
         """Define a senha do usuário"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
         """Verifica se a senha está correta"""
         return check_password_hash(self.password_hash, password)
     
-    def to_dict(self):
-        """Converte o objeto para dicionário"""
-        return {
-            'id': self.id,
-            'username': self.username,
-            'email': self.email,
-            'user_type': self.user_type.value,
-            'first_name': self.first_name,
-            'last_name': self.last_name,
-            'is_active': self.is_active,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+    def password_needs_rehash(self):
+        """Indica se o hash da senha usa parâmetros diferentes dos configurados"""
+        return needs_rehash(self.password_hash)
+    
+    def to_dict(self, fields=None):
+        """Converte o objeto para dicionário (apenas os campos pedidos, se `fields` for informado)"""
+        return get_serializer(User).dump(self, fields)
     
     def __repr__(self):
         return f'<User {self.username}>'
@@ -56,18 +75,325 @@ class Player(db.Model):
     trainer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Perfil esportivo
+    position = db.Column(db.Enum(Position))
+    team = db.Column(db.String(100))
+    jersey_number = db.Column(db.Integer)
+    height = db.Column(db.Float)  # cm
+    weight = db.Column(db.Float)  # kg
+    birth_date = db.Column(db.Date)
+    strengths = db.Column(db.Text)
+    weaknesses = db.Column(db.Text)
+    batting_average = db.Column(db.Float)
+    era = db.Column(db.Float)
+    fielding_percentage = db.Column(db.Float)
+    notes = db.Column(db.Text)
+    csv_data = db.Column(db.Text)  # JSON de importações antigas de estatísticas
+    
     # Relacionamentos
     user = db.relationship('User', foreign_keys=[user_id], backref='player_profile')
     
+    # O JSON antigo de estatísticas é lido por get_processed_data, nunca enviado como está
+    __serialize_exclude__ = ('csv_data',)
+    
+    def to_dict(self, fields=None):
+        """Converte o objeto para dicionário (apenas os campos pedidos, se `fields` for informado)"""
+        data = get_serializer(Player).dump(self, fields)
+        # O usuário só é carregado se user_info for pedido
+        if wants(fields, 'user_info'):
+            data['user_info'] = self.user.to_dict(subfields(fields, 'user_info')) if self.user else None
+        return data
+    
+    def __repr__(self):
+        return f'<Player {self.user.username if self.user else self.id}>'
+
+class Exercise(db.Model):
+    __tablename__ = 'exercises'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    training_id = db.Column(db.Integer, db.ForeignKey('trainings.id'), nullable=False, index=True)
+    name = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text)
+    category = db.Column(db.String(100))
+    sets = db.Column(db.Integer)
+    reps = db.Column(db.Integer)
+    duration_minutes = db.Column(db.Integer)
+    rest_seconds = db.Column(db.Integer)
+    order_index = db.Column(db.Integer, default=0)
+    is_completed = db.Column(db.Boolean, default=False)
+    notes = db.Column(db.Text)  # Observações do jogador ao concluir
+    
+    def to_dict(self, fields=None):
+        """Converte o objeto para dicionário (apenas os campos pedidos, se `fields` for informado)"""
+        return get_serializer(Exercise).dump(self, fields)
+    
+    def __repr__(self):
+        return f'<Exercise {self.name}>'
+
+class Training(db.Model):
+    __tablename__ = 'trainings'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text)
+    trainer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    player_id = db.Column(db.Integer, db.ForeignKey('players.id'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    scheduled_date = db.Column(db.DateTime)
+    duration_minutes = db.Column(db.Integer)
+    is_completed = db.Column(db.Boolean, default=False)
+    completion_date = db.Column(db.DateTime)
+    
+    # Relacionamentos
+    exercises = db.relationship('Exercise', backref='training', lazy=True,
+                                cascade='all, delete-orphan', order_by='Exercise.order_index')
+    media_files = db.relationship('MediaFile', backref='training', lazy=True, cascade='all, delete-orphan')
+    player = db.relationship('Player', backref='trainings')
+    
+    __serialize_nested__ = {'exercises': ('exercises', Exercise)}
+    
+    def to_dict(self, fields=None):
+        """Converte o objeto para dicionário, com os exercícios (apenas os campos pedidos, se `fields` for informado)"""
+        return get_serializer(Training).dump(self, fields)
+    
+    def __repr__(self):
+        return f'<Training {self.title}>'
+
+class MediaFile(db.Model):
+    __tablename__ = 'media_files'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    training_id = db.Column(db.Integer, db.ForeignKey('trainings.id'), nullable=False, index=True)
+    filename = db.Column(db.String(255), nullable=False)
+    original_filename = db.Column(db.String(255), nullable=False)
+    file_path = db.Column(db.String(500), nullable=False)
+    file_type = db.Column(db.String(50))
+    file_size = db.Column(db.Integer)  # bytes
+    uploaded_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    upload_date = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Caminho no servidor nunca incluído nas respostas
+    __serialize_exclude__ = ('file_path',)
+    
+    def to_dict(self, fields=None):
+        """Converte o objeto para dicionário (apenas os campos pedidos, se `fields` for informado)"""
+        return get_serializer(MediaFile).dump(self, fields)
+    
+    def __repr__(self):
+        return f'<MediaFile {self.original_filename}>'
+
+class AIAnalysis(db.Model):
+    __tablename__ = 'ai_analyses'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    player_id = db.Column(db.Integer, db.ForeignKey('players.id'), nullable=False)
+    trainer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    analysis_type = db.Column(db.String(50), nullable=False)
+    prompt = db.Column(db.Text)
+    response = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relacionamentos
+    player = db.relationship('Player', backref='ai_analyses')
+    
+    def to_dict(self, fields=None):
+        """Converte o objeto para dicionário (apenas os campos pedidos, se `fields` for informado)"""
+        return get_serializer(AIAnalysis).dump(self, fields)
+    
+    def __repr__(self):
+        return f'<AIAnalysis {self.analysis_type} {self.player_id}>'
+
+class ChatMessage(db.Model):
+    __tablename__ = 'chat_messages'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    sender_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    receiver_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    # Mensagens antigas; as novas são marcadas como lidas por ChatReadState
+    is_read = db.Column(db.Boolean, default=False)
+    
+    def to_dict(self, fields=None):
+        """Converte o objeto para dicionário (apenas os campos pedidos, se `fields` for informado)"""
+        return get_serializer(ChatMessage).dump(self, fields)
+    
+    def __repr__(self):
+        return f'<ChatMessage {self.sender_id}->{self.receiver_id}>'
+
+class ChatReadState(db.Model):
+    __tablename__ = 'chat_read_states'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    peer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    last_read_message_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Uma marca de leitura por participante e conversa
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'peer_id', name='uq_chat_read_states_user_peer'),
+    )
+    
+    def to_dict(self):
+        """Converte o objeto para dicionário"""
+        return {
+            'user_id': self.user_id,
+            'peer_id': self.peer_id,
+            'last_read_message_id': self.last_read_message_id,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+    
+    def __repr__(self):
+        return f'<ChatReadState {self.user_id}->{self.peer_id} @{self.last_read_message_id}>'
+
+
+class BackgroundJob(db.Model):
+    __tablename__ = 'background_jobs'
+    
+    id = db.Column(db.String(32), primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.Enum(JobStatus), nullable=False, default=JobStatus.QUEUED)
+    owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    player_id = db.Column(db.Integer, db.ForeignKey('players.id'))
+    params = db.Column(db.Text)  # JSON
+    result = db.Column(db.Text)  # JSON
+    error = db.Column(db.Text)
+    progress_done = db.Column(db.Integer, default=0)
+    progress_total = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
     def to_dict(self):
         """Converte o objeto para dicionário"""
         return {
             'id': self.id,
+            'job_type': self.job_type,
+            'status': self.status.value,
+            'player_id': self.player_id,
+            'params': json.loads(self.params) if self.params else None,
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'progress': {
+                'done': self.progress_done or 0,
+                'total': self.progress_total
+            },
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+    
+    def __repr__(self):
+        return f'<BackgroundJob {self.id} {self.job_type} {self.status.value}>'
+
+
+class TokenRevocation(db.Model):
+    __tablename__ = 'token_revocations'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), nullable=False, unique=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    reason = db.Column(db.String(50), default='logout')
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Converte o objeto para dicionário"""
+        return {
+            'jti': self.jti,
             'user_id': self.user_id,
-            'trainer_id': self.trainer_id,
+            'reason': self.reason,
+            'revoked_at': self.revoked_at.isoformat() if self.revoked_at else None
+        }
+    
+    def __repr__(self):
+        return f'<TokenRevocation {self.jti} user={self.user_id}>'
+
+
+class PlayerStatImport(db.Model):
+    __tablename__ = 'player_stat_imports'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    player_id = db.Column(db.Integer, db.ForeignKey('players.id'), nullable=False, index=True)
+    uploaded_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    filename = db.Column(db.String(255))
+    row_count = db.Column(db.Integer, default=0)
+    columns = db.Column(db.Text)  # JSON
+    mapped_fields = db.Column(db.Text)  # JSON
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)  # vazio enquanto a importação está em andamento
+    
+    # Relacionamentos
+    summaries = db.relationship('PlayerStatSummary', lazy=True, order_by='PlayerStatSummary.id')
+    
+    def to_dict(self):
+        """Converte o objeto para dicionário"""
+        return {
+            'id': self.id,
+            'player_id': self.player_id,
+            'filename': self.filename,
+            'row_count': self.row_count,
+            'columns': json.loads(self.columns) if self.columns else [],
+            'mapped_fields': json.loads(self.mapped_fields) if self.mapped_fields else {},
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'user_info': self.user.to_dict() if self.user else None
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
         }
     
     def __repr__(self):
-        return f'<Player {self.user.username if self.user else self.id}>' 
\ No newline at end of file
+        return f'<PlayerStatImport {self.id} player={self.player_id}>'
+
+
+class PlayerStat(db.Model):
+    __tablename__ = 'player_stats'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    player_id = db.Column(db.Integer, db.ForeignKey('players.id'), nullable=False)
+    import_id = db.Column(db.Integer, db.ForeignKey('player_stat_imports.id'), nullable=False)
+    game_index = db.Column(db.Integer, nullable=False)  # linha do jogo no arquivo (1, 2, ...)
+    game_date = db.Column(db.Date)
+    metric = db.Column(db.String(50), nullable=False)
+    value = db.Column(db.Float, nullable=False)
+    
+    # Série de uma métrica do jogador, por data ou por ordem dos jogos
+    __table_args__ = (
+        db.Index('ix_player_stats_player_metric_date', 'player_id', 'metric', 'game_date'),
+        db.Index('ix_player_stats_player_metric_game', 'player_id', 'metric', 'game_index'),
+    )
+    
+    __serialize_exclude__ = ('id', 'player_id', 'import_id')
+    
+    def to_dict(self):
+        """Converte o objeto para dicionário"""
+        return get_serializer(PlayerStat).dump(self)
+    
+    def __repr__(self):
+        return f'<PlayerStat {self.player_id} {self.metric}#{self.game_index}={self.value}>'
+
+
+class PlayerStatSummary(db.Model):
+    __tablename__ = 'player_stat_summaries'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    player_id = db.Column(db.Integer, db.ForeignKey('players.id'), nullable=False)
+    import_id = db.Column(db.Integer, db.ForeignKey('player_stat_imports.id'), nullable=False)
+    column = db.Column(db.String(255), nullable=False)  # nome da coluna no arquivo
+    metric = db.Column(db.String(50))  # campo do baseball mapeado, se houver
+    mean = db.Column(db.Float)
+    std = db.Column(db.Float)
+    min = db.Column(db.Float)
+    max = db.Column(db.Float)
+    latest = db.Column(db.Float)
+    trend = db.Column(db.String(20))
+    
+    __table_args__ = (
+        db.UniqueConstraint('player_id', 'column', name='uq_player_stat_summaries_player_column'),
+    )
+    
+    __serialize_exclude__ = ('id', 'player_id', 'import_id')
+    
+    def to_dict(self):
+        """Converte o objeto para dicionário"""
+        return get_serializer(PlayerStatSummary).dump(self)
+    
+    def __repr__(self):
+        return f'<PlayerStatSummary {self.player_id} {self.column}>'
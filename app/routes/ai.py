@@ -1,8 +1,13 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from app import db
 from app.models import User, UserType, AIAnalysis
-from app.services.ai_service import PerplexityAIService
+from app.services.ai_service import get_ai_service, get_response_cache, inflight_requests
+from app.utils.sse import sse_response, relay_ai_stream, is_stream_requested
+from app.utils.pagination import paginate_by_cursor, parse_pagination_args, InvalidCursorError
+from app.utils.principal import get_current_principal, get_current_user, get_current_player
+from app.utils.fields import requested_fields
+from app.utils.serialization import load_options_for
 
 ai_bp = Blueprint('ai', __name__)
 
@@ -24,8 +29,8 @@ def get_workout_tips():
         if category not in valid_categories:
             return jsonify({'error': f'Categoria inválida. Use: {", ".join(valid_categories)}'}), 400
         
-        # Inicializar serviço de AI
-        ai_service = PerplexityAIService()
+        # Serviço de AI compartilhado (pool de conexões)
+        ai_service = get_ai_service()
         
         # Obter dicas da AI
         tips = ai_service.generate_workout_tips(category, difficulty_level)
@@ -53,8 +58,8 @@ def get_exercise_suggestions():
         position = data.get('position', 'general')
         weaknesses = data.get('weaknesses', '')
         
-        # Inicializar serviço de AI
-        ai_service = PerplexityAIService()
+        # Serviço de AI compartilhado (pool de conexões)
+        ai_service = get_ai_service()
         
         # Obter sugestões da AI
         suggestions = ai_service.suggest_exercise_alternatives(
@@ -77,8 +82,7 @@ def get_exercise_suggestions():
 def get_general_advice():
     """Chat geral com AI para conselhos de baseball"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = get_current_user()
         data = request.get_json()
         
         if not data.get('question'):
@@ -87,13 +91,12 @@ def get_general_advice():
         question = data['question']
         context = data.get('context', 'general')
         
-        # Inicializar serviço de AI
-        ai_service = PerplexityAIService()
+        # Serviço de AI compartilhado (pool de conexões)
+        ai_service = get_ai_service()
         
         # Preparar contexto baseado no tipo de usuário
         if user.user_type == UserType.PLAYER:
-            from app.models import Player
-            player = Player.query.filter_by(user_id=user.id).first()
+            player = get_current_player()
             if player:
                 user_context = f"""
                 Usuário: Jogador de baseball
@@ -117,6 +120,12 @@ def get_general_advice():
         Adapte suas respostas ao nível e função do usuário (jogador ou treinador).
         Seja específico e forneça conselhos acionáveis."""
         
+        # Resposta em stream (SSE), trecho a trecho
+        if is_stream_requested(data):
+            return sse_response(relay_ai_stream(
+                ai_service._make_request(question, system_message, stream=True)
+            ))
+        
         # Fazer requisição para AI
         advice = ai_service._make_request(question, system_message)
         
@@ -139,8 +148,8 @@ def get_injury_prevention_advice():
         position = data.get('position', 'general')
         injury_concern = data.get('injury_concern', 'general')
         
-        # Inicializar serviço de AI
-        ai_service = PerplexityAIService()
+        # Serviço de AI compartilhado (pool de conexões)
+        ai_service = get_ai_service()
         
         # Criar prompt específico para prevenção de lesões
         prompt = f"""
@@ -161,7 +170,7 @@ def get_injury_prevention_advice():
         Forneça conselhos seguros e baseados em evidências científicas.
         Sempre recomende consultar profissionais de saúde para casos específicos."""
         
-        advice = ai_service._make_request(prompt, system_message)
+        advice = ai_service._make_request(prompt, system_message, use_cache=True)
         
         return jsonify({
             'position': position,
@@ -177,8 +186,7 @@ def get_injury_prevention_advice():
 def get_nutrition_advice():
     """Conselhos nutricionais para jogadores de baseball"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = get_current_user()
         data = request.get_json()
         
         goal = data.get('goal', 'general')  # performance, weight_gain, weight_loss, recovery
@@ -187,8 +195,7 @@ def get_nutrition_advice():
         # Obter informações do jogador se disponível
         user_info = ""
         if user.user_type == UserType.PLAYER:
-            from app.models import Player
-            player = Player.query.filter_by(user_id=user.id).first()
+            player = get_current_player()
             if player:
                 user_info = f"""
                 Posição: {player.position.value if player.position else 'Não especificada'}
@@ -196,8 +203,8 @@ def get_nutrition_advice():
                 Peso: {player.weight}kg
                 """ if player.height and player.weight else f"Posição: {player.position.value if player.position else 'Não especificada'}"
         
-        # Inicializar serviço de AI
-        ai_service = PerplexityAIService()
+        # Serviço de AI compartilhado (pool de conexões)
+        ai_service = get_ai_service()
         
         # Criar prompt específico para nutrição
         prompt = f"""
@@ -221,7 +228,7 @@ def get_nutrition_advice():
         Forneça conselhos seguros e baseados em evidências científicas.
         Sempre recomende consultar um nutricionista para planos personalizados."""
         
-        advice = ai_service._make_request(prompt, system_message)
+        advice = ai_service._make_request(prompt, system_message, use_cache=True)
         
         return jsonify({
             'goal': goal,
@@ -242,8 +249,8 @@ def get_mental_training_advice():
         focus_area = data.get('focus_area', 'general')  # confidence, concentration, pressure, visualization
         situation = data.get('situation', 'general')  # at_bat, pitching, fielding, game_situation
         
-        # Inicializar serviço de AI
-        ai_service = PerplexityAIService()
+        # Serviço de AI compartilhado (pool de conexões)
+        ai_service = get_ai_service()
         
         # Criar prompt específico para preparação mental
         prompt = f"""
@@ -266,7 +273,7 @@ def get_mental_training_advice():
         Forneça técnicas práticas e aplicáveis baseadas na psicologia esportiva moderna.
         Foque em estratégias que podem ser implementadas imediatamente."""
         
-        advice = ai_service._make_request(prompt, system_message)
+        advice = ai_service._make_request(prompt, system_message, use_cache=True)
         
         return jsonify({
             'focus_area': focus_area,
@@ -277,32 +284,59 @@ def get_mental_training_advice():
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
+@ai_bp.route('/cache-stats', methods=['GET'])
+@jwt_required()
+def get_cache_stats():
+    """Retorna os contadores do cache de respostas e da coalescência de requisições da AI (apenas treinadores)"""
+    try:
+        principal = get_current_principal()
+        if not principal or not principal.is_trainer:
+            return jsonify({'error': 'Acesso negado. Apenas treinadores podem acessar'}), 403
+        
+        return jsonify({
+            'cache': get_response_cache().get_stats(),
+            'inflight': inflight_requests.get_stats()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
 @ai_bp.route('/analysis-history', methods=['GET'])
 @jwt_required()
 def get_analysis_history():
     """Retorna histórico de análises de AI do usuário"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        principal = get_current_principal()
+        if not principal:
+            return jsonify({'error': 'Usuário não encontrado'}), 404
         
-        if user.user_type == UserType.TRAINER:
+        if principal.is_trainer:
             # Treinadores veem análises que criaram
-            analyses = AIAnalysis.query.filter_by(trainer_id=user.id)\
-                .order_by(AIAnalysis.created_at.desc()).limit(20).all()
-        elif user.user_type == UserType.PLAYER:
+            query = AIAnalysis.query.filter_by(trainer_id=principal.user_id)
+        elif principal.is_player:
             # Jogadores veem análises sobre eles
-            from app.models import Player
-            player = Player.query.filter_by(user_id=user.id).first()
-            if player:
-                analyses = AIAnalysis.query.filter_by(player_id=player.id)\
-                    .order_by(AIAnalysis.created_at.desc()).limit(20).all()
-            else:
-                analyses = []
+            if not principal.player_id:
+                return jsonify({'analyses': [], 'pagination': None}), 200
+            query = AIAnalysis.query.filter_by(player_id=principal.player_id)
         else:
-            analyses = []
+            return jsonify({'analyses': [], 'pagination': None}), 200
+        
+        # Só as colunas pedidas em ?fields= são lidas (prompt e resposta são textos longos)
+        fields = requested_fields()
+        query = query.options(*load_options_for(AIAnalysis, fields, always_load=('created_at',)))
+        
+        # Paginação por cursor, das mais recentes para as mais antigas
+        try:
+            analyses, pagination = paginate_by_cursor(
+                query, AIAnalysis.created_at, AIAnalysis.id,
+                **parse_pagination_args(request.args, default_limit=20)
+            )
+        except InvalidCursorError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
-            'analyses': [analysis.to_dict() for analysis in analyses]
+            'analyses': [analysis.to_dict(fields) for analysis in analyses],
+            'pagination': pagination
         }), 200
         
     except Exception as e:
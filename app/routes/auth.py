@@ -1,26 +1,18 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt
 from app import db
 from app.models import User, Player, UserType
-import re
+from app.utils.principal import (
+    principal_claims, get_current_principal, get_current_user, get_current_player, invalidate_principal
+)
+from app.utils.rate_limit import limiter, rate_limited_response
+from app.services.revocation_store import revocation_store
+from app.services.roster_service import parse_roster_args, list_roster
+from app.utils.fields import requested_fields, subfields, wants
+from app.utils.validators import is_valid_email, is_strong_password
 
 auth_bp = Blueprint('auth', __name__)
 
-def is_valid_email(email):
-    """Valida formato do email"""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
-
-def is_strong_password(password):
-    """Valida se a senha é forte o suficiente"""
-    if len(password) < 6:
-        return False, "Senha deve ter pelo menos 6 caracteres"
-    if not re.search(r'[A-Za-z]', password):
-        return False, "Senha deve conter pelo menos uma letra"
-    if not re.search(r'\d', password):
-        return False, "Senha deve conter pelo menos um número"
-    return True, "Senha válida"
-
 @auth_bp.route('/register', methods=['POST'])
 def register_trainer():
     """Registra um novo TREINADOR (apenas treinadores podem se cadastrar)"""
@@ -66,8 +58,8 @@ def register_trainer():
         db.session.add(user)
         db.session.commit()
         
-        # Criar token de acesso
-        access_token = create_access_token(identity=str(user.id))
+        # Criar token de acesso (papel do usuário nas claims)
+        access_token = create_access_token(identity=str(user.id), additional_claims=principal_claims(user))
         
         return jsonify({
             'message': 'Treinador registrado com sucesso',
@@ -85,8 +77,7 @@ def register_player():
     """Registra um novo JOGADOR (apenas treinadores podem cadastrar jogadores)"""
     try:
         # Verificar se quem está fazendo a requisição é um treinador
-        current_user_id = int(get_jwt_identity())
-        trainer = User.query.get(current_user_id)
+        trainer = get_current_user()
         
         if not trainer or trainer.user_type != UserType.TRAINER:
             return jsonify({'error': 'Apenas treinadores podem cadastrar jogadores'}), 403
@@ -165,12 +156,22 @@ def login():
         if user_type not in ['trainer', 'player']:
             return jsonify({'error': 'Tipo de usuário deve ser "trainer" ou "player"'}), 400
         
+        # Limitar tentativas antes de qualquer hash de senha: por IP toda tentativa conta;
+        # por conta só as falhas contam, mas uma conta bloqueada é recusada já aqui
+        account_key = str(data['username']).strip().lower()
+        retry_after = limiter.check(('login_ip', request.remote_addr or 'unknown'))
+        if retry_after is None:
+            retry_after = limiter.check(('login_account', account_key), charge=False)
+        if retry_after is not None:
+            return rate_limited_response(retry_after)
+        
         # Buscar usuário por username ou email
         user = User.query.filter(
             (User.username == data['username']) | (User.email == data['username'])
         ).first()
         
         if not user or not user.check_password(data['password']):
+            limiter.hit('login_account', account_key)
             return jsonify({'error': 'Credenciais inválidas'}), 401
         
         # Verificar se o tipo de usuário bate
@@ -180,17 +181,24 @@ def login():
         if not user.is_active:
             return jsonify({'error': 'Conta desativada'}), 403
         
-        # Criar token de acesso
-        access_token = create_access_token(identity=str(user.id))
+        # Atualizar o hash se os parâmetros configurados mudaram
+        if user.password_needs_rehash():
+            user.set_password(data['password'])
+            db.session.commit()
+            invalidate_principal(user.id)
         
         # Informações extras para jogadores
         extra_info = {}
+        player = None
         if user.user_type == UserType.PLAYER:
             player = Player.query.filter_by(user_id=user.id).first()
             if player:
                 extra_info['player_info'] = player.to_dict()
                 extra_info['trainer_info'] = player.trainer.to_dict() if player.trainer else None
         
+        # Criar token de acesso (papel, jogador e treinador nas claims)
+        access_token = create_access_token(identity=str(user.id), additional_claims=principal_claims(user, player))
+        
         return jsonify({
             'message': 'Login realizado com sucesso',
             'user': user.to_dict(),
@@ -199,32 +207,47 @@ def login():
         }), 200
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
 @auth_bp.route('/profile', methods=['GET'])
 @jwt_required()
 def get_profile():
-    """Retorna o perfil do usuário autenticado"""
+    """
+    Retorna o perfil do usuário autenticado
+    ?fields= seleciona partes da resposta (ex.: user.first_name,my_players.id)
+    """
     try:
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
+        user = get_current_user()
         
         if not user:
             return jsonify({'error': 'Usuário não encontrado'}), 404
         
-        response_data = {'user': user.to_dict()}
+        fields = requested_fields()
+        response_data = {}
+        if wants(fields, 'user'):
+            response_data['user'] = user.to_dict(subfields(fields, 'user'))
         
         # Adicionar informações extras para jogadores
         if user.user_type == UserType.PLAYER:
-            player = Player.query.filter_by(user_id=user.id).first()
+            player = get_current_player() if wants(fields, 'player_info') or wants(fields, 'trainer_info') else None
             if player:
-                response_data['player_info'] = player.to_dict()
-                response_data['trainer_info'] = player.trainer.to_dict() if player.trainer else None
+                if wants(fields, 'player_info'):
+                    response_data['player_info'] = player.to_dict(subfields(fields, 'player_info'))
+                if wants(fields, 'trainer_info'):
+                    response_data['trainer_info'] = player.trainer.to_dict(subfields(fields, 'trainer_info')) if player.trainer else None
         
         # Adicionar informações extras para treinadores
-        elif user.user_type == UserType.TRAINER:
-            players = Player.query.filter_by(trainer_id=user.id).all()
-            response_data['my_players'] = [p.to_dict() for p in players]
+        elif user.user_type == UserType.TRAINER and wants(fields, 'my_players'):
+            try:
+                roster_args = parse_roster_args(request.args)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            player_fields = subfields(fields, 'my_players')
+            players, pagination = list_roster(user.id, include_user=wants(player_fields, 'user_info'), **roster_args)
+            response_data['my_players'] = [p.to_dict(player_fields) for p in players]
+            response_data['my_players_pagination'] = pagination
         
         return jsonify(response_data), 200
         
@@ -236,8 +259,7 @@ def get_profile():
 def update_profile():
     """Atualiza o perfil do usuário autenticado"""
     try:
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
+        user = get_current_user()
         
         if not user:
             return jsonify({'error': 'Usuário não encontrado'}), 404
@@ -257,7 +279,7 @@ def update_profile():
                     # Verificar se email já está em uso por outro usuário
                     existing_user = User.query.filter(
                         User.email == data['email'],
-                        User.id != user_id
+                        User.id != user.id
                     ).first()
                     
                     if existing_user:
@@ -266,6 +288,7 @@ def update_profile():
                 setattr(user, field, data[field])
         
         db.session.commit()
+        invalidate_principal(user.id)
         
         return jsonify({
             'message': 'Perfil atualizado com sucesso',
@@ -281,12 +304,21 @@ def update_profile():
 def change_password():
     """Altera a senha do usuário"""
     try:
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
+        user = get_current_user()
         
         if not user:
             return jsonify({'error': 'Usuário não encontrado'}), 404
         
+        # Limitar tentativas antes de verificar a senha atual (por conta, só as falhas contam)
+        retry_after = limiter.check(('change_password_ip', request.remote_addr or 'unknown'))
+        if retry_after is None:
+            retry_after = limiter.check(('change_password_account', str(user.id)), charge=False)
+        if retry_after is not None:
+            return rate_limited_response(retry_after)
+        
+        # Hash atual do banco (o cache pode estar defasado)
+        db.session.refresh(user)
+        
         data = request.get_json()
         
         if not data.get('current_password') or not data.get('new_password'):
@@ -294,6 +326,7 @@ def change_password():
         
         # Verificar senha atual
         if not user.check_password(data['current_password']):
+            limiter.hit('change_password_account', str(user.id))
             return jsonify({'error': 'Senha atual incorreta'}), 401
         
         # Validar nova senha
@@ -304,6 +337,7 @@ def change_password():
         # Atualizar senha
         user.set_password(data['new_password'])
         db.session.commit()
+        invalidate_principal(user.id)
         
         return jsonify({'message': 'Senha alterada com sucesso'}), 200
         
@@ -311,21 +345,53 @@ def change_password():
         db.session.rollback()
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required()
+def logout():
+    """Encerra a sessão revogando o token atual"""
+    try:
+        claims = get_jwt()
+        user_id = int(claims['sub'])
+        
+        revocation_store.revoke(claims['jti'], user_id)
+        invalidate_principal(user_id)
+        
+        return jsonify({'message': 'Logout realizado com sucesso'}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
 @auth_bp.route('/validate-token', methods=['GET'])
 @jwt_required()
 def validate_token():
     """Valida se o token está válido e retorna informações básicas do usuário"""
     try:
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
+        # Revogação e desativação já foram checadas em memória pelo blocklist do JWT;
+        # o usuário vem do cache de principal, então o caso comum não consulta o banco
+        user = get_current_user()
         
         if not user:
             return jsonify({'error': 'Token inválido'}), 401
         
         return jsonify({
             'valid': True,
-            'user': user.to_dict()
+            'user': user.to_dict(requested_fields())
         }), 200
         
     except Exception as e:
-        return jsonify({'error': f'Erro interno: {str(e)}'}), 500 
\ No newline at end of file
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
+@auth_bp.route('/rate-limit-stats', methods=['GET'])
+@jwt_required()
+def get_rate_limit_stats():
+    """Retorna os contadores de tentativas permitidas e rejeitadas por regra (apenas treinadores)"""
+    try:
+        principal = get_current_principal()
+        if not principal or not principal.is_trainer:
+            return jsonify({'error': 'Acesso negado. Apenas treinadores podem acessar'}), 403
+        
+        return jsonify(limiter.get_stats()), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
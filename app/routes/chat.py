@@ -1,77 +1,38 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import (
+    jwt_required, get_jwt, get_jwt_identity, get_jwt_request_location, create_access_token
+)
 from app import db
 from app.models import User, Player, UserType, ChatMessage
-from datetime import datetime
+from app.services.conversation_service import (
+    get_conversation_summaries, mark_conversation_read, get_read_watermark, count_unread_messages
+)
+from app.services.pubsub import hub, user_channel
+from app.utils.sse import format_sse, format_sse_comment, sse_response
+from app.utils.pagination import paginate_by_cursor, parse_pagination_args, InvalidCursorError
+from app.utils.principal import get_current_principal, get_current_user
+from app.utils.fields import requested_fields, wants
+from app.utils.serialization import load_options_for
+from datetime import datetime, timedelta
 
 chat_bp = Blueprint('chat', __name__)
 
+def publish_unread_count(user_id):
+    """Envia o total de não lidas atualizado para as conexões do usuário"""
+    hub.publish(user_channel(user_id), 'unread_count', {
+        'unread_count': count_unread_messages(user_id)
+    })
+
 @chat_bp.route('/conversations', methods=['GET'])
 @jwt_required()
 def get_conversations():
     """Retorna todas as conversas do usuário"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = get_current_user()
         
-        if user.user_type == UserType.TRAINER:
-            # Para treinadores, mostrar conversas com todos os seus jogadores
-            conversations = []
-            players = Player.query.filter_by(trainer_id=user.id).all()
-            
-            for player in players:
-                # Buscar última mensagem da conversa
-                last_message = ChatMessage.query.filter(
-                    ((ChatMessage.sender_id == user.id) & (ChatMessage.receiver_id == player.user_id)) |
-                    ((ChatMessage.sender_id == player.user_id) & (ChatMessage.receiver_id == user.id))
-                ).order_by(ChatMessage.timestamp.desc()).first()
-                
-                # Contar mensagens não lidas
-                unread_count = ChatMessage.query.filter_by(
-                    sender_id=player.user_id,
-                    receiver_id=user.id,
-                    is_read=False
-                ).count()
-                
-                conversations.append({
-                    'participant': {
-                        'id': player.user.id,
-                        'name': f"{player.user.first_name} {player.user.last_name}",
-                        'user_type': 'player',
-                        'position': player.position.value if player.position else None
-                    },
-                    'last_message': last_message.to_dict() if last_message else None,
-                    'unread_count': unread_count
-                })
-        
-        elif user.user_type == UserType.PLAYER:
-            # Para jogadores, mostrar apenas conversa com o treinador
-            player = Player.query.filter_by(user_id=user.id).first()
-            conversations = []
-            
-            if player and player.trainer:
-                # Buscar última mensagem da conversa
-                last_message = ChatMessage.query.filter(
-                    ((ChatMessage.sender_id == user.id) & (ChatMessage.receiver_id == player.trainer_id)) |
-                    ((ChatMessage.sender_id == player.trainer_id) & (ChatMessage.receiver_id == user.id))
-                ).order_by(ChatMessage.timestamp.desc()).first()
-                
-                # Contar mensagens não lidas
-                unread_count = ChatMessage.query.filter_by(
-                    sender_id=player.trainer_id,
-                    receiver_id=user.id,
-                    is_read=False
-                ).count()
-                
-                conversations.append({
-                    'participant': {
-                        'id': player.trainer.id,
-                        'name': f"{player.trainer.first_name} {player.trainer.last_name}",
-                        'user_type': 'trainer'
-                    },
-                    'last_message': last_message.to_dict() if last_message else None,
-                    'unread_count': unread_count
-                })
+        # Treinadores veem conversas com todos os seus jogadores,
+        # jogadores veem apenas a conversa com o treinador
+        conversations = get_conversation_summaries(user, requested_fields())
         
         return jsonify({'conversations': conversations}), 200
         
@@ -83,8 +44,7 @@ def get_conversations():
 def get_messages(other_user_id):
     """Retorna mensagens de uma conversa específica"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = get_current_user()
         other_user = User.query.get(other_user_id)
         
         if not other_user:
@@ -97,40 +57,43 @@ def get_messages(other_user_id):
             if not player:
                 return jsonify({'error': 'Você só pode conversar com seus jogadores'}), 403
         elif user.user_type == UserType.PLAYER:
-            # Jogador só pode conversar com seu treinador
-            player = Player.query.filter_by(user_id=user.id).first()
-            if not player or player.trainer_id != other_user_id:
+            # Jogador só pode conversar com seu treinador (vínculo atual, do cache ou do banco)
+            principal = get_current_principal()
+            if not principal.player_id or principal.trainer_id != other_user_id:
                 return jsonify({'error': 'Você só pode conversar com seu treinador'}), 403
         
-        # Buscar mensagens da conversa
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 50, type=int)
-        
-        messages = ChatMessage.query.filter(
-            ((ChatMessage.sender_id == user_id) & (ChatMessage.receiver_id == other_user_id)) |
-            ((ChatMessage.sender_id == other_user_id) & (ChatMessage.receiver_id == user_id))
-        ).order_by(ChatMessage.timestamp.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
-        
-        # Marcar mensagens como lidas
-        ChatMessage.query.filter_by(
-            sender_id=other_user_id,
-            receiver_id=user_id,
-            is_read=False
-        ).update({'is_read': True})
-        db.session.commit()
+        # Buscar mensagens da conversa (paginação por cursor), só com as colunas pedidas
+        # e as usadas no cursor e no cálculo de is_read
+        fields = requested_fields()
+        try:
+            page_args = parse_pagination_args(request.args, default_limit=50)
+            messages, pagination = paginate_by_cursor(
+                ChatMessage.query.filter(
+                    ((ChatMessage.sender_id == user.id) & (ChatMessage.receiver_id == other_user_id)) |
+                    ((ChatMessage.sender_id == other_user_id) & (ChatMessage.receiver_id == user.id))
+                ).options(*load_options_for(ChatMessage, fields, always_load=('timestamp', 'sender_id', 'is_read'))),
+                ChatMessage.timestamp, ChatMessage.id, **page_args
+            )
+        except InvalidCursorError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Avançar a marca de leitura da conversa (só escreve se houver novidade)
+        if mark_conversation_read(user.id, other_user_id):
+            db.session.commit()
+            publish_unread_count(user.id)
+        
+        # Mensagens enviadas ficam lidas quando o outro participante avança a marca
+        peer_watermark = get_read_watermark(other_user_id, user.id)
+        messages_data = []
+        for msg in reversed(messages):
+            msg_dict = msg.to_dict(fields)
+            if wants(fields, 'is_read'):
+                msg_dict['is_read'] = msg.is_read or msg.sender_id == other_user_id or msg.id <= peer_watermark
+            messages_data.append(msg_dict)
         
         return jsonify({
-            'messages': [msg.to_dict() for msg in reversed(messages.items)],
-            'pagination': {
-                'page': messages.page,
-                'pages': messages.pages,
-                'per_page': messages.per_page,
-                'total': messages.total,
-                'has_next': messages.has_next,
-                'has_prev': messages.has_prev
-            }
+            'messages': messages_data,
+            'pagination': pagination
         }), 200
         
     except Exception as e:
@@ -141,8 +104,7 @@ def get_messages(other_user_id):
 def send_message():
     """Envia uma nova mensagem"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = get_current_user()
         data = request.get_json()
         
         if not data.get('receiver_id') or not data.get('message'):
@@ -161,14 +123,14 @@ def send_message():
             if not player:
                 return jsonify({'error': 'Você só pode conversar com seus jogadores'}), 403
         elif user.user_type == UserType.PLAYER:
-            # Jogador só pode conversar com seu treinador
-            player = Player.query.filter_by(user_id=user.id).first()
-            if not player or player.trainer_id != receiver_id:
+            # Jogador só pode conversar com seu treinador (vínculo atual, do cache ou do banco)
+            principal = get_current_principal()
+            if not principal.player_id or principal.trainer_id != receiver_id:
                 return jsonify({'error': 'Você só pode conversar com seu treinador'}), 403
         
         # Criar mensagem
         message = ChatMessage(
-            sender_id=user_id,
+            sender_id=user.id,
             receiver_id=receiver_id,
             message=data['message']
         )
@@ -176,6 +138,12 @@ def send_message():
         db.session.add(message)
         db.session.commit()
         
+        # Notificar os dois participantes conectados via stream
+        message_data = message.to_dict()
+        hub.publish(user_channel(receiver.id), 'message', message_data)
+        hub.publish(user_channel(user.id), 'message', message_data)
+        publish_unread_count(receiver.id)
+        
         return jsonify({
             'message': 'Mensagem enviada com sucesso',
             'chat_message': message.to_dict()
@@ -185,6 +153,65 @@ def send_message():
         db.session.rollback()
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
+@chat_bp.route('/stream-token', methods=['POST'])
+@jwt_required()
+def create_stream_token():
+    """
+    Token curto para abrir o stream (EventSource não envia cabeçalhos)
+    Só é aceito em /stream, e só precisa valer no momento da conexão;
+    para reconectar depois que ele expirar, peça outro
+    """
+    try:
+        expires_in = current_app.config.get('SSE_TOKEN_EXPIRES_SECONDS', 60)
+        stream_token = create_access_token(
+            identity=get_jwt_identity(),
+            additional_claims={'scope': 'chat_stream'},
+            expires_delta=timedelta(seconds=expires_in)
+        )
+        
+        return jsonify({'stream_token': stream_token, 'expires_in': expires_in}), 201
+        
+    except Exception as e:
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
+@chat_bp.route('/stream', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def stream_events():
+    """
+    Stream (Server-Sent Events) com novas mensagens e contagem de não lidas
+    Substitui o polling de /messages e /unread-count
+    Na URL (?jwt=...) só é aceito o token de POST /stream-token. Cada conexão
+    aberta ocupa um worker: rode com workers com threads ou assíncronos
+    """
+    try:
+        if get_jwt_request_location() == 'query_string' and get_jwt().get('scope') != 'chat_stream':
+            return jsonify({'error': 'Use na URL o token de /api/chat/stream-token'}), 401
+        
+        user_id = int(get_jwt_identity())
+        heartbeat = current_app.config.get('SSE_HEARTBEAT_SECONDS', 15)
+        
+        # Inscrever antes de ler o estado inicial para não perder eventos
+        subscription = hub.subscribe(user_channel(user_id))
+        initial_unread = count_unread_messages(user_id)
+        db.session.remove()  # Não segurar conexão do banco durante o stream
+        
+        def generate():
+            try:
+                yield format_sse({'unread_count': initial_unread}, event='unread_count')
+                while True:
+                    event = subscription.get(timeout=heartbeat)
+                    if event is None:
+                        yield format_sse_comment()
+                    else:
+                        yield format_sse(event['data'], event=event['event'])
+            finally:
+                subscription.close()
+        
+        return sse_response(generate())
+        
+    except Exception as e:
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
 @chat_bp.route('/messages/<int:message_id>/read', methods=['PUT'])
 @jwt_required()
 def mark_message_read(message_id):
@@ -200,8 +227,10 @@ def mark_message_read(message_id):
         if not message:
             return jsonify({'error': 'Mensagem não encontrada'}), 404
         
-        message.is_read = True
-        db.session.commit()
+        # Marca como lidas todas as mensagens da conversa até esta
+        if mark_conversation_read(message.receiver_id, message.sender_id, message.id):
+            db.session.commit()
+            publish_unread_count(message.receiver_id)
         
         return jsonify({'message': 'Mensagem marcada como lida'}), 200
         
@@ -216,10 +245,7 @@ def get_unread_count():
     try:
         user_id = get_jwt_identity()
         
-        unread_count = ChatMessage.query.filter_by(
-            receiver_id=user_id,
-            is_read=False
-        ).count()
+        unread_count = count_unread_messages(int(user_id))
         
         return jsonify({'unread_count': unread_count}), 200
         
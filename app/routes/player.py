@@ -1,24 +1,29 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from app import db
 from app.models import User, Player, UserType, Training
-from app.services.ai_service import PerplexityAIService
+from app.services.ai_service import get_ai_service
+from app.utils.sse import sse_response, relay_ai_stream, is_stream_requested
+from app.utils.pagination import paginate_by_cursor, parse_pagination_args, InvalidCursorError
+from app.utils.principal import get_current_principal, get_current_player
+from app.utils.fields import requested_fields, select_fields, subfields, wants
+from app.utils.serialization import load_options_for
 from datetime import datetime
 
 player_bp = Blueprint('player', __name__)
 
 def check_player_permission():
     """Verifica se o usuário é um jogador"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user or user.user_type != UserType.PLAYER:
+    principal = get_current_principal()
+    if not principal or not principal.is_player:
         return False, None, None
     
-    player = Player.query.filter_by(user_id=user_id).first()
-    if not player:
+    # Jogador e usuário na mesma query
+    player = get_current_player()
+    if not player or player.user.user_type != UserType.PLAYER:
         return False, None, None
     
-    return True, user, player
+    return True, player.user, player
 
 @player_bp.route('/profile', methods=['GET'])
 @jwt_required()
@@ -29,16 +34,16 @@ def get_my_profile():
         if not is_player:
             return jsonify({'error': 'Acesso negado. Apenas jogadores podem acessar'}), 403
         
-        player_dict = player.to_dict()
-        player_dict['user_info'] = user.to_dict()
+        fields = requested_fields()
+        player_dict = player.to_dict(fields)
         
         # Incluir informações do treinador se houver
-        if player.trainer:
-            player_dict['trainer_info'] = {
+        if wants(fields, 'trainer_info') and player.trainer:
+            player_dict['trainer_info'] = select_fields({
                 'id': player.trainer.id,
                 'name': f"{player.trainer.first_name} {player.trainer.last_name}",
                 'email': player.trainer.email
-            }
+            }, subfields(fields, 'trainer_info'))
         
         return jsonify({'player': player_dict}), 200
         
@@ -56,9 +61,11 @@ def get_my_trainings():
         
         # Filtros opcionais
         status = request.args.get('status')  # 'completed', 'pending'
-        limit = request.args.get('limit', type=int)
         
-        query = Training.query.filter_by(player_id=player.id)
+        # Só as colunas e relacionamentos pedidos em ?fields= são carregados
+        fields = requested_fields()
+        query = Training.query.filter_by(player_id=player.id)\
+            .options(*load_options_for(Training, fields, always_load=('created_at',)))
         
         # Aplicar filtros
         if status == 'completed':
@@ -66,17 +73,18 @@ def get_my_trainings():
         elif status == 'pending':
             query = query.filter_by(is_completed=False)
         
-        # Ordenar por data de criação (mais recentes primeiro)
-        query = query.order_by(Training.created_at.desc())
+        # Paginação por cursor, dos mais recentes para os mais antigos
+        try:
+            trainings, pagination = paginate_by_cursor(
+                query, Training.created_at, Training.id,
+                **parse_pagination_args(request.args, default_limit=20)
+            )
+        except InvalidCursorError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Aplicar limite se especificado
-        if limit:
-            query = query.limit(limit)
+        trainings_data = [training.to_dict(fields) for training in trainings]
         
-        trainings = query.all()
-        trainings_data = [training.to_dict() for training in trainings]
-        
-        return jsonify({'trainings': trainings_data}), 200
+        return jsonify({'trainings': trainings_data, 'pagination': pagination}), 200
         
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
@@ -90,11 +98,13 @@ def get_training_details(training_id):
         if not is_player:
             return jsonify({'error': 'Acesso negado. Apenas jogadores podem acessar'}), 403
         
-        training = Training.query.filter_by(id=training_id, player_id=player.id).first()
+        fields = requested_fields()
+        training = Training.query.filter_by(id=training_id, player_id=player.id)\
+            .options(*load_options_for(Training, fields)).first()
         if not training:
             return jsonify({'error': 'Treino não encontrado'}), 404
         
-        return jsonify({'training': training.to_dict()}), 200
+        return jsonify({'training': training.to_dict(fields)}), 200
         
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
@@ -156,8 +166,8 @@ def get_exercise_ai_suggestions(exercise_id):
         if not exercise:
             return jsonify({'error': 'Exercício não encontrado'}), 404
         
-        # Inicializar serviço de AI
-        ai_service = PerplexityAIService()
+        # Serviço de AI compartilhado (pool de conexões)
+        ai_service = get_ai_service()
         
         # Solicitar sugestões de exercícios alternativos
         suggestions = ai_service.suggest_exercise_alternatives(
@@ -191,8 +201,8 @@ def ai_chat():
         message = data['message']
         context = data.get('context', 'general')  # general, exercise, training
         
-        # Inicializar serviço de AI
-        ai_service = PerplexityAIService()
+        # Serviço de AI compartilhado (pool de conexões)
+        ai_service = get_ai_service()
         
         # Preparar contexto do jogador
         player_context = f"""
@@ -228,6 +238,12 @@ def ai_chat():
             
             Seja didático e incentive a melhoria contínua."""
         
+        # Resposta em stream (SSE), trecho a trecho
+        if is_stream_requested(data):
+            return sse_response(relay_ai_stream(
+                ai_service._make_request(message, system_prompt, stream=True)
+            ))
+        
         # Fazer requisição para AI
         ai_response = ai_service._make_request(message, system_prompt)
         
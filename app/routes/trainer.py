@@ -1,18 +1,32 @@
 from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from app import db
-from app.models import User, Player, UserType, Position
-from app.utils.file_utils import process_player_csv, validate_csv_structure, format_csv_for_ai_analysis
-from app.services.ai_service import PerplexityAIService
+from app.models import User, Player, UserType, Position, Training
+from app.services.analysis_service import ANALYSIS_TYPES, generate_analysis, save_analysis
+from app.services.job_queue import job_queue, JobQueueFull
+from app.services.roster_service import import_roster, parse_roster_csv, parse_roster_args, list_roster
+from app.services.stats_service import (
+    ingest_player_stats, get_processed_data, has_player_stats, get_latest_import, query_player_stats,
+    save_stat_upload, stat_upload_path
+)
+from app.utils.file_utils import available_stat_extensions, stat_file_format, stat_format_available
+from app.utils.sse import sse_response, relay_ai_stream, is_stream_requested
+from app.utils.principal import get_current_principal, get_current_user
+from app.utils.fields import requested_fields, select_fields, subfields, wants
+from app.utils.serialization import load_options_for
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
-import json
+import csv
+import os
 
 trainer_bp = Blueprint('trainer', __name__)
 
 def check_trainer_permission():
     """Verifica se o usuário é um treinador"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    principal = get_current_principal()
+    if not principal or not principal.is_trainer:
+        return False, None
+    user = get_current_user()
     if not user or user.user_type != UserType.TRAINER:
         return False, None
     return True, user
@@ -20,21 +34,26 @@ def check_trainer_permission():
 @trainer_bp.route('/players', methods=['GET'])
 @jwt_required()
 def get_my_players():
-    """Retorna todos os jogadores do treinador"""
+    """Retorna os jogadores do treinador (paginado, com ordenação e filtros)"""
     try:
         is_trainer, trainer = check_trainer_permission()
         if not is_trainer:
             return jsonify({'error': 'Acesso negado. Apenas treinadores podem acessar'}), 403
         
-        players = Player.query.filter_by(trainer_id=trainer.id).all()
-        players_data = []
+        # ?page=&per_page=&sort=-created_at&position=pitcher&team=&name=prefixo
+        try:
+            roster_args = parse_roster_args(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        for player in players:
-            player_dict = player.to_dict()
-            player_dict['user_info'] = player.user.to_dict()
-            players_data.append(player_dict)
+        # ?fields=id,user_info.first_name (sem user_info, os usuários nem são carregados)
+        fields = requested_fields()
+        players, pagination = list_roster(trainer.id, include_user=wants(fields, 'user_info'), **roster_args)
         
-        return jsonify({'players': players_data}), 200
+        return jsonify({
+            'players': [player.to_dict(fields) for player in players],
+            'pagination': pagination
+        }), 200
         
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
@@ -117,10 +136,57 @@ def create_player():
         db.session.rollback()
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
+@trainer_bp.route('/players/import', methods=['POST'])
+@jwt_required()
+def import_players():
+    """Cadastra vários jogadores de uma vez (JSON ou arquivo CSV)"""
+    try:
+        is_trainer, trainer = check_trainer_permission()
+        if not is_trainer:
+            return jsonify({'error': 'Acesso negado. Apenas treinadores podem acessar'}), 403
+        
+        # Elenco em CSV (arquivo ou corpo text/csv) ou JSON (lista ou {"players": [...]})
+        if 'file' in request.files:
+            try:
+                rows = parse_roster_csv(request.files['file'].read().decode('utf-8'))
+            except (UnicodeDecodeError, csv.Error):
+                return jsonify({'error': 'Arquivo CSV inválido (use UTF-8)'}), 400
+        elif request.mimetype == 'text/csv':
+            try:
+                rows = parse_roster_csv(request.get_data().decode('utf-8'))
+            except (UnicodeDecodeError, csv.Error):
+                return jsonify({'error': 'Arquivo CSV inválido (use UTF-8)'}), 400
+        else:
+            data = request.get_json(silent=True)
+            rows = data.get('players') if isinstance(data, dict) else data
+        
+        if not isinstance(rows, list) or not rows:
+            return jsonify({'error': 'Envie uma lista de jogadores ou um arquivo CSV'}), 400
+        
+        max_rows = current_app.config.get('ROSTER_IMPORT_MAX_ROWS', 1000)
+        if len(rows) > max_rows:
+            return jsonify({'error': f'Máximo de {max_rows} jogadores por importação'}), 413
+        
+        try:
+            summary = import_roster(trainer, rows)
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({'error': 'Username ou email cadastrado em paralelo, tente novamente'}), 409
+        
+        status = 201 if summary['created'] else 400
+        return jsonify({
+            'message': f"{summary['created']} de {summary['total']} jogadores cadastrados",
+            **summary
+        }), status
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
 @trainer_bp.route('/players/<int:player_id>/csv-upload', methods=['POST'])
 @jwt_required()
 def upload_player_csv(player_id):
-    """Upload de arquivo CSV com dados estatísticos do jogador"""
+    """Upload do arquivo de estatísticas do jogador (CSV, XLSX, Parquet ou Arrow/Feather)"""
     try:
         is_trainer, trainer = check_trainer_permission()
         if not is_trainer:
@@ -140,37 +206,47 @@ def upload_player_csv(player_id):
         if csv_file.filename == '':
             return jsonify({'error': 'Nenhum arquivo selecionado'}), 400
         
-        if not csv_file.filename.lower().endswith('.csv'):
-            return jsonify({'error': 'Arquivo deve ser um CSV'}), 400
-        
-        # Validar estrutura do CSV
-        is_valid, validation_message = validate_csv_structure(csv_file)
-        if not is_valid:
-            return jsonify({'error': validation_message}), 400
-        
-        # Processar CSV
+        # CSV, XLSX, Parquet ou Arrow/Feather (os dois últimos e o XLSX se a biblioteca estiver instalada)
+        file_format = stat_file_format(csv_file.filename)
+        if file_format is None or not stat_format_available(file_format):
+            return jsonify({'error': f"Formato não suportado. Use: {', '.join(available_stat_extensions())}"}), 400
+        
+        # Modo assíncrono (pedido ou arquivo grande): grava o arquivo, enfileira e retorna o id do job
+        threshold = current_app.config.get('STATS_ASYNC_THRESHOLD_BYTES', 0)
+        run_async = (request.form.get('async', '').lower() in ('1', 'true', 'yes')
+                     or request.args.get('async', '').lower() in ('1', 'true', 'yes')
+                     or (threshold > 0 and (request.content_length or 0) > threshold))
+        if run_async:
+            stored_filename = save_stat_upload(csv_file)
+            try:
+                job = job_queue.submit('stats_import', owner_id=trainer.id, player_id=player.id, params={
+                    'stored_filename': stored_filename,
+                    'filename': csv_file.filename
+                })
+            except JobQueueFull as e:
+                os.remove(stat_upload_path(stored_filename))
+                return jsonify({'error': str(e)}), 503
+            
+            return jsonify({
+                'message': 'Importação enfileirada',
+                'job': job.to_dict(),
+                'status_url': f'/api/trainer/jobs/{job.id}'
+            }), 202
+        
+        # Validar, processar e gravar as estatísticas em uma única leitura, bloco a bloco;
+        # o perfil do jogador recebe os valores mais recentes das métricas mapeadas
         try:
-            processed_data, csv_content = process_player_csv(csv_file)
+            stat_import, processed_data = ingest_player_stats(player, trainer.id, csv_file, csv_file.filename)
         except ValueError as e:
+            db.session.rollback()
             return jsonify({'error': str(e)}), 400
         
-        # Atualizar dados do jogador com informações do CSV
-        player.csv_data = json.dumps(processed_data)
-        
-        # Atualizar estatísticas específicas se disponíveis
-        baseball_stats = processed_data.get('baseball_statistics', {})
-        if 'batting_average' in baseball_stats:
-            player.batting_average = baseball_stats['batting_average']['latest']
-        if 'era' in baseball_stats:
-            player.era = baseball_stats['era']['latest']
-        if 'fielding_percentage' in baseball_stats:
-            player.fielding_percentage = baseball_stats['fielding_percentage']['latest']
-        
         db.session.commit()
         
         return jsonify({
             'message': 'CSV processado com sucesso',
             'processed_data': processed_data,
+            'import': stat_import.to_dict(),
             'player': player.to_dict()
         }), 200
         
@@ -239,21 +315,70 @@ def get_player_details(player_id):
         if not player:
             return jsonify({'error': 'Jogador não encontrado ou não pertence a você'}), 404
         
-        player_dict = player.to_dict()
-        player_dict['user_info'] = player.user.to_dict()
+        # Apenas os campos pedidos em ?fields= (relacionamentos só são carregados se pedidos)
+        fields = requested_fields()
+        player_dict = player.to_dict(fields)
         
         # Incluir dados do CSV se existirem
-        if player.csv_data:
-            player_dict['csv_analysis'] = json.loads(player.csv_data)
+        if wants(fields, 'csv_analysis'):
+            processed_data = get_processed_data(player)
+            if processed_data:
+                player_dict['csv_analysis'] = select_fields(processed_data, subfields(fields, 'csv_analysis'))
         
         # Incluir histórico de treinos
-        player_dict['trainings'] = [training.to_dict() for training in player.trainings]
+        if wants(fields, 'trainings'):
+            training_fields = subfields(fields, 'trainings')
+            trainings = Training.query.filter_by(player_id=player.id)\
+                .options(*load_options_for(Training, training_fields)).order_by(Training.id).all()
+            player_dict['trainings'] = [training.to_dict(training_fields) for training in trainings]
         
         return jsonify({'player': player_dict}), 200
         
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
+@trainer_bp.route('/players/<int:player_id>/stats', methods=['GET'])
+@jwt_required()
+def get_player_stats(player_id):
+    """Séries e resumos das estatísticas importadas de um jogador"""
+    try:
+        is_trainer, trainer = check_trainer_permission()
+        if not is_trainer:
+            return jsonify({'error': 'Acesso negado. Apenas treinadores podem acessar'}), 403
+        
+        player = Player.query.filter_by(id=player_id, trainer_id=trainer.id).first()
+        if not player:
+            return jsonify({'error': 'Jogador não encontrado ou não pertence a você'}), 404
+        
+        stat_import = get_latest_import(player.id)
+        if not stat_import:
+            return jsonify({'error': 'Nenhuma estatística importada para este jogador'}), 404
+        
+        # ?metric=home_runs,era&from=2024-04-01&to=2024-09-30&limit=1000
+        metrics = [metric.strip() for metric in request.args.get('metric', '').split(',') if metric.strip()]
+        try:
+            date_from = datetime.strptime(request.args['from'], '%Y-%m-%d').date() if request.args.get('from') else None
+            date_to = datetime.strptime(request.args['to'], '%Y-%m-%d').date() if request.args.get('to') else None
+        except ValueError:
+            return jsonify({'error': 'Data inválida (use AAAA-MM-DD)'}), 400
+        
+        series, truncated = query_player_stats(
+            player.id, stat_import.id, metrics, date_from, date_to, limit=request.args.get('limit', 1000, type=int)
+        )
+        summaries = [summary.to_dict() for summary in stat_import.summaries
+                     if not metrics or summary.metric in metrics]
+        
+        return jsonify({
+            'player_id': player.id,
+            'import': stat_import.to_dict(),
+            'summaries': summaries,
+            'series': series,
+            'truncated': truncated
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
 @trainer_bp.route('/players/<int:player_id>/ai-analysis', methods=['POST'])
 @jwt_required()
 def request_ai_analysis(player_id):
@@ -268,46 +393,47 @@ def request_ai_analysis(player_id):
         if not player:
             return jsonify({'error': 'Jogador não encontrado ou não pertence a você'}), 404
         
-        data = request.get_json()
+        data = request.get_json() or {}
         analysis_type = data.get('analysis_type', 'performance')
         
-        # Preparar dados do jogador para análise
-        player_data = player.to_dict()
-        
-        # Incluir dados do CSV se disponíveis
-        if player.csv_data:
-            csv_data = json.loads(player.csv_data)
-            formatted_csv = format_csv_for_ai_analysis(csv_data)
-        else:
-            formatted_csv = None
-        
-        # Inicializar serviço de AI
-        ai_service = PerplexityAIService()
-        
-        # Realizar análise baseada no tipo
-        if analysis_type == 'performance':
-            ai_response = ai_service.analyze_player_performance(player_data)
-        elif analysis_type == 'csv_analysis' and formatted_csv:
-            ai_response = ai_service.analyze_csv_data(formatted_csv, player_data.get('position', ''))
-        elif analysis_type == 'training_plan':
-            training_goals = data.get('training_goals', 'Melhoria geral de performance')
-            duration_weeks = data.get('duration_weeks', 4)
-            ai_response = ai_service.create_training_plan(player_data, training_goals, duration_weeks)
-        else:
+        if analysis_type not in ANALYSIS_TYPES or (analysis_type == 'csv_analysis' and not has_player_stats(player)):
             return jsonify({'error': 'Tipo de análise inválido ou dados insuficientes'}), 400
         
-        # Salvar análise no banco (opcional)
-        from app.models import AIAnalysis
-        analysis = AIAnalysis(
-            player_id=player.id,
-            trainer_id=trainer.id,
-            analysis_type=analysis_type,
-            prompt=f"Análise {analysis_type} para jogador {player.user.first_name} {player.user.last_name}",
-            response=ai_response
-        )
-        
-        db.session.add(analysis)
-        db.session.commit()
+        # Modo assíncrono: enfileira o job e retorna o id imediatamente
+        if data.get('async') is True or request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+            try:
+                job = job_queue.submit('ai_analysis', owner_id=trainer.id, player_id=player.id, params={
+                    'analysis_type': analysis_type,
+                    'training_goals': data.get('training_goals', 'Melhoria geral de performance'),
+                    'duration_weeks': data.get('duration_weeks', 4)
+                })
+            except JobQueueFull as e:
+                return jsonify({'error': str(e)}), 503
+            
+            return jsonify({
+                'message': 'Análise enfileirada',
+                'job': job.to_dict(),
+                'status_url': f'/api/trainer/jobs/{job.id}'
+            }), 202
+        
+        # Resposta em stream (SSE) se solicitado
+        stream = is_stream_requested(data)
+        ai_response = generate_analysis(player, analysis_type, data, stream=stream)
+        
+        if stream:
+            def on_stream_complete(full_text):
+                """Salva a análise quando o stream termina"""
+                try:
+                    analysis = save_analysis(player, trainer.id, analysis_type, full_text)
+                except Exception:
+                    db.session.rollback()
+                    raise
+                return {'analysis_id': analysis.id, 'analysis_type': analysis_type}
+            
+            return sse_response(relay_ai_stream(ai_response, on_complete=on_stream_complete))
+        
+        # Salvar análise no banco
+        analysis = save_analysis(player, trainer.id, analysis_type, ai_response)
         
         return jsonify({
             'analysis': ai_response,
@@ -319,6 +445,93 @@ def request_ai_analysis(player_id):
         db.session.rollback()
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
+@trainer_bp.route('/players/ai-analysis/batch', methods=['POST'])
+@jwt_required()
+def request_batch_ai_analysis():
+    """Solicita análise de AI para todo o elenco (ou um subconjunto filtrado) em segundo plano"""
+    try:
+        is_trainer, trainer = check_trainer_permission()
+        if not is_trainer:
+            return jsonify({'error': 'Acesso negado. Apenas treinadores podem acessar'}), 403
+        
+        data = request.get_json() or {}
+        analysis_type = data.get('analysis_type', 'performance')
+        
+        if analysis_type not in ANALYSIS_TYPES:
+            return jsonify({'error': 'Tipo de análise inválido'}), 400
+        
+        # Filtros opcionais do elenco
+        query = Player.query.filter_by(trainer_id=trainer.id)
+        player_ids = data.get('player_ids')
+        if player_ids is not None:
+            if not isinstance(player_ids, list) or not all(isinstance(pid, int) for pid in player_ids):
+                return jsonify({'error': 'player_ids deve ser uma lista de ids'}), 400
+            query = query.filter(Player.id.in_(player_ids))
+        
+        position = None
+        if data.get('position'):
+            try:
+                position = Position(data['position'].lower())
+            except ValueError:
+                return jsonify({'error': 'Posição inválida'}), 400
+            query = query.filter(Player.position == position)
+        
+        if data.get('team'):
+            query = query.filter(Player.team == data['team'])
+        
+        total = query.count()
+        if total == 0:
+            return jsonify({'error': 'Nenhum jogador encontrado para os filtros informados'}), 404
+        
+        # Concorrência limitada das chamadas à AI
+        max_concurrency = current_app.config.get('BATCH_AI_MAX_CONCURRENCY', 16)
+        try:
+            concurrency = int(data.get('concurrency', current_app.config.get('BATCH_AI_CONCURRENCY', 8)))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'concurrency deve ser um número inteiro'}), 400
+        concurrency = max(1, min(concurrency, max_concurrency))
+        
+        try:
+            job = job_queue.submit('ai_analysis_batch', owner_id=trainer.id, params={
+                'analysis_type': analysis_type,
+                'player_ids': player_ids,
+                'position': position.value if position else None,
+                'team': data.get('team'),
+                'concurrency': concurrency,
+                'training_goals': data.get('training_goals', 'Melhoria geral de performance'),
+                'duration_weeks': data.get('duration_weeks', 4)
+            })
+        except JobQueueFull as e:
+            return jsonify({'error': str(e)}), 503
+        
+        return jsonify({
+            'message': f'Análise em lote enfileirada para {total} jogadores',
+            'job': job.to_dict(),
+            'status_url': f'/api/trainer/jobs/{job.id}'
+        }), 202
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
+@trainer_bp.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_job_status(job_id):
+    """Retorna status, progresso e resultado de um job em segundo plano"""
+    try:
+        is_trainer, trainer = check_trainer_permission()
+        if not is_trainer:
+            return jsonify({'error': 'Acesso negado. Apenas treinadores podem acessar'}), 403
+        
+        job = job_queue.get_job(job_id, owner_id=trainer.id)
+        if not job:
+            return jsonify({'error': 'Job não encontrado'}), 404
+        
+        return jsonify({'job': job.to_dict()}), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Erro interno: {str(e)}'}), 500
+
 @trainer_bp.route('/dashboard', methods=['GET'])
 @jwt_required()
 def get_trainer_dashboard():
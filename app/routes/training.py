@@ -1,16 +1,21 @@
 from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from app import db
 from app.models import User, UserType, Training, Exercise, Player, MediaFile
 from app.utils.file_utils import save_uploaded_file
+from app.utils.principal import get_current_principal, get_current_user
+from app.utils.fields import requested_fields
+from app.utils.serialization import load_options_for
 from datetime import datetime
 
 training_bp = Blueprint('training', __name__)
 
 def check_trainer_permission():
     """Verifica se o usuário é um treinador"""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    principal = get_current_principal()
+    if not principal or not principal.is_trainer:
+        return False, None
+    user = get_current_user()
     if not user or user.user_type != UserType.TRAINER:
         return False, None
     return True, user
@@ -82,23 +87,25 @@ def create_training():
 def get_training(training_id):
     """Retorna detalhes de um treino"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        principal = get_current_principal()
+        if not principal:
+            return jsonify({'error': 'Usuário não encontrado'}), 404
         
-        if user.user_type == UserType.TRAINER:
+        fields = requested_fields()
+        query = Training.query.options(*load_options_for(Training, fields))
+        if principal.is_trainer:
             # Treinador pode ver treinos que criou
-            training = Training.query.filter_by(id=training_id, trainer_id=user.id).first()
-        elif user.user_type == UserType.PLAYER:
+            training = query.filter_by(id=training_id, trainer_id=principal.user_id).first()
+        elif principal.is_player:
             # Jogador pode ver seus próprios treinos
-            player = Player.query.filter_by(user_id=user.id).first()
-            training = Training.query.filter_by(id=training_id, player_id=player.id).first()
+            training = query.filter_by(id=training_id, player_id=principal.player_id).first()
         else:
             return jsonify({'error': 'Acesso negado'}), 403
         
         if not training:
             return jsonify({'error': 'Treino não encontrado'}), 404
         
-        return jsonify({'training': training.to_dict()}), 200
+        return jsonify({'training': training.to_dict(fields)}), 200
         
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+def make_cache_key(model: str, system_message: Optional[str], prompt: str, params: Dict) -> str:
+    """
+    Gera a chave do cache a partir de (modelo, mensagem de sistema, prompt, parâmetros)
+    Espaços são normalizados para que prompts equivalentes compartilhem a entrada
+    """
+    def normalize(text):
+        return ' '.join(text.split()) if text else ''
+
+    raw = json.dumps({
+        'model': model,
+        'system': normalize(system_message),
+        'prompt': normalize(prompt),
+        'params': params
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class AIResponseCache:
+    """
+    Cache de respostas da AI em dois níveis
+    Memória (LRU com TTL) na frente de um arquivo SQLite que sobrevive a reinícios
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: float = 86400, max_entries: int = 1000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.stats = {'hits': 0, 'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+        if self.path:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._connection() as conn:
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS ai_response_cache ('
+                    'key TEXT PRIMARY KEY, response TEXT NOT NULL, expires_at REAL NOT NULL)'
+                )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Conexão SQLite por thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            self._local.conn = conn
+        return conn
+
+    def _count(self, *names) -> None:
+        with self._lock:
+            for name in names:
+                self.stats[name] += 1
+
+    def _remember(self, key: str, response: str, expires_at: float) -> None:
+        with self._lock:
+            self._memory[key] = (response, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[1] > now:
+                self._memory.move_to_end(key)
+                self.stats['hits'] += 1
+                self.stats['memory_hits'] += 1
+                return entry[0]
+            if entry:
+                del self._memory[key]
+
+        if self.path:
+            with self._connection() as conn:
+                row = conn.execute(
+                    'SELECT response, expires_at FROM ai_response_cache WHERE key = ?', (key,)
+                ).fetchone()
+                if row and row[1] > now:
+                    self._remember(key, row[0], row[1])
+                    self._count('hits', 'disk_hits')
+                    return row[0]
+                if row:
+                    conn.execute('DELETE FROM ai_response_cache WHERE key = ?', (key,))
+
+        self._count('misses')
+        return None
+
+    def set(self, key: str, response: str, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        self._remember(key, response, expires_at)
+        if self.path:
+            with self._connection() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO ai_response_cache (key, response, expires_at) VALUES (?, ?, ?)',
+                    (key, response, expires_at)
+                )
+        self._count('stores')
+
+        # Limpeza periódica das entradas expiradas no disco
+        if self.path and self.stats['stores'] % 100 == 0:
+            self.purge_expired()
+
+    def purge_expired(self) -> int:
+        """Remove entradas expiradas do disco; retorna quantas foram removidas"""
+        if not self.path:
+            return 0
+        with self._connection() as conn:
+            return conn.execute('DELETE FROM ai_response_cache WHERE expires_at <= ?', (time.time(),)).rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        if self.path:
+            with self._connection() as conn:
+                conn.execute('DELETE FROM ai_response_cache')
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['memory_entries'] = len(self._memory)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
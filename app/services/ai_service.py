@@ -1,46 +1,161 @@
 import requests
 import os
-from typing import Dict, Optional
+import threading
+from typing import Dict, Iterator, Optional
 import json
+from app.services.http_client import ResilientHTTPClient, CircuitBreaker, CircuitOpenError
+from app.services.ai_cache import AIResponseCache, make_cache_key
+from app.services.singleflight import SingleFlight
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'instance', 'ai_cache.db')
+
+_http_client = None
+_response_cache = None
+_ai_service = None
+_lock = threading.RLock()
+
+# Requisições idênticas em andamento no processo compartilham uma única chamada
+inflight_requests = SingleFlight()
+
+def is_error_response(response: Optional[str]) -> bool:
+    """Indica se o texto retornado por _make_request é uma mensagem de erro"""
+    return not response or response.startswith("Erro")
+
+def get_http_client() -> ResilientHTTPClient:
+    """Retorna o cliente HTTP compartilhado pelo processo (pool keep-alive)"""
+    global _http_client
+    if _http_client is None:
+        with _lock:
+            if _http_client is None:
+                _http_client = ResilientHTTPClient(
+                    pool_size=int(os.environ.get('PERPLEXITY_POOL_SIZE', 10)),
+                    connect_timeout=float(os.environ.get('PERPLEXITY_CONNECT_TIMEOUT', 3.05)),
+                    read_timeout=float(os.environ.get('PERPLEXITY_READ_TIMEOUT', 30)),
+                    max_retries=int(os.environ.get('PERPLEXITY_MAX_RETRIES', 2)),
+                    breaker=CircuitBreaker(
+                        failure_threshold=int(os.environ.get('PERPLEXITY_CIRCUIT_FAILURES', 5)),
+                        reset_timeout=float(os.environ.get('PERPLEXITY_CIRCUIT_RESET', 30))
+                    )
+                )
+    return _http_client
+
+def get_response_cache() -> AIResponseCache:
+    """Retorna o cache de respostas compartilhado (AI_CACHE_PATH vazio desativa o disco)"""
+    global _response_cache
+    if _response_cache is None:
+        with _lock:
+            if _response_cache is None:
+                _response_cache = AIResponseCache(
+                    path=os.environ.get('AI_CACHE_PATH', DEFAULT_CACHE_PATH) or None,
+                    ttl=float(os.environ.get('AI_CACHE_TTL', 86400)),
+                    max_entries=int(os.environ.get('AI_CACHE_MAX_ENTRIES', 1000))
+                )
+    return _response_cache
+
+def get_ai_service() -> 'PerplexityAIService':
+    """Retorna a instância do serviço de AI compartilhada pelo processo"""
+    global _ai_service
+    if _ai_service is None:
+        with _lock:
+            if _ai_service is None:
+                _ai_service = PerplexityAIService()
+    return _ai_service
 
 class PerplexityAIService:
-    def __init__(self):
+    model = "llama-3.1-sonar-small-128k-online"
+    
+    def __init__(self, http_client: ResilientHTTPClient = None, cache: AIResponseCache = None,
+                 inflight: SingleFlight = None):
         self.api_key = os.environ.get('PERPLEXITY_API_KEY')
         self.base_url = "https://api.perplexity.ai/chat/completions"
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        self.http_client = http_client or get_http_client()
+        self.cache = cache or get_response_cache()
+        self.inflight = inflight or inflight_requests
+        self.params = {"max_tokens": 1000, "temperature": 0.7}
     
-    def _make_request(self, prompt: str, system_message: str = None) -> Optional[str]:
-        """Faz uma requisição para a API da Perplexity"""
-        if not self.api_key:
-            return "Erro: Chave da API Perplexity não configurada"
-        
+    def _build_payload(self, prompt: str, system_message: str = None) -> Dict:
+        """Monta o corpo da requisição de chat completion"""
         messages = []
         if system_message:
             messages.append({"role": "system", "content": system_message})
         messages.append({"role": "user", "content": prompt})
         
-        payload = {
-            "model": "llama-3.1-sonar-small-128k-online",
-            "messages": messages,
-            "max_tokens": 1000,
-            "temperature": 0.7
-        }
+        return {"model": self.model, "messages": messages, **self.params}
+    
+    def _request_completion(self, payload: Dict) -> str:
+        """Chama a API e retorna o texto gerado (levanta exceção em caso de erro)"""
+        response = self.http_client.post(self.base_url, json=payload, headers=self.headers)
+        result = response.json()
+        return result['choices'][0]['message']['content']
+    
+    def _stream_request(self, prompt: str, system_message: str = None) -> Iterator[str]:
+        """
+        Faz uma requisição em stream e gera os trechos de texto à medida que chegam
+        Levanta exceção em caso de erro (a resposta HTTP já pode ter começado)
+        """
+        if not self.api_key:
+            raise ValueError("Chave da API Perplexity não configurada")
+        
+        payload = self._build_payload(prompt, system_message)
+        payload["stream"] = True
+        
+        response = self.http_client.post(self.base_url, json=payload, headers=self.headers, stream=True)
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                data = line[len('data:'):].strip()
+                if data == '[DONE]':
+                    break
+                
+                chunk = json.loads(data)
+                content = chunk['choices'][0].get('delta', {}).get('content')
+                if content:
+                    yield content
+        finally:
+            response.close()
+    
+    def _make_request(self, prompt: str, system_message: str = None, use_cache: bool = False,
+                      stream: bool = False):
+        """
+        Faz uma requisição para a API da Perplexity
+        Com use_cache=True, respostas para o mesmo prompt são reaproveitadas (só sucessos)
+        Chamadas idênticas simultâneas são coalescidas em uma única requisição
+        Com stream=True, retorna um gerador com os trechos da resposta
+        """
+        if stream:
+            return self._stream_request(prompt, system_message)
+        
+        if not self.api_key:
+            return "Erro: Chave da API Perplexity não configurada"
+        
+        payload = self._build_payload(prompt, system_message)
+        request_key = make_cache_key(self.model, system_message, prompt, self.params)
+        
+        if use_cache:
+            cached = self.cache.get(request_key)
+            if cached is not None:
+                return cached
         
         try:
-            response = requests.post(self.base_url, json=payload, headers=self.headers)
-            response.raise_for_status()
-            
-            result = response.json()
-            return result['choices'][0]['message']['content']
+            # Prompts idênticos simultâneos aguardam a mesma chamada à API
+            content, _ = self.inflight.do(request_key, lambda: self._request_completion(payload))
+        except CircuitOpenError:
+            return "Erro: Serviço de AI temporariamente indisponível, tente novamente em instantes"
         except requests.exceptions.RequestException as e:
             return f"Erro na requisição: {str(e)}"
         except KeyError as e:
             return f"Erro na resposta da API: {str(e)}"
+        
+        if use_cache:
+            self.cache.set(request_key, content)
+        return content
     
-    def analyze_player_performance(self, player_data: Dict) -> str:
+    def analyze_player_performance(self, player_data: Dict, stream: bool = False) -> str:
         """Analisa o desempenho de um jogador usando AI"""
         system_message = """Você é um treinador especialista em baseball com mais de 20 anos de experiência. 
         Analise os dados do jogador fornecidos e dê uma análise detalhada sobre:
@@ -68,7 +183,7 @@ class PerplexityAIService:
         Forneça uma análise completa e sugestões de melhoria específicas para este jogador.
         """
         
-        return self._make_request(prompt, system_message)
+        return self._make_request(prompt, system_message, stream=stream)
     
     def suggest_exercise_alternatives(self, exercise_name: str, player_position: str, 
                                    player_weaknesses: str = None) -> str:
@@ -93,7 +208,7 @@ class PerplexityAIService:
         return self._make_request(prompt, system_message)
     
     def create_training_plan(self, player_data: Dict, training_goals: str, 
-                           duration_weeks: int = 4) -> str:
+                           duration_weeks: int = 4, stream: bool = False) -> str:
         """Cria um plano de treino personalizado usando AI"""
         system_message = """Você é um treinador de baseball profissional especializado em periodização de treinos.
         Crie planos de treino detalhados e progressivos considerando a posição, nível e objetivos do jogador."""
@@ -116,9 +231,9 @@ class PerplexityAIService:
         Foque em exercícios específicos para a posição e melhoria dos pontos fracos identificados.
         """
         
-        return self._make_request(prompt, system_message)
+        return self._make_request(prompt, system_message, stream=stream)
     
-    def analyze_csv_data(self, csv_content: str, player_position: str) -> str:
+    def analyze_csv_data(self, csv_content: str, player_position: str, stream: bool = False) -> str:
         """Analisa dados estatísticos de CSV do jogador"""
         system_message = """Você é um analista de dados esportivos especializado em baseball.
         Analise os dados estatísticos fornecidos e identifique padrões, tendências e áreas de melhoria."""
@@ -136,7 +251,7 @@ class PerplexityAIService:
         5. Recomendações específicas de treino baseadas nos dados
         """
         
-        return self._make_request(prompt, system_message)
+        return self._make_request(prompt, system_message, stream=stream)
     
     def generate_workout_tips(self, exercise_category: str, difficulty_level: str = "intermediate") -> str:
         """Gera dicas e técnicas para categorias específicas de exercícios"""
@@ -155,4 +270,4 @@ class PerplexityAIService:
         5. Como integrar com outros exercícios
         """
         
-        return self._make_request(prompt, system_message) 
\ No newline at end of file
+        return self._make_request(prompt, system_message, use_cache=True) 
\ No newline at end of file
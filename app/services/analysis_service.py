@@ -0,0 +1,165 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from sqlalchemy.orm import joinedload
+from app import db
+from app.models import Player, AIAnalysis, Position
+from app.services.ai_service import get_ai_service, is_error_response
+from app.services.job_queue import job_queue, JobContext
+from app.services.stats_service import get_processed_data
+from app.utils.file_utils import format_csv_for_ai_analysis
+from typing import Dict
+
+ANALYSIS_TYPES = ('performance', 'csv_analysis', 'training_plan')
+
+
+def _format_player_csv(player: Player):
+    """Estatísticas importadas do jogador formatadas para a AI (ou None)"""
+    processed_data = get_processed_data(player)
+    if processed_data:
+        return format_csv_for_ai_analysis(processed_data)
+    return None
+
+
+def _generate_from_data(player_data: Dict, formatted_csv, analysis_type: str,
+                        options: Dict = None, stream: bool = False):
+    """Gera a análise a partir de dados já carregados (não acessa o banco)"""
+    options = options or {}
+    ai_service = get_ai_service()
+
+    if analysis_type == 'performance':
+        return ai_service.analyze_player_performance(player_data, stream=stream)
+    elif analysis_type == 'csv_analysis' and formatted_csv:
+        return ai_service.analyze_csv_data(formatted_csv, player_data.get('position', ''), stream=stream)
+    elif analysis_type == 'training_plan':
+        training_goals = options.get('training_goals', 'Melhoria geral de performance')
+        duration_weeks = options.get('duration_weeks', 4)
+        return ai_service.create_training_plan(player_data, training_goals, duration_weeks, stream=stream)
+
+    raise ValueError('Tipo de análise inválido ou dados insuficientes')
+
+
+def generate_analysis(player: Player, analysis_type: str, options: Dict = None, stream: bool = False):
+    """
+    Gera a análise de AI de um jogador
+    Retorna o texto (ou um gerador de trechos com stream=True)
+    Levanta ValueError para tipo inválido ou dados insuficientes
+    """
+    return _generate_from_data(player.to_dict(), _format_player_csv(player), analysis_type, options, stream)
+
+
+def build_analysis(player: Player, trainer_id: int, analysis_type: str, response: str) -> AIAnalysis:
+    """Cria o registro da análise (sem adicionar à sessão)"""
+    return AIAnalysis(
+        player_id=player.id,
+        trainer_id=trainer_id,
+        analysis_type=analysis_type,
+        prompt=f"Análise {analysis_type} para jogador {player.user.first_name} {player.user.last_name}",
+        response=response
+    )
+
+
+def save_analysis(player: Player, trainer_id: int, analysis_type: str, response: str) -> AIAnalysis:
+    """Salva a análise no banco"""
+    analysis = build_analysis(player, trainer_id, analysis_type, response)
+    db.session.add(analysis)
+    db.session.commit()
+    return analysis
+
+
+def run_analysis_job(context: JobContext) -> Dict:
+    """Executa um job de análise de AI enfileirado"""
+    player = Player.query.filter_by(id=context.player_id, trainer_id=context.owner_id).first()
+    if not player:
+        raise ValueError('Jogador não encontrado ou não pertence a você')
+
+    analysis_type = context.params.get('analysis_type', 'performance')
+    context.update_progress(0, 1)
+
+    response = generate_analysis(player, analysis_type, context.params)
+    # Falha da AI (ex.: chave não configurada): o job fica como falho e nada é salvo
+    if is_error_response(response):
+        raise RuntimeError(response or 'Resposta vazia da AI')
+    analysis = save_analysis(player, context.owner_id, analysis_type, response)
+
+    context.update_progress(1, 1)
+    return {
+        'analysis': response,
+        'analysis_id': analysis.id,
+        'analysis_type': analysis_type
+    }
+
+
+def run_batch_analysis_job(context: JobContext) -> Dict:
+    """
+    Executa a análise de AI para vários jogadores do elenco em paralelo
+    As chamadas à AI rodam com concorrência limitada; falhas individuais não
+    interrompem o lote e as análises bem-sucedidas são gravadas em uma única transação
+    """
+    params = context.params
+    analysis_type = params.get('analysis_type', 'performance')
+    concurrency = params.get('concurrency', 4)
+
+    query = Player.query.options(joinedload(Player.user)).filter(Player.trainer_id == context.owner_id)
+    if params.get('player_ids'):
+        query = query.filter(Player.id.in_(params['player_ids']))
+    if params.get('position'):
+        query = query.filter(Player.position == Position(params['position']))
+    if params.get('team'):
+        query = query.filter(Player.team == params['team'])
+    players = {player.id: player for player in query.order_by(Player.id).all()}
+
+    # Dados preparados aqui: as threads de AI não acessam o banco
+    tasks = {
+        player_id: (player.to_dict(), _format_player_csv(player))
+        for player_id, player in players.items()
+    }
+    total = len(tasks)
+    context.update_progress(0, total)
+
+    responses, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, total or 1))) as pool:
+        futures = {
+            pool.submit(_generate_from_data, player_data, formatted_csv, analysis_type, params): player_id
+            for player_id, (player_data, formatted_csv) in tasks.items()
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            player_id = futures[future]
+            try:
+                response = future.result()
+                if is_error_response(response):
+                    errors[player_id] = response
+                else:
+                    responses[player_id] = response
+            except Exception as e:
+                errors[player_id] = str(e)
+            context.update_progress(done)
+
+    analyses = {
+        player_id: build_analysis(players[player_id], context.owner_id, analysis_type, response)
+        for player_id, response in responses.items()
+    }
+    db.session.add_all(analyses.values())
+    db.session.commit()
+
+    results = []
+    for player_id, player in players.items():
+        item = {
+            'player_id': player_id,
+            'player_name': f"{player.user.first_name} {player.user.last_name}"
+        }
+        if player_id in analyses:
+            item.update(status='succeeded', analysis_id=analyses[player_id].id)
+        else:
+            item.update(status='failed', error=errors.get(player_id))
+        results.append(item)
+
+    return {
+        'analysis_type': analysis_type,
+        'total': total,
+        'succeeded': len(analyses),
+        'failed': total - len(analyses),
+        'results': results
+    }
+
+
+job_queue.register('ai_analysis', run_analysis_job)
+job_queue.register('ai_analysis_batch', run_batch_analysis_job)
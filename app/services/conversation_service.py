@@ -0,0 +1,210 @@
+from sqlalchemy import case, func, select, and_, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.models import User, Player, UserType, ChatMessage, ChatReadState
+from app.utils.fields import FieldTree, select_fields, subfields, wants
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+def _counterpart_column(user_id: int):
+    """Expressão SQL que retorna o outro participante de uma mensagem"""
+    return case(
+        (ChatMessage.sender_id == user_id, ChatMessage.receiver_id),
+        else_=ChatMessage.sender_id
+    )
+
+
+def _get_participants(user: User) -> List[Dict]:
+    """Retorna os participantes possíveis de conversa do usuário (1 query)"""
+    if user.user_type == UserType.TRAINER:
+        rows = db.session.query(Player, User).join(
+            User, Player.user_id == User.id
+        ).filter(Player.trainer_id == user.id).order_by(Player.id).all()
+
+        return [{
+            'id': participant.id,
+            'name': f"{participant.first_name} {participant.last_name}",
+            'user_type': 'player',
+            'position': player.position.value if player.position else None
+        } for player, participant in rows]
+
+    if user.user_type == UserType.PLAYER:
+        row = db.session.query(User).join(
+            Player, Player.trainer_id == User.id
+        ).filter(Player.user_id == user.id).first()
+
+        if row:
+            return [{
+                'id': row.id,
+                'name': f"{row.first_name} {row.last_name}",
+                'user_type': 'trainer'
+            }]
+
+    return []
+
+
+def _get_last_messages(user_id: int, peer_ids: List[int]) -> Dict[int, ChatMessage]:
+    """Retorna a última mensagem de cada conversa do usuário (1 query com janela)"""
+    if not peer_ids:
+        return {}
+
+    counterpart = _counterpart_column(user_id)
+    ranked = select(
+        ChatMessage.id.label('id'),
+        counterpart.label('peer_id'),
+        func.row_number().over(
+            partition_by=counterpart,
+            order_by=(ChatMessage.timestamp.desc(), ChatMessage.id.desc())
+        ).label('rank')
+    ).where(
+        (ChatMessage.sender_id == user_id) | (ChatMessage.receiver_id == user_id)
+    ).subquery()
+
+    rows = db.session.query(ChatMessage, ranked.c.peer_id).join(
+        ranked, ChatMessage.id == ranked.c.id
+    ).filter(ranked.c.rank == 1).all()
+
+    wanted = set(peer_ids)
+    return {peer_id: message for message, peer_id in rows if peer_id in wanted}
+
+
+def _unread_query(user_id: int, *columns):
+    """
+    Query base de mensagens não lidas pelo usuário
+    Não lida = recebida com id acima da marca de leitura da conversa
+    """
+    return db.session.query(*columns).select_from(ChatMessage).outerjoin(
+        ChatReadState, and_(
+            ChatReadState.user_id == ChatMessage.receiver_id,
+            ChatReadState.peer_id == ChatMessage.sender_id
+        )
+    ).filter(
+        ChatMessage.receiver_id == user_id,
+        ChatMessage.id > func.coalesce(ChatReadState.last_read_message_id, 0),
+        # Mensagens marcadas como lidas antes da marca de leitura existir
+        ChatMessage.is_read == False
+    )
+
+
+def _get_unread_counts(user_id: int) -> Dict[int, int]:
+    """Retorna mensagens não lidas agrupadas por remetente (1 query agregada)"""
+    rows = _unread_query(
+        user_id, ChatMessage.sender_id, func.count(ChatMessage.id)
+    ).group_by(ChatMessage.sender_id).all()
+
+    return {sender_id: count for sender_id, count in rows}
+
+
+def count_unread_messages(user_id: int) -> int:
+    """Retorna o total de mensagens não lidas do usuário"""
+    return _unread_query(user_id, func.count(ChatMessage.id)).scalar() or 0
+
+
+def get_read_watermark(user_id: int, peer_id: int) -> int:
+    """Retorna o id da última mensagem lida pelo usuário na conversa"""
+    watermark = db.session.query(ChatReadState.last_read_message_id).filter_by(
+        user_id=user_id, peer_id=peer_id
+    ).scalar()
+    return watermark or 0
+
+
+def _get_conversation_watermarks(user_id: int) -> Dict[Tuple[int, int], int]:
+    """Marcas de leitura das conversas do usuário, nos dois sentidos: {(leitor, remetente): id} (1 query)"""
+    rows = db.session.query(
+        ChatReadState.user_id, ChatReadState.peer_id, ChatReadState.last_read_message_id
+    ).filter(or_(ChatReadState.user_id == user_id, ChatReadState.peer_id == user_id)).all()
+    return {(reader_id, sender_id): message_id for reader_id, sender_id, message_id in rows}
+
+
+def _upsert_watermark(user_id: int, peer_id: int, message_id: int) -> None:
+    """Avança a marca de leitura sem nunca retrocedê-la"""
+    values = {
+        'user_id': user_id,
+        'peer_id': peer_id,
+        'last_read_message_id': message_id,
+        'updated_at': datetime.utcnow()
+    }
+    dialect = db.session.get_bind(mapper=ChatReadState).dialect.name
+
+    if dialect in ('sqlite', 'postgresql'):
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        stmt = insert(ChatReadState).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ChatReadState.user_id, ChatReadState.peer_id],
+            set_={
+                'last_read_message_id': stmt.excluded.last_read_message_id,
+                'updated_at': stmt.excluded.updated_at
+            },
+            where=ChatReadState.last_read_message_id < stmt.excluded.last_read_message_id
+        )
+        db.session.execute(stmt)
+        return
+
+    # Outros bancos: leitura seguida de escrita
+    state = ChatReadState.query.filter_by(user_id=user_id, peer_id=peer_id).first()
+    if not state:
+        db.session.add(ChatReadState(**values))
+    elif state.last_read_message_id < message_id:
+        state.last_read_message_id = message_id
+        state.updated_at = values['updated_at']
+
+
+def mark_conversation_read(user_id: int, peer_id: int, message_id: Optional[int] = None) -> bool:
+    """
+    Marca a conversa como lida até `message_id` (ou até a última mensagem recebida)
+    Retorna True se a marca de leitura avançou; não escreve nada caso contrário
+    """
+    latest_incoming = db.session.query(func.max(ChatMessage.id)).filter(
+        ChatMessage.sender_id == peer_id,
+        ChatMessage.receiver_id == user_id
+    ).scalar_subquery()
+    current = db.session.query(ChatReadState.last_read_message_id).filter(
+        ChatReadState.user_id == user_id,
+        ChatReadState.peer_id == peer_id
+    ).scalar_subquery()
+
+    latest_id, watermark = db.session.query(latest_incoming, current).one()
+    target = message_id if message_id is not None else latest_id
+
+    if not target or target <= (watermark or 0):
+        return False
+
+    _upsert_watermark(user_id, peer_id, target)
+    return True
+
+
+def get_conversation_summaries(user: User, fields: FieldTree = None) -> List[Dict]:
+    """
+    Monta o resumo de todas as conversas do usuário (apenas os campos pedidos, se `fields` for informado)
+    Usa um número constante de queries, independente do tamanho do elenco;
+    última mensagem e não lidas só são consultadas se pedidas
+    """
+    participants = _get_participants(user)
+    if not participants:
+        return []
+
+    peer_ids = [participant['id'] for participant in participants]
+    last_messages = _get_last_messages(user.id, peer_ids) if wants(fields, 'last_message') else {}
+    last_message_fields = subfields(fields, 'last_message')
+    # is_read da última mensagem pela marca de leitura de quem a recebeu, como no histórico
+    watermarks = _get_conversation_watermarks(user.id) if last_messages and wants(last_message_fields, 'is_read') else {}
+    unread_counts = _get_unread_counts(user.id) if wants(fields, 'unread_count') else {}
+
+    conversations = []
+    for participant in participants:
+        conversation = {}
+        if wants(fields, 'participant'):
+            conversation['participant'] = select_fields(participant, subfields(fields, 'participant'))
+        if wants(fields, 'last_message'):
+            last_message = last_messages.get(participant['id'])
+            conversation['last_message'] = last_message.to_dict(last_message_fields) if last_message else None
+            if last_message and wants(last_message_fields, 'is_read'):
+                conversation['last_message']['is_read'] = last_message.is_read or last_message.id <= watermarks.get(
+                    (last_message.receiver_id, last_message.sender_id), 0
+                )
+        if wants(fields, 'unread_count'):
+            conversation['unread_count'] = unread_counts.get(participant['id'], 0)
+        conversations.append(conversation)
+
+    return conversations
@@ -0,0 +1,150 @@
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Optional
+
+# Status que indicam falha transitória do servidor remoto
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """O circuito está aberto: o serviço remoto falhou demais recentemente"""
+
+
+class CircuitBreaker:
+    """
+    Disjuntor simples (fechado → aberto → meio-aberto)
+    Após `failure_threshold` falhas seguidas, rejeita chamadas por `reset_timeout`
+    segundos e depois deixa passar uma chamada de teste.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._probe_owner = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return 'half_open'
+            return 'open'
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._probing:
+                return False
+            # Meio-aberto: apenas uma chamada de teste por vez
+            self._probing = True
+            self._probe_owner = threading.get_ident()
+            return True
+
+    def release_probe(self) -> None:
+        """
+        Libera a chamada de teste da thread atual se ela terminou sem registrar
+        sucesso ou falha (ex.: exceção fora do requests); o circuito segue meio-aberto
+        """
+        with self._lock:
+            if self._probing and self._probe_owner == threading.get_ident():
+                self._probing = False
+                self._probe_owner = None
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+            self._probe_owner = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            self._probe_owner = None
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class ResilientHTTPClient:
+    """
+    Cliente HTTP compartilhado com pool de conexões keep-alive, timeouts,
+    retentativas com backoff exponencial e jitter, e disjuntor
+    """
+
+    def __init__(self, pool_size: int = 10, connect_timeout: float = 3.05,
+                 read_timeout: float = 30.0, max_retries: int = 2,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _backoff(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Tempo de espera antes da próxima tentativa (full jitter)"""
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Executa a requisição com retentativas
+        Levanta CircuitOpenError sem tocar a rede se o circuito estiver aberto
+        Só falhas de conexão, timeouts e os status de RETRYABLE_STATUS são repetidos;
+        qualquer outro erro do requests conta como falha e é levantado na hora
+        """
+        if not self.breaker.allow_request():
+            raise CircuitOpenError('Serviço remoto temporariamente indisponível')
+
+        kwargs.setdefault('timeout', self.timeout)
+        attempt = 0
+        try:
+            while True:
+                response = None
+                try:
+                    response = self.session.request(method, url, **kwargs)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                    if attempt >= self.max_retries:
+                        self.breaker.record_failure()
+                        raise
+                except requests.exceptions.RequestException:
+                    self.breaker.record_failure()
+                    raise
+
+                if response is not None:
+                    if response.status_code not in RETRYABLE_STATUS:
+                        self.breaker.record_success()
+                        response.raise_for_status()
+                        return response
+                    if attempt >= self.max_retries:
+                        self.breaker.record_failure()
+                        response.raise_for_status()
+
+                delay = self._backoff(attempt, response)
+                if response is not None:
+                    response.close()  # Devolve a conexão ao pool antes de tentar de novo
+                time.sleep(delay)
+                attempt += 1
+        finally:
+            # Exceções fora do requests não podem deixar a chamada de teste presa
+            self.breaker.release_probe()
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
@@ -0,0 +1,155 @@
+import json
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Optional
+from app import db
+from app.models import BackgroundJob, JobStatus
+
+
+class JobQueueFull(Exception):
+    """A fila de jobs atingiu o limite de jobs pendentes"""
+
+
+class JobContext:
+    """Informações e utilitários disponíveis para o handler de um job"""
+
+    def __init__(self, job: BackgroundJob):
+        self.job_id = job.id
+        self.owner_id = job.owner_id
+        self.player_id = job.player_id
+        self.params = json.loads(job.params) if job.params else {}
+
+    def update_progress(self, done: int, total: Optional[int] = None) -> None:
+        """Registra o progresso do job (visível na consulta de status)"""
+        values = {'progress_done': done}
+        if total is not None:
+            values['progress_total'] = total
+        BackgroundJob.query.filter_by(id=self.job_id).update(values)
+        db.session.commit()
+
+
+class JobQueue:
+    """
+    Fila de jobs em segundo plano com pool de workers limitado
+    O estado de cada job fica persistido na tabela background_jobs
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 100):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.app = None
+        self._handlers: Dict[str, Callable] = {}
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        self.app = app
+        self.max_workers = app.config.get('JOB_WORKERS', self.max_workers)
+        self.max_pending = app.config.get('JOB_MAX_PENDING', self.max_pending)
+        app.extensions['job_queue'] = self
+
+    def register(self, job_type: str, handler: Callable[[JobContext], Dict]) -> None:
+        """Registra a função que executa jobs do tipo `job_type`"""
+        self._handlers[job_type] = handler
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job-worker')
+            return self._executor
+
+    def submit(self, job_type: str, owner_id: int, params: Optional[Dict] = None,
+               player_id: Optional[int] = None) -> BackgroundJob:
+        """
+        Persiste e enfileira um job, retornando imediatamente
+        Levanta JobQueueFull se houver jobs pendentes demais
+        """
+        if job_type not in self._handlers:
+            raise ValueError(f'Tipo de job desconhecido: {job_type}')
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFull('Fila de processamento cheia, tente novamente em instantes')
+            self._pending += 1
+
+        try:
+            job = BackgroundJob(
+                id=uuid.uuid4().hex,
+                job_type=job_type,
+                status=JobStatus.QUEUED,
+                owner_id=owner_id,
+                player_id=player_id,
+                params=json.dumps(params or {})
+            )
+            db.session.add(job)
+            db.session.commit()
+
+            self._get_executor().submit(self._run, job.id)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+        return job
+
+    def _run(self, job_id: str) -> None:
+        """Executa o job em uma thread do pool, com contexto da aplicação"""
+        with self.app.app_context():
+            try:
+                job = db.session.get(BackgroundJob, job_id)
+                job.status = JobStatus.RUNNING
+                job.started_at = datetime.utcnow()
+                db.session.commit()
+
+                context = JobContext(job)
+                result = self._handlers[job.job_type](context)
+
+                job = db.session.get(BackgroundJob, job_id)
+                job.status = JobStatus.SUCCEEDED
+                job.result = json.dumps(result) if result is not None else None
+                job.finished_at = datetime.utcnow()
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                BackgroundJob.query.filter_by(id=job_id).update({
+                    'status': JobStatus.FAILED,
+                    'error': str(e),
+                    'finished_at': datetime.utcnow()
+                })
+                db.session.commit()
+            finally:
+                db.session.remove()
+                with self._lock:
+                    self._pending -= 1
+
+    def fail_interrupted_jobs(self) -> int:
+        """
+        Marca como falhos os jobs que ficaram na fila ou em execução quando o
+        processo parou (não há como retomá-los); retorna quantos foram marcados
+        """
+        count = BackgroundJob.query.filter(
+            BackgroundJob.status.in_((JobStatus.QUEUED, JobStatus.RUNNING))
+        ).update({
+            'status': JobStatus.FAILED,
+            'error': 'Job interrompido pelo reinício do servidor',
+            'finished_at': datetime.utcnow()
+        }, synchronize_session=False)
+        db.session.commit()
+        return count
+
+    def get_job(self, job_id: str, owner_id: int) -> Optional[BackgroundJob]:
+        """Retorna o job se pertencer ao usuário"""
+        return BackgroundJob.query.filter_by(id=job_id, owner_id=owner_id).first()
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait)
+
+
+# Fila compartilhada pelo processo (inicializada em create_app)
+job_queue = JobQueue()
@@ -0,0 +1,183 @@
+import json
+import logging
+import queue
+import threading
+from typing import Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """Fila de eventos de um cliente conectado a um canal"""
+
+    def __init__(self, hub: 'PubSubHub', channel: str, max_queue: int):
+        self.hub = hub
+        self.channel = channel
+        self._queue = queue.Queue(maxsize=max_queue)
+
+    def put(self, message: Dict) -> None:
+        """Entrega um evento; clientes lentos perdem os eventos mais antigos"""
+        while True:
+            try:
+                self._queue.put_nowait(message)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Aguarda o próximo evento; retorna None se o tempo esgotar"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self) -> None:
+        self.hub.unsubscribe(self)
+
+
+class LocalBackend:
+    """Backend em processo: entrega os eventos apenas aos clientes deste worker"""
+
+    def start(self, hub: 'PubSubHub') -> None:
+        self.hub = hub
+
+    def publish(self, channel: str, message: Dict) -> None:
+        self.hub.dispatch(channel, message)
+
+
+class RedisBackend:
+    """
+    Backend entre workers via Redis Pub/Sub
+    Cada worker publica no Redis e repassa aos seus clientes o que recebe;
+    se a conexão cair, o listener registra a falha e reconecta com backoff
+    exponencial (eventos publicados enquanto estiver desconectado se perdem)
+    """
+
+    def __init__(self, url: Optional[str] = None, prefix: str = 'playball:', client=None,
+                 min_backoff: float = 0.5, max_backoff: float = 30.0):
+        if client is None:
+            import redis  # Dependência opcional, só necessária com PUBSUB_URL
+
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self, hub: 'PubSubHub') -> None:
+        self.hub = hub
+        self._thread = threading.Thread(target=self._listen, name='pubsub-listener', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def publish(self, channel: str, message: Dict) -> None:
+        self.client.publish(self.prefix + channel, json.dumps(message))
+
+    def _listen(self) -> None:
+        backoff = self.min_backoff
+        while not self._stopped.is_set():
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.psubscribe(self.prefix + '*')
+                if backoff > self.min_backoff:
+                    logger.info('Pub/sub reconectado ao Redis')
+                backoff = self.min_backoff
+                for item in pubsub.listen():
+                    if self._stopped.is_set():
+                        break
+                    self._dispatch(item)
+            except Exception:
+                logger.exception('Conexão do pub/sub com o Redis perdida; nova tentativa em %.1f s', backoff)
+                self._stopped.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+            finally:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+
+    def _dispatch(self, item: Dict) -> None:
+        """Repassa uma mensagem recebida ao hub; mensagens inválidas são descartadas"""
+        try:
+            channel = item['channel'].decode('utf-8')[len(self.prefix):]
+            message = json.loads(item['data'])
+        except (KeyError, AttributeError, ValueError):
+            logger.warning('Mensagem inválida descartada do pub/sub: %r', item)
+            return
+        self.hub.dispatch(channel, message)
+
+
+class PubSubHub:
+    """
+    Hub de publicação/assinatura de eventos em tempo real
+    Os clientes de cada worker ficam registrados localmente e o backend
+    decide como os eventos chegam aos demais workers
+    """
+
+    def __init__(self, backend=None, max_queue: int = 100):
+        self.max_queue = max_queue
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self.backend = None
+        self.set_backend(backend or LocalBackend())
+
+    def init_app(self, app) -> None:
+        """Configura o backend a partir da configuração da aplicação"""
+        self.max_queue = app.config.get('PUBSUB_MAX_QUEUE', self.max_queue)
+        url = app.config.get('PUBSUB_URL')
+        if url:
+            self.set_backend(RedisBackend(url))
+        app.extensions['pubsub'] = self
+
+    def set_backend(self, backend) -> None:
+        previous, self.backend = self.backend, backend
+        if previous is not None and hasattr(previous, 'stop'):
+            previous.stop()
+        backend.start(self)
+
+    def subscribe(self, channel: str) -> Subscription:
+        subscription = Subscription(self, channel, self.max_queue)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def publish(self, channel: str, event: str, data) -> None:
+        """Publica um evento no canal (em todos os workers, conforme o backend)"""
+        self.backend.publish(channel, {'event': event, 'data': data})
+
+    def dispatch(self, channel: str, message: Dict) -> None:
+        """Entrega um evento aos clientes deste worker inscritos no canal"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(message)
+
+    def subscriber_count(self, channel: Optional[str] = None) -> int:
+        with self._lock:
+            if channel is not None:
+                return len(self._subscribers.get(channel, ()))
+            return sum(len(subs) for subs in self._subscribers.values())
+
+
+def user_channel(user_id: int) -> str:
+    """Canal de eventos de um usuário"""
+    return f'user:{user_id}'
+
+
+# Hub compartilhado pelo processo (inicializado em create_app)
+hub = PubSubHub()
@@ -0,0 +1,137 @@
+import hashlib
+import math
+import threading
+import time
+from app import db
+from app.models import TokenRevocation, User
+from typing import Dict, Iterable, Set
+
+
+class BloomFilter:
+    """
+    Filtro de Bloom: responde "com certeza não está" ou "talvez esteja"
+    Usa double hashing sobre um único blake2b para derivar as k posições
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationStore:
+    """
+    Tokens revogados (logout) e contas desativadas, consultados a cada requisição
+    O caso comum (token válido) é resolvido em memória: o filtro de Bloom descarta
+    tokens nunca revogados e só os "talvez revogados" são confirmados no banco.
+    O estado é sincronizado com o banco a cada REVOCATION_SYNC_SECONDS
+    """
+
+    def __init__(self, sync_interval: float = 5, capacity: int = 100000):
+        self.sync_interval = sync_interval
+        self.capacity = capacity
+        self._bloom = BloomFilter(capacity)
+        self._deactivated: Set[int] = set()
+        self._last_revocation_id = 0
+        self._last_sync = 0.0
+        self._sync_lock = threading.Lock()
+        self._bloom_lock = threading.Lock()
+        self.stats = {'checks': 0, 'bloom_negatives': 0, 'db_confirmations': 0, 'revoked': 0, 'syncs': 0}
+
+    def init_app(self, app) -> None:
+        self.sync_interval = app.config.get('REVOCATION_SYNC_SECONDS', self.sync_interval)
+        self.capacity = app.config.get('REVOCATION_BLOOM_CAPACITY', self.capacity)
+        self._bloom = BloomFilter(self.capacity)
+        app.extensions['revocation_store'] = self
+
+    def sync(self, force: bool = False) -> None:
+        """
+        Traz do banco as revogações novas e a lista de contas desativadas
+        Apenas uma thread sincroniza por vez; as demais seguem com o estado atual
+        """
+        if not force and time.monotonic() - self._last_sync < self.sync_interval:
+            return
+        if not self._sync_lock.acquire(blocking=force):
+            return
+        try:
+            rows = db.session.query(TokenRevocation.id, TokenRevocation.jti).filter(
+                TokenRevocation.id > self._last_revocation_id
+            ).order_by(TokenRevocation.id).all()
+
+            # Filtro cheio: recria com o dobro da capacidade a partir do banco
+            if self._bloom.count + len(rows) > self.capacity:
+                self.capacity = max(self.capacity * 2, self._bloom.count + len(rows))
+                self._bloom = BloomFilter(self.capacity)
+                rows = db.session.query(TokenRevocation.id, TokenRevocation.jti).order_by(TokenRevocation.id).all()
+
+            with self._bloom_lock:
+                for revocation_id, jti in rows:
+                    self._bloom.add(jti)
+                    self._last_revocation_id = revocation_id
+
+            self._deactivated = {
+                user_id for (user_id,) in db.session.query(User.id).filter(User.is_active.is_(False))
+            }
+            self._last_sync = time.monotonic()
+            self.stats['syncs'] += 1
+        finally:
+            self._sync_lock.release()
+
+    def is_revoked(self, jwt_payload: Dict) -> bool:
+        """Verifica se o token foi revogado ou se a conta foi desativada"""
+        self.sync()
+        self.stats['checks'] += 1
+
+        revoked = False
+        if int(jwt_payload['sub']) in self._deactivated:
+            revoked = True
+        elif jwt_payload.get('jti') in self._bloom:
+            # Possível falso positivo do filtro: confirmar no banco
+            self.stats['db_confirmations'] += 1
+            revoked = db.session.query(
+                TokenRevocation.query.filter_by(jti=jwt_payload['jti']).exists()
+            ).scalar()
+        else:
+            self.stats['bloom_negatives'] += 1
+
+        if revoked:
+            self.stats['revoked'] += 1
+        return revoked
+
+    def revoke(self, jti: str, user_id: int, reason: str = 'logout') -> TokenRevocation:
+        """Revoga um token (efeito imediato neste worker; nos demais, na próxima sincronização)"""
+        revocation = TokenRevocation(jti=jti, user_id=user_id, reason=reason)
+        db.session.add(revocation)
+        db.session.commit()
+        with self._bloom_lock:
+            self._bloom.add(jti)
+        return revocation
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            'bloom_entries': self._bloom.count,
+            'bloom_capacity': self.capacity,
+            'deactivated_users': len(self._deactivated)
+        }
+
+
+# Store compartilhado pelo processo (inicializado em create_app)
+revocation_store = RevocationStore()
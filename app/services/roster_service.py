@@ -0,0 +1,304 @@
+import csv
+from datetime import datetime
+from functools import lru_cache
+from io import StringIO
+from sqlalchemy import insert, or_
+from sqlalchemy.orm import contains_eager
+from app import db
+from app.models import User, Player, UserType, Position
+from app.utils.password_utils import hash_passwords
+from app.utils.validators import is_valid_email, is_strong_password
+from typing import Dict, List, Optional, Set, Tuple
+
+REQUIRED_FIELDS = ('username', 'email', 'password', 'first_name', 'last_name', 'position')
+INTEGER_FIELDS = ('jersey_number',)
+FLOAT_FIELDS = ('height', 'weight', 'batting_average', 'era', 'fielding_percentage')
+TEXT_FIELDS = ('team', 'strengths', 'weaknesses', 'notes')
+
+# Limite de parâmetros por cláusula IN (SQLite aceita poucos por statement)
+IN_CHUNK_SIZE = 500
+
+DEFAULT_ROSTER_SORT = 'last_name'
+MAX_ROSTER_PAGE_SIZE = 100
+
+
+@lru_cache(maxsize=1)
+def _roster_sort_columns() -> Dict[str, Tuple]:
+    """Campos aceitos em ?sort= e as colunas de cada um (montado no primeiro uso, com os modelos já mapeados)"""
+    return {
+        'name': (User.last_name, User.first_name),
+        'first_name': (User.first_name,),
+        'last_name': (User.last_name,),
+        'username': (User.username,),
+        'position': (Player.position,),
+        'team': (Player.team,),
+        'jersey_number': (Player.jersey_number,),
+        'created_at': (Player.created_at,)
+    }
+
+
+def _escape_like(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def parse_roster_args(args, default_per_page: int = 50) -> Dict:
+    """
+    Lê paginação, ordenação e filtros da listagem do elenco
+    Levanta ValueError com a mensagem de erro para parâmetros inválidos
+    """
+    sort = args.get('sort', DEFAULT_ROSTER_SORT)
+    if sort.lstrip('-') not in _roster_sort_columns():
+        raise ValueError(f"Ordenação inválida. Use: {', '.join(_roster_sort_columns())} (prefixo - para decrescente)")
+
+    position = None
+    if args.get('position'):
+        try:
+            position = Position(args['position'].lower())
+        except ValueError:
+            raise ValueError('Posição inválida')
+
+    per_page = args.get('per_page', type=int) or args.get('limit', type=int) or default_per_page
+    return {
+        'page': max(1, args.get('page', 1, type=int) or 1),
+        'per_page': max(1, min(per_page, MAX_ROSTER_PAGE_SIZE)),
+        'sort': sort,
+        'position': position,
+        'team': args.get('team') or None,
+        'name': (args.get('name') or '').strip() or None
+    }
+
+
+def list_roster(trainer_id: int, page: int = 1, per_page: int = 50, sort: str = DEFAULT_ROSTER_SORT,
+                position: Optional[Position] = None, team: Optional[str] = None,
+                name: Optional[str] = None, include_user: bool = True) -> Tuple[List[Player], Dict]:
+    """
+    Página do elenco do treinador com o usuário de cada jogador na mesma query
+    Custa sempre duas queries (contagem e página), independente do tamanho do elenco;
+    com include_user=False a tabela de usuários só entra se o filtro ou a ordenação pedirem
+    """
+    query = Player.query.filter(Player.trainer_id == trainer_id)
+    columns = _roster_sort_columns()[sort.lstrip('-')]
+    if include_user:
+        query = query.join(Player.user).options(contains_eager(Player.user))
+    elif name or any(column.class_ is User for column in columns):
+        query = query.join(Player.user)
+
+    if position is not None:
+        query = query.filter(Player.position == position)
+    if team:
+        query = query.filter(Player.team == team)
+    if name:
+        prefix = _escape_like(name) + '%'
+        query = query.filter(or_(
+            User.first_name.ilike(prefix, escape='\\'),
+            User.last_name.ilike(prefix, escape='\\'),
+            User.username.ilike(prefix, escape='\\')
+        ))
+
+    order = [column.desc() if sort.startswith('-') else column.asc() for column in columns]
+    query = query.order_by(*order, Player.id.asc())
+
+    page_obj = query.paginate(page=page, per_page=per_page, error_out=False)
+    return page_obj.items, {
+        'page': page_obj.page,
+        'per_page': page_obj.per_page,
+        'total': page_obj.total,
+        'pages': page_obj.pages,
+        'has_next': page_obj.has_next,
+        'has_prev': page_obj.has_prev
+    }
+
+
+def parse_roster_csv(content: str) -> List[Dict]:
+    """Lê o elenco de um CSV (uma linha por jogador, cabeçalho com os nomes dos campos)"""
+    reader = csv.DictReader(StringIO(content.lstrip('\ufeff')))
+    rows = []
+    for row in reader:
+        rows.append({
+            (key or '').strip().lower(): (value.strip() if isinstance(value, str) else value) or None
+            for key, value in row.items()
+        })
+    return rows
+
+
+@lru_cache(maxsize=1)
+def _max_lengths() -> Dict[str, int]:
+    """Tamanho máximo dos campos de texto, lido das colunas String dos modelos"""
+    columns = {
+        'username': User.__table__.c.username,
+        'email': User.__table__.c.email,
+        'first_name': User.__table__.c.first_name,
+        'last_name': User.__table__.c.last_name,
+        'team': Player.__table__.c.team
+    }
+    return {field: column.type.length for field, column in columns.items()}
+
+
+def _validate_row(row: Dict) -> Tuple[Optional[Dict], Optional[str]]:
+    """Valida e normaliza uma linha; retorna (valores, erro)"""
+    if not isinstance(row, dict):
+        return None, 'Linha inválida'
+
+    for field in REQUIRED_FIELDS:
+        if not row.get(field):
+            return None, f'Campo {field} é obrigatório'
+
+    try:
+        position = Position(str(row['position']).lower())
+    except ValueError:
+        return None, 'Posição inválida'
+
+    values = {
+        'username': str(row['username']),
+        'email': str(row['email']),
+        'password': str(row['password']),
+        'first_name': str(row['first_name']),
+        'last_name': str(row['last_name']),
+        'position': position
+    }
+
+    # Mesmas regras do cadastro individual
+    if not is_valid_email(values['email']):
+        return None, 'Email inválido'
+    is_valid, message = is_strong_password(values['password'])
+    if not is_valid:
+        return None, message
+
+    for field in TEXT_FIELDS:
+        values[field] = str(row[field]) if row.get(field) not in (None, '') else None
+
+    for field, max_length in _max_lengths().items():
+        if values[field] is not None and len(values[field]) > max_length:
+            return None, f'Campo {field} deve ter no máximo {max_length} caracteres'
+
+    try:
+        for field in INTEGER_FIELDS:
+            values[field] = int(row[field]) if row.get(field) not in (None, '') else None
+        for field in FLOAT_FIELDS:
+            values[field] = float(row[field]) if row.get(field) not in (None, '') else None
+    except (TypeError, ValueError):
+        return None, f'Campo {field} deve ser numérico'
+
+    try:
+        values['birth_date'] = datetime.strptime(row['birth_date'], '%Y-%m-%d').date() if row.get('birth_date') else None
+    except (TypeError, ValueError):
+        return None, 'Data de nascimento inválida (use AAAA-MM-DD)'
+
+    return values, None
+
+
+def _find_existing(usernames: Set[str], emails: Set[str]) -> Tuple[Set[str], Set[str]]:
+    """Usernames e emails já cadastrados, com uma query por bloco de valores"""
+    taken_usernames, taken_emails = set(), set()
+    usernames, emails = list(usernames), list(emails)
+
+    for start in range(0, max(len(usernames), len(emails)), IN_CHUNK_SIZE):
+        username_chunk = usernames[start:start + IN_CHUNK_SIZE]
+        email_chunk = emails[start:start + IN_CHUNK_SIZE]
+        rows = db.session.query(User.username, User.email).filter(or_(
+            User.username.in_(username_chunk),
+            User.email.in_(email_chunk)
+        )).all()
+        for username, email in rows:
+            taken_usernames.add(username)
+            taken_emails.add(email)
+
+    return taken_usernames, taken_emails
+
+
+def import_roster(trainer: User, rows: List[Dict]) -> Dict:
+    """
+    Cadastra vários jogadores de uma vez para o treinador
+    Linhas inválidas ou duplicadas são reportadas sem impedir as demais;
+    as válidas são gravadas em uma única transação
+    """
+    results: List[Optional[Dict]] = [None] * len(rows)
+    valid = []
+
+    for index, row in enumerate(rows):
+        values, error = _validate_row(row)
+        if error:
+            results[index] = {'row': index + 1, 'status': 'error', 'error': error}
+        else:
+            valid.append((index, values))
+
+    # Unicidade contra o banco (query por conjunto) e dentro do próprio lote
+    taken_usernames, taken_emails = _find_existing(
+        {values['username'] for _, values in valid},
+        {values['email'] for _, values in valid}
+    )
+
+    accepted = []
+    for index, values in valid:
+        if values['username'] in taken_usernames:
+            error = 'Username já existe'
+        elif values['email'] in taken_emails:
+            error = 'Email já está em uso'
+        else:
+            error = None
+            accepted.append((index, values))
+
+        taken_usernames.add(values['username'])
+        taken_emails.add(values['email'])
+        if error:
+            results[index] = {'row': index + 1, 'status': 'error', 'error': error, 'username': values['username']}
+
+    password_hashes = hash_passwords([values['password'] for _, values in accepted])
+
+    # INSERT em lote (uma instrução por tabela); os IDs voltam via RETURNING
+    user_ids = {}
+    if accepted:
+        inserted_users = db.session.execute(insert(User).returning(User.id, User.username), [
+            {
+                'username': values['username'],
+                'email': values['email'],
+                'user_type': UserType.PLAYER,
+                'first_name': values['first_name'],
+                'last_name': values['last_name'],
+                'password_hash': password_hash
+            }
+            for (index, values), password_hash in zip(accepted, password_hashes)
+        ]).all()
+        user_ids = {username: user_id for user_id, username in inserted_users}
+
+    player_ids = {}
+    if accepted:
+        inserted_players = db.session.execute(insert(Player).returning(Player.id, Player.user_id), [
+            {
+                'user_id': user_ids[values['username']],
+                'trainer_id': trainer.id,
+                'position': values['position'],
+                'team': values['team'],
+                'jersey_number': values['jersey_number'],
+                'height': values['height'],
+                'weight': values['weight'],
+                'birth_date': values['birth_date'],
+                'strengths': values['strengths'],
+                'weaknesses': values['weaknesses'],
+                'batting_average': values['batting_average'],
+                'era': values['era'],
+                'fielding_percentage': values['fielding_percentage'],
+                'notes': values['notes']
+            }
+            for index, values in accepted
+        ]).all()
+        player_ids = {user_id: player_id for player_id, user_id in inserted_players}
+
+    db.session.commit()
+
+    for index, values in accepted:
+        user_id = user_ids[values['username']]
+        results[index] = {
+            'row': index + 1,
+            'status': 'created',
+            'username': values['username'],
+            'user_id': user_id,
+            'player_id': player_ids[user_id]
+        }
+
+    return {
+        'total': len(rows),
+        'created': len(accepted),
+        'failed': len(rows) - len(accepted),
+        'results': results
+    }
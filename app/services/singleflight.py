@@ -0,0 +1,65 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class _Call:
+    """Chamada em andamento compartilhada entre as threads que pediram a mesma chave"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalescência de chamadas idênticas simultâneas
+    Enquanto uma chamada para a chave estiver em andamento, as demais
+    aguardam e recebem o mesmo resultado (ou a mesma exceção)
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.stats = {'executed': 0, 'coalesced': 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Executa fn uma única vez por chave em voo; retorna (resultado, compartilhado)"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.stats['coalesced'] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.stats['executed'] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result, call.waiters > 0
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {**self.stats, 'in_flight': len(self._calls)}
@@ -0,0 +1,292 @@
+import json
+import os
+from datetime import date, datetime
+from flask import current_app
+import pandas as pd
+from sqlalchemy import delete, insert, select
+from werkzeug.utils import secure_filename
+from app import db
+from app.models import Player, PlayerStat, PlayerStatImport, PlayerStatSummary
+from app.services.job_queue import JobContext, job_queue
+from app.utils.file_utils import find_date_column, generate_unique_filename, process_player_file
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Métricas cujo valor mais recente atualiza o perfil do jogador
+PROFILE_METRICS = ('batting_average', 'era', 'fielding_percentage')
+
+MAX_STAT_ROWS = 10000
+
+
+def _stat_rows(chunk: pd.DataFrame, mapped_fields: Dict[str, str], row_offset: int,
+               player_id: int, import_id: int, date_column: Optional[str]) -> List[Dict]:
+    """Linhas (jogo, métrica, valor) de um bloco do arquivo, só das colunas mapeadas numéricas"""
+    game_indexes = range(row_offset + 1, row_offset + len(chunk) + 1)
+    if date_column:
+        dates = pd.to_datetime(chunk[date_column], errors='coerce')
+        game_dates = dates.dt.date.astype(object).where(dates.notna(), None).tolist()
+    else:
+        game_dates = [None] * len(chunk)
+
+    rows = []
+    for metric, column in mapped_fields.items():
+        values = chunk[column]
+        if not pd.api.types.is_numeric_dtype(values):
+            continue
+        for game_index, game_date, value in zip(game_indexes, game_dates, values.tolist()):
+            if value == value:  # descarta NaN
+                rows.append({
+                    'player_id': player_id,
+                    'import_id': import_id,
+                    'game_index': game_index,
+                    'game_date': game_date,
+                    'metric': metric,
+                    'value': float(value)
+                })
+    return rows
+
+
+def _value_or_none(value: Optional[float]) -> Optional[float]:
+    """NaN (coluna sem valores, última linha vazia) vira NULL no banco"""
+    return value if value == value else None
+
+
+def _remove_imports(import_ids) -> None:
+    db.session.execute(delete(PlayerStat).where(PlayerStat.import_id.in_(import_ids)))
+    db.session.execute(delete(PlayerStatSummary).where(PlayerStatSummary.import_id.in_(import_ids)))
+    db.session.execute(delete(PlayerStatImport).where(PlayerStatImport.id.in_(import_ids)))
+
+
+def clear_previous_imports(player_id: int, import_id: int) -> None:
+    """Remove as importações do jogador anteriores a `import_id` (séries, resumos e importações)"""
+    _remove_imports(select(PlayerStatImport.id).where(
+        PlayerStatImport.player_id == player_id,
+        PlayerStatImport.id < import_id
+    ).scalar_subquery())
+
+
+def discard_import(import_id: int) -> None:
+    """Apaga uma importação que falhou, inclusive o que já tiver sido gravado"""
+    _remove_imports([import_id])
+    db.session.commit()
+
+
+def apply_profile_metrics(player: Player, baseball_stats: Dict) -> None:
+    """Atualiza média de rebatidas, ERA e fielding do perfil com os valores mais recentes"""
+    for metric in PROFILE_METRICS:
+        if metric in baseball_stats:
+            setattr(player, metric, _value_or_none(baseball_stats[metric]['latest']))
+
+
+def start_import(player: Player, uploaded_by: int, filename: Optional[str] = None) -> PlayerStatImport:
+    """Cria a importação, ainda não concluída (invisível às consultas)"""
+    stat_import = PlayerStatImport(player_id=player.id, uploaded_by=uploaded_by, filename=filename)
+    db.session.add(stat_import)
+    db.session.flush()
+    return stat_import
+
+
+def ingest_player_stats(player: Player, uploaded_by: int, stat_file, filename: Optional[str] = None,
+                        stat_import: Optional[PlayerStatImport] = None,
+                        on_progress: Optional[Callable[[int], None]] = None) -> Tuple[PlayerStatImport, Dict]:
+    """
+    Importa o arquivo de estatísticas do jogador (CSV, XLSX, Parquet ou Arrow), substituindo
+    a importação anterior
+    As séries das métricas mapeadas são gravadas bloco a bloco durante a leitura e os
+    resumos por coluna ao final; o commit fica com quem chama. on_progress(linhas lidas)
+    é chamado a cada bloco e pode fazer commit: a importação só passa a valer (e as
+    anteriores só são removidas) ao ser concluída, no final
+    Levanta ValueError se o arquivo for inválido
+    """
+    if stat_import is None:
+        stat_import = start_import(player, uploaded_by, filename)
+    import_id = stat_import.id
+    date_columns = []
+
+    def store_chunk(chunk, mapped_fields, row_offset):
+        if not date_columns:
+            date_columns.append(find_date_column(chunk.columns.tolist()))
+        rows = _stat_rows(chunk, mapped_fields, row_offset, player.id, import_id, date_columns[0])
+        if rows:
+            db.session.execute(insert(PlayerStat), rows)
+        if on_progress is not None:
+            on_progress(row_offset + len(chunk))
+
+    processed_data, _ = process_player_file(stat_file, filename, on_chunk=store_chunk)
+    baseball_stats = processed_data['baseball_statistics']
+
+    # Colunas mapeadas que se revelaram não numéricas em blocos posteriores
+    db.session.execute(delete(PlayerStat).where(
+        PlayerStat.import_id == import_id,
+        PlayerStat.metric.notin_(list(baseball_stats))
+    ))
+    clear_previous_imports(player.id, import_id)
+
+    stat_import.row_count = processed_data['row_count']
+    stat_import.columns = json.dumps(processed_data['columns'])
+    stat_import.mapped_fields = json.dumps(processed_data['mapped_fields'])
+
+    metric_by_column = {column: metric for metric, column in processed_data['mapped_fields'].items()
+                        if metric in baseball_stats}
+    db.session.add_all([
+        PlayerStatSummary(
+            player_id=player.id,
+            import_id=import_id,
+            column=column,
+            metric=metric_by_column.get(column),
+            mean=_value_or_none(stats['mean']),
+            std=_value_or_none(stats['std']),
+            min=_value_or_none(stats['min']),
+            max=_value_or_none(stats['max']),
+            latest=_value_or_none(baseball_stats[metric_by_column[column]]['latest']) if column in metric_by_column else None,
+            trend=baseball_stats[metric_by_column[column]]['trend'] if column in metric_by_column else None
+        )
+        for column, stats in processed_data['statistics'].items()
+    ])
+
+    apply_profile_metrics(player, baseball_stats)
+    # Os dados passam a viver nas tabelas de estatísticas
+    player.csv_data = None
+    stat_import.completed_at = datetime.utcnow()
+    return stat_import, processed_data
+
+
+def _completed_imports(player_id: int):
+    return PlayerStatImport.query.filter(
+        PlayerStatImport.player_id == player_id,
+        PlayerStatImport.completed_at.isnot(None)
+    )
+
+
+def get_latest_import(player_id: int) -> Optional[PlayerStatImport]:
+    return _completed_imports(player_id).order_by(PlayerStatImport.id.desc()).first()
+
+
+def has_player_stats(player: Player) -> bool:
+    """Indica se o jogador tem estatísticas importadas (ou o JSON antigo em csv_data)"""
+    if player.csv_data:
+        return True
+    return db.session.query(_completed_imports(player.id).exists()).scalar()
+
+
+def get_processed_data(player: Player) -> Optional[Dict]:
+    """
+    Resumo das estatísticas do jogador no formato de process_player_csv
+    Jogadores importados antes das tabelas de estatísticas usam o JSON de csv_data
+    """
+    stat_import = get_latest_import(player.id)
+    if stat_import is None:
+        if not player.csv_data:
+            return None
+        processed_data = json.loads(player.csv_data)
+        processed_data.pop('raw_csv_content', None)
+        return processed_data
+
+    summaries = stat_import.summaries
+    return {
+        'columns': json.loads(stat_import.columns) if stat_import.columns else [],
+        'row_count': stat_import.row_count,
+        'statistics': {
+            summary.column: {'mean': summary.mean, 'max': summary.max, 'min': summary.min, 'std': summary.std}
+            for summary in summaries
+        },
+        'mapped_fields': json.loads(stat_import.mapped_fields) if stat_import.mapped_fields else {},
+        'baseball_statistics': {
+            summary.metric: {
+                'latest': summary.latest,
+                'average': summary.mean,
+                'best': summary.max,
+                'trend': summary.trend
+            }
+            for summary in summaries if summary.metric
+        }
+    }
+
+
+def query_player_stats(player_id: int, import_id: int, metrics: Optional[List[str]] = None,
+                       date_from: Optional[date] = None, date_to: Optional[date] = None,
+                       limit: int = 1000) -> Tuple[Dict[str, List[Dict]], bool]:
+    """
+    Séries das métricas da importação do jogador, na ordem dos jogos
+    Retorna ({métrica: [{game_index, game_date, value}]}, truncado)
+    """
+    # Uma importação em andamento convive com a anterior até ser concluída
+    query = db.session.query(
+        PlayerStat.metric, PlayerStat.game_index, PlayerStat.game_date, PlayerStat.value
+    ).filter(PlayerStat.player_id == player_id, PlayerStat.import_id == import_id)
+
+    if metrics:
+        query = query.filter(PlayerStat.metric.in_(metrics))
+    if date_from:
+        query = query.filter(PlayerStat.game_date >= date_from)
+    if date_to:
+        query = query.filter(PlayerStat.game_date <= date_to)
+
+    limit = max(1, min(limit, MAX_STAT_ROWS))
+    rows = query.order_by(PlayerStat.metric, PlayerStat.game_index).limit(limit + 1).all()
+
+    series: Dict[str, List[Dict]] = {}
+    for metric, game_index, game_date, value in rows[:limit]:
+        series.setdefault(metric, []).append({
+            'game_index': game_index,
+            'game_date': game_date.isoformat() if game_date else None,
+            'value': value
+        })
+    return series, len(rows) > limit
+
+
+def stat_upload_path(stored_filename: str) -> str:
+    return os.path.join(current_app.config['STATS_UPLOAD_FOLDER'], stored_filename)
+
+
+def save_stat_upload(stat_file) -> str:
+    """Grava o arquivo enviado para processamento em segundo plano e retorna o nome gravado"""
+    stored_filename = generate_unique_filename(secure_filename(stat_file.filename))
+    os.makedirs(current_app.config['STATS_UPLOAD_FOLDER'], exist_ok=True)
+    stat_file.save(stat_upload_path(stored_filename))
+    return stored_filename
+
+
+def run_stats_import_job(context: JobContext) -> Dict:
+    """
+    Executa a importação de um arquivo de estatísticas gravado por save_stat_upload
+    O progresso é medido em bytes lidos do arquivo; o arquivo é apagado ao final
+    """
+    params = context.params
+    file_path = stat_upload_path(params['stored_filename'])
+    try:
+        player = Player.query.filter_by(id=context.player_id, trainer_id=context.owner_id).first()
+        if not player:
+            raise ValueError('Jogador não encontrado ou não pertence a você')
+
+        stat_import = start_import(player, context.owner_id, params.get('filename'))
+        import_id = stat_import.id
+        db.session.commit()
+
+        total = os.path.getsize(file_path)
+        context.update_progress(0, total)
+        with open(file_path, 'rb') as stat_file:
+            try:
+                stat_import, processed_data = ingest_player_stats(
+                    player, context.owner_id, stat_file, params.get('filename'), stat_import=stat_import,
+                    on_progress=lambda rows: context.update_progress(min(stat_file.tell(), total))
+                )
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                discard_import(import_id)
+                raise
+        context.update_progress(total, total)
+
+        return {
+            'import': stat_import.to_dict(),
+            'row_count': processed_data['row_count'],
+            'mapped_fields': processed_data['mapped_fields'],
+            'baseball_statistics': processed_data['baseball_statistics'],
+            'player': {metric: getattr(player, metric) for metric in ('id',) + PROFILE_METRICS}
+        }
+    finally:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
+job_queue.register('stats_import', run_stats_import_job)
@@ -0,0 +1,63 @@
+from flask import request
+from typing import Any, Dict, Optional
+
+# Árvore de campos pedidos: nome -> subárvore (None = o campo inteiro)
+FieldTree = Optional[Dict[str, Optional[dict]]]
+
+
+def parse_fields(spec: Optional[str]) -> FieldTree:
+    """
+    Converte "id,user_info.first_name" em {'id': None, 'user_info': {'first_name': None}}
+    Retorna None (todos os campos) se nada for pedido; pedir o campo inteiro
+    prevalece sobre pedir só alguns subcampos dele
+    """
+    if not spec or not spec.strip():
+        return None
+
+    tree: Dict[str, Optional[dict]] = {}
+    for path in spec.split(','):
+        parts = [part.strip() for part in path.split('.') if part.strip()]
+        if not parts:
+            continue
+        node = tree
+        for part in parts[:-1]:
+            if part in node and node[part] is None:
+                break
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = None
+    return tree or None
+
+
+def requested_fields(param: str = 'fields') -> FieldTree:
+    """Campos pedidos na query string da requisição atual (?fields=)"""
+    return parse_fields(request.args.get(param))
+
+
+def wants(fields: FieldTree, name: str) -> bool:
+    """Indica se o campo deve ser serializado"""
+    return fields is None or name in fields
+
+
+def subfields(fields: FieldTree, name: str) -> FieldTree:
+    """Subárvore de um campo aninhado (None = o objeto aninhado inteiro)"""
+    return None if fields is None else fields.get(name)
+
+
+def select_fields(data: Any, fields: FieldTree) -> Any:
+    """
+    Mantém apenas os campos pedidos de um dicionário já serializado
+    Percorre objetos aninhados e listas; usado pelos serializadores que
+    ainda não calculam só os campos pedidos
+    """
+    if fields is None:
+        return data
+    if isinstance(data, list):
+        return [select_fields(item, fields) for item in data]
+    if not isinstance(data, dict):
+        return data
+    return {
+        name: select_fields(data[name], subtree)
+        for name, subtree in fields.items()
+        if name in data
+    }
@@ -1,10 +1,25 @@
 import csv
 import os
 import uuid
+import zipfile
+from itertools import chain
 from werkzeug.utils import secure_filename
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import numpy as np
 import pandas as pd
-from io import StringIO
+
+try:
+    import openpyxl  # Dependência opcional: planilhas XLSX
+    from openpyxl.utils.exceptions import InvalidFileException
+except ImportError:
+    openpyxl = None
+
+try:
+    import pyarrow as pa  # Dependência opcional: arquivos Parquet e Arrow/Feather
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pa = None
 
 ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'avi', 'mov', 'wmv', 'flv', 'webm'}
 ALLOWED_IMAGE_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif', 'bmp', 'tiff'}
@@ -61,110 +76,427 @@ def save_uploaded_file(file, upload_folder):
         }
     return None
 
-def process_player_csv(csv_file) -> Tuple[Dict, str]:
+# Linhas lidas por vez; a memória do processamento não depende do tamanho do arquivo
+CSV_CHUNK_ROWS = 50000
+
+# Campos do baseball e os nomes de coluna aceitos para cada um
+BASEBALL_FIELDS = {
+    'batting_average': ['batting_avg', 'avg', 'ba', 'batting_average'],
+    'era': ['era', 'earned_run_average'],
+    'fielding_percentage': ['fielding_pct', 'fielding_percentage', 'fpct'],
+    'home_runs': ['hr', 'home_runs', 'homeruns'],
+    'rbi': ['rbi', 'runs_batted_in'],
+    'stolen_bases': ['sb', 'stolen_bases'],
+    'strikeouts': ['so', 'strikeouts', 'k'],
+    'walks': ['bb', 'walks', 'base_on_balls'],
+    'hits': ['h', 'hits'],
+    'runs': ['r', 'runs'],
+    'doubles': ['2b', 'doubles'],
+    'triples': ['3b', 'triples']
+}
+
+# Colunas aceitas como data do jogo
+DATE_FIELDS = ['date', 'game_date', 'data', 'data_jogo']
+
+
+def normalize_column_name(name) -> str:
+    """Nome de coluna comparável aos apelidos: minúsculo, sem '_' nem espaços"""
+    return str(name).lower().replace('_', '').replace(' ', '')
+
+
+# Índices montados uma única vez: nome normalizado -> campo do baseball (e ordem dos campos)
+BASEBALL_FIELD_INDEX = {
+    normalize_column_name(alias): standard_name
+    for standard_name, aliases in BASEBALL_FIELDS.items()
+    for alias in aliases
+}
+BASEBALL_FIELD_ORDER = {standard_name: position for position, standard_name in enumerate(BASEBALL_FIELDS)}
+DATE_FIELD_INDEX = frozenset(normalize_column_name(name) for name in DATE_FIELDS)
+
+
+class StatsAccumulator:
+    """
+    Estatísticas de todas as colunas numéricas acumuladas bloco a bloco
+    Cada bloco é agregado de uma vez, como matriz (linhas x colunas); média e variância
+    são combinadas entre blocos pela fórmula de Chan et al., sem guardar os valores
+    Os resultados são os do pandas sobre a coluna inteira: mean/min/max/std ignoram
+    lacunas (NaN se a coluna não tem valores; std NaN com menos de dois), latest é
+    o valor da última linha (NaN se estiver vazia) e, como em calculate_trend, uma
+    coluna com lacunas tem tendência stable
+    """
+
+    def __init__(self, columns: List[str]):
+        size = len(columns)
+        self.columns = list(columns)
+        self.positions = {col: i for i, col in enumerate(self.columns)}
+        self.seen = np.zeros(size, dtype=bool)         # numérica em algum bloco
+        self.non_numeric = np.zeros(size, dtype=bool)  # teve valor não numérico
+        self.missing = np.zeros(size, dtype=bool)      # teve alguma lacuna
+        self.count = np.zeros(size)
+        self.mean = np.zeros(size)
+        self.m2 = np.zeros(size)
+        self.min = np.full(size, np.nan)
+        self.max = np.full(size, np.nan)
+        self.first = np.full(size, np.nan)
+        self.last = np.full(size, np.nan)
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        # Uma coluna só é numérica se for numérica em todos os blocos
+        numeric_columns = set(chunk.select_dtypes(include=['number']).columns)
+        other_columns = [col for col in self.columns if col not in numeric_columns]
+        if other_columns:
+            has_values = chunk[other_columns].notna().any().to_numpy()
+            self.non_numeric[[self.positions[col] for col in other_columns]] |= has_values
+
+        index = np.array([self.positions[col] for col in self.columns if col in numeric_columns], dtype=int)
+        if not len(index):
+            return
+        self.seen[index] = True
+
+        values = chunk.iloc[:, index].to_numpy(dtype=np.float64, na_value=np.nan)
+        present = ~np.isnan(values)
+        n = present.sum(axis=0)
+        has_rows = n > 0
+        safe_n = np.maximum(n, 1)
+
+        chunk_mean = np.where(present, values, 0.0).sum(axis=0) / safe_n
+        deviations = np.where(present, values - chunk_mean, 0.0)
+        chunk_m2 = (deviations * deviations).sum(axis=0)
+        chunk_min = np.where(present, values, np.inf).min(axis=0)
+        chunk_max = np.where(present, values, -np.inf).max(axis=0)
+
+        chunk_first = values[present.argmax(axis=0), np.arange(len(index))]
+
+        count = self.count[index]
+        total = count + n
+        delta = chunk_mean - self.mean[index]
+        weight = np.where(has_rows, n / np.maximum(total, 1), 0.0)
+        self.mean[index] += delta * weight
+        self.m2[index] += np.where(has_rows, chunk_m2 + delta * delta * count * weight, 0.0)
+        self.count[index] = total
+
+        self.min[index] = np.where(has_rows, np.fmin(self.min[index], chunk_min), self.min[index])
+        self.max[index] = np.where(has_rows, np.fmax(self.max[index], chunk_max), self.max[index])
+        first = self.first[index]
+        self.first[index] = np.where(has_rows & np.isnan(first), chunk_first, first)
+        if len(values):
+            # Última linha do arquivo, mesmo vazia (iloc[-1] do pandas)
+            self.last[index] = values[-1]
+        self.missing[index] |= n < len(values)
+
+    @property
+    def numeric_columns(self) -> List[str]:
+        return [col for col, ok in zip(self.columns, self.seen & ~self.non_numeric) if ok]
+
+    @property
+    def std(self) -> np.ndarray:
+        # Desvio padrão amostral (ddof=1), como o pandas: NaN com menos de dois valores
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 1, np.sqrt(self.m2 / (self.count - 1)), np.nan)
+
+    @property
+    def trend(self) -> np.ndarray:
+        # Lacunas deixam a média da série inteira indefinida: stable, como em calculate_trend
+        return trend_labels(self.first, self.last, self.count, np.where(self.missing, np.nan, self.mean))
+
+    def summary(self) -> Dict[str, Dict]:
+        """{coluna: {mean, max, min, std, latest, trend}} das colunas numéricas, na ordem do arquivo"""
+        keep = self.seen & ~self.non_numeric
+        arrays = {
+            'mean': np.where(self.count > 0, self.mean, np.nan),
+            'max': self.max,
+            'min': self.min,
+            'std': self.std,
+            'latest': self.last,
+            'trend': self.trend
+        }
+        lists = {name: values[keep].tolist() for name, values in arrays.items()}
+        return {
+            col: {name: values[i] for name, values in lists.items()}
+            for i, col in enumerate(self.numeric_columns)
+        }
+
+
+def trend_labels(first: np.ndarray, last: np.ndarray, count: np.ndarray, mean: np.ndarray) -> np.ndarray:
     """
-    Processa um arquivo CSV com dados do jogador
-    Retorna um dicionário com os dados processados e uma string com o conteúdo para análise
+    Tendência (ascending, descending, stable) de várias séries de uma vez
+    A diferença média entre valores consecutivos é (último - primeiro) / (n - 1)
     """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_diff = (last - first) / (count - 1)
+    threshold = np.abs(mean) * 0.05  # 5% da média
+    enough = count >= 2
+    return np.select(
+        [enough & (avg_diff > threshold), enough & (avg_diff < -threshold)],
+        ['ascending', 'descending'],
+        default='stable'
+    )
+
+
+def map_baseball_fields(columns: List[str]) -> Dict[str, str]:
+    """Mapeia colunas do CSV para os campos do baseball (primeira coluna compatível)"""
+    mapped_fields = {}
+    for col in columns:
+        standard_name = BASEBALL_FIELD_INDEX.get(normalize_column_name(col))
+        if standard_name is not None and standard_name not in mapped_fields:
+            mapped_fields[standard_name] = col
+    return dict(sorted(mapped_fields.items(), key=lambda item: BASEBALL_FIELD_ORDER[item[0]]))
+
+
+def find_date_column(columns: List[str]) -> Optional[str]:
+    """Coluna com a data do jogo, se houver"""
+    for col in columns:
+        if normalize_column_name(col) in DATE_FIELD_INDEX:
+            return col
+    return None
+
+
+# Formatos aceitos para arquivos de estatísticas, pela extensão
+STAT_FILE_FORMATS = {'csv': 'csv', 'xlsx': 'xlsx', 'parquet': 'parquet', 'arrow': 'arrow', 'feather': 'arrow'}
+STAT_FORMAT_LABELS = {'csv': 'CSV', 'xlsx': 'XLSX', 'parquet': 'Parquet', 'arrow': 'Arrow'}
+STAT_FORMAT_PACKAGES = {'xlsx': 'openpyxl', 'parquet': 'pyarrow', 'arrow': 'pyarrow'}
+
+ChunkReader = Callable[[Optional[List[str]]], Iterator[pd.DataFrame]]
+
+
+def stat_file_format(filename: str) -> Optional[str]:
+    """Formato do arquivo de estatísticas pela extensão (None se não suportado)"""
+    ext = filename.rsplit('.', 1)[1].lower() if filename and '.' in filename else ''
+    return STAT_FILE_FORMATS.get(ext)
+
+
+def stat_format_available(file_format: str) -> bool:
+    """Indica se a biblioteca de leitura do formato está instalada"""
+    package = STAT_FORMAT_PACKAGES.get(file_format)
+    if package == 'openpyxl':
+        return openpyxl is not None
+    if package == 'pyarrow':
+        return pa is not None
+    return True
+
+
+def available_stat_extensions() -> List[str]:
+    return [ext for ext, file_format in STAT_FILE_FORMATS.items() if stat_format_available(file_format)]
+
+
+def _unique_columns(header) -> List[str]:
+    """Nomes de coluna como o pandas os daria: vazios viram 'Unnamed: i' e repetidos ganham '.n'"""
+    columns, seen = [], {}
+    for i, name in enumerate(header):
+        name = f'Unnamed: {i}' if name is None else str(name)
+        if name in seen:
+            seen[name] += 1
+            name = f'{name}.{seen[name]}'
+        else:
+            seen[name] = 0
+        columns.append(name)
+    return columns
+
+
+def _open_csv(stream, chunksize: int) -> Tuple[List[str], ChunkReader]:
+    # O CSV precisa ser tokenizado por inteiro; todas as colunas são lidas
+    reader = pd.read_csv(stream, chunksize=chunksize, encoding='utf-8-sig')
+    first = next(reader, None)
+    if first is None:
+        return [], lambda selected: iter(())
+    return first.columns.tolist(), lambda selected: chain([first], reader)
+
+
+def _open_xlsx(stream, chunksize: int) -> Tuple[List[str], ChunkReader]:
+    # Modo somente leitura: as linhas da primeira planilha são lidas sob demanda
     try:
-        # Ler o conteúdo do arquivo CSV
-        csv_content = csv_file.read().decode('utf-8')
-        csv_file.seek(0)  # Reset para poder ler novamente se necessário
-        
-        # Parse do CSV
-        df = pd.read_csv(StringIO(csv_content))
-        
-        # Dicionário para armazenar dados processados
-        processed_data = {
-            'raw_csv_content': csv_content,
-            'columns': df.columns.tolist(),
-            'row_count': len(df),
-            'statistics': {}
+        workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+    except (InvalidFileException, zipfile.BadZipFile, KeyError):
+        raise ValueError('arquivo XLSX inválido')
+    sheet = workbook.active
+    header = next(sheet.iter_rows(max_row=1, values_only=True), None)
+    if header is None:
+        workbook.close()
+        return [], lambda selected: iter(())
+    columns = _unique_columns(header)
+
+    def read_chunks(selected):
+        names = selected or columns
+        # Só a faixa de colunas pedida vira célula; o restante da linha é ignorado
+        first_col = min(columns.index(name) for name in names)
+        positions = [columns.index(name) - first_col for name in names]
+        rows = sheet.iter_rows(min_row=2, min_col=first_col + 1, max_col=first_col + max(positions) + 1,
+                               values_only=True)
+        try:
+            batch = []
+            for row in rows:
+                if all(value is None for value in row):
+                    continue
+                batch.append([row[i] if i < len(row) else None for i in positions])
+                if len(batch) >= chunksize:
+                    yield pd.DataFrame.from_records(batch, columns=names)
+                    batch = []
+            if batch:
+                yield pd.DataFrame.from_records(batch, columns=names)
+        finally:
+            workbook.close()
+
+    return columns, read_chunks
+
+
+def _open_parquet(stream, chunksize: int) -> Tuple[List[str], ChunkReader]:
+    parquet_file = pa.parquet.ParquetFile(stream)
+    # Índice do DataFrame gravado pelo pandas não é uma coluna de dados
+    columns = [name for name in parquet_file.schema_arrow.names if not name.startswith('__index_level_')]
+
+    def read_chunks(selected):
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=selected or columns):
+            yield batch.to_pandas()
+
+    return columns, read_chunks
+
+
+def _open_arrow(stream, chunksize: int) -> Tuple[List[str], ChunkReader]:
+    # Arquivo Arrow IPC (Feather v2) ou, na falta do rodapé, o formato de stream
+    try:
+        reader = pa.ipc.open_file(stream)
+        batches = lambda: (reader.get_batch(i) for i in range(reader.num_record_batches))
+    except pa.ArrowInvalid:
+        stream.seek(0)
+        reader = pa.ipc.open_stream(stream)
+        batches = lambda: reader
+    columns = reader.schema.names
+
+    def read_chunks(selected):
+        for batch in batches():
+            table = pa.Table.from_batches([batch]).select(selected or columns)
+            for offset in range(0, table.num_rows, chunksize):
+                yield table.slice(offset, chunksize).to_pandas()
+
+    return columns, read_chunks
+
+
+# Formato -> (abre o arquivo e retorna as colunas e o leitor de blocos, lê só as colunas pedidas)
+STAT_FILE_READERS = {
+    'csv': (_open_csv, False),
+    'xlsx': (_open_xlsx, True),
+    'parquet': (_open_parquet, True),
+    'arrow': (_open_arrow, True),
+}
+
+_READ_ERRORS = (ValueError, pa.ArrowException) if pa is not None else (ValueError,)
+
+
+def _projected_columns(columns: List[str], mapped_fields: Dict[str, str],
+                       required_columns: Optional[List[str]]) -> Optional[List[str]]:
+    """Colunas lidas nos formatos colunares: mapeadas, data do jogo e obrigatórias (None = todas)"""
+    if not mapped_fields:
+        return None
+    wanted = set(mapped_fields.values()) | set(required_columns or [])
+    date_column = find_date_column(columns)
+    if date_column:
+        wanted.add(date_column)
+    return [col for col in columns if col in wanted]
+
+
+def process_player_file(stat_file, filename: Optional[str] = None, required_columns: List[str] = None,
+                        chunksize: int = CSV_CHUNK_ROWS,
+                        on_chunk: Callable[[pd.DataFrame, Dict[str, str], int], None] = None) -> Tuple[Dict, str]:
+    """
+    Processa um arquivo de estatísticas do jogador (CSV, XLSX, Parquet ou Arrow/Feather)
+    O formato vem da extensão do nome (sem nome, CSV); XLSX e os formatos colunares leem
+    só as colunas mapeadas, a data do jogo e as obrigatórias
+    Mesmo retorno e mesmos erros (ValueError) de process_player_csv
+    """
+    filename = filename or getattr(stat_file, 'filename', None)
+    file_format = stat_file_format(filename) if filename else 'csv'
+    if file_format is None:
+        raise ValueError(f"Formato de arquivo não suportado. Use: {', '.join(available_stat_extensions())}")
+    if not stat_format_available(file_format):
+        raise ValueError(f"Leitura de {STAT_FORMAT_LABELS[file_format]} indisponível: "
+                         f"instale {STAT_FORMAT_PACKAGES[file_format]}")
+    return _process_stat_file(stat_file, file_format, required_columns, chunksize, on_chunk)
+
+
+def process_player_csv(csv_file, required_columns: List[str] = None, chunksize: int = CSV_CHUNK_ROWS,
+                       on_chunk: Callable[[pd.DataFrame, Dict[str, str], int], None] = None) -> Tuple[Dict, str]:
+    """
+    Processa um arquivo CSV com dados do jogador em uma única leitura, bloco a bloco
+    Valida a estrutura, mapeia as colunas e acumula as estatísticas sem carregar o arquivo inteiro;
+    on_chunk(bloco, campos mapeados, linhas anteriores) recebe cada bloco para gravação
+    Retorna um dicionário com os dados processados e o texto formatado para análise
+    Levanta ValueError se o CSV for inválido
+    """
+    return _process_stat_file(csv_file, 'csv', required_columns, chunksize, on_chunk)
+
+
+def _process_stat_file(stat_file, file_format: str, required_columns: Optional[List[str]], chunksize: int,
+                       on_chunk: Optional[Callable]) -> Tuple[Dict, str]:
+    label = STAT_FORMAT_LABELS[file_format]
+    open_reader, projected = STAT_FILE_READERS[file_format]
+    stream = getattr(stat_file, 'stream', stat_file)
+    try:
+        columns, read_chunks = open_reader(stream, chunksize)
+        row_count, mapped_fields, accumulator = 0, {}, None
+        missing_columns = [col for col in required_columns or [] if col not in columns]
+
+        if not missing_columns:
+            mapped_fields = map_baseball_fields(columns)
+            selected = _projected_columns(columns, mapped_fields, required_columns) if projected else None
+            for chunk in read_chunks(selected):
+                if accumulator is None:
+                    accumulator = StatsAccumulator(chunk.columns.tolist())
+                if on_chunk is not None:
+                    on_chunk(chunk, mapped_fields, row_count)
+                row_count += len(chunk)
+                accumulator.update(chunk)
+    except pd.errors.EmptyDataError:
+        raise ValueError(f"{label} está vazio")
+    except _READ_ERRORS as e:
+        # Erros de leitura e decodificação; erros de gravação em on_chunk seguem adiante
+        raise ValueError(f"Erro ao processar {label}: {str(e)}")
+
+    if missing_columns:
+        raise ValueError(f"Colunas obrigatórias faltando: {missing_columns}")
+    if not row_count:
+        raise ValueError(f"{label} está vazio")
+
+    column_stats = accumulator.summary()
+    processed_data = {
+        'columns': columns,
+        'row_count': row_count,
+        'statistics': {
+            col: {'mean': stats['mean'], 'max': stats['max'], 'min': stats['min'], 'std': stats['std']}
+            for col, stats in column_stats.items()
         }
-        
-        # Processar estatísticas básicas para colunas numéricas
-        numeric_columns = df.select_dtypes(include=['number']).columns
-        for col in numeric_columns:
-            processed_data['statistics'][col] = {
-                'mean': float(df[col].mean()) if not df[col].empty else 0,
-                'max': float(df[col].max()) if not df[col].empty else 0,
-                'min': float(df[col].min()) if not df[col].empty else 0,
-                'std': float(df[col].std()) if not df[col].empty else 0
+    }
+
+    processed_data['mapped_fields'] = mapped_fields
+
+    # Estatísticas específicas do baseball (colunas mapeadas e numéricas)
+    baseball_stats = {}
+    for standard_name, csv_column in mapped_fields.items():
+        stats = column_stats.get(csv_column)
+        if stats is not None:
+            baseball_stats[standard_name] = {
+                'latest': stats['latest'],
+                'average': stats['mean'],
+                'best': stats['max'],
+                'trend': stats['trend']
             }
-        
-        # Identificar possíveis campos importantes do baseball
-        baseball_fields = {
-            'batting_average': ['batting_avg', 'avg', 'ba', 'batting_average'],
-            'era': ['era', 'earned_run_average'],
-            'fielding_percentage': ['fielding_pct', 'fielding_percentage', 'fpct'],
-            'home_runs': ['hr', 'home_runs', 'homeruns'],
-            'rbi': ['rbi', 'runs_batted_in'],
-            'stolen_bases': ['sb', 'stolen_bases'],
-            'strikeouts': ['so', 'strikeouts', 'k'],
-            'walks': ['bb', 'walks', 'base_on_balls'],
-            'hits': ['h', 'hits'],
-            'runs': ['r', 'runs'],
-            'doubles': ['2b', 'doubles'],
-            'triples': ['3b', 'triples']
-        }
-        
-        # Mapear campos do CSV para campos do baseball
-        mapped_fields = {}
-        for standard_name, possible_names in baseball_fields.items():
-            for col in df.columns:
-                if col.lower().replace('_', '').replace(' ', '') in [name.replace('_', '').replace(' ', '') for name in possible_names]:
-                    if standard_name not in mapped_fields:  # Evitar duplicatas
-                        mapped_fields[standard_name] = col
-                        break
-        
-        processed_data['mapped_fields'] = mapped_fields
-        
-        # Extrair estatísticas específicas do baseball se disponíveis
-        baseball_stats = {}
-        for standard_name, csv_column in mapped_fields.items():
-            if csv_column in df.columns and df[csv_column].dtype in ['int64', 'float64']:
-                baseball_stats[standard_name] = {
-                    'latest': float(df[csv_column].iloc[-1]) if not df[csv_column].empty else 0,
-                    'average': float(df[csv_column].mean()) if not df[csv_column].empty else 0,
-                    'best': float(df[csv_column].max()) if not df[csv_column].empty else 0,
-                    'trend': calculate_trend(df[csv_column].tolist()) if len(df[csv_column]) > 1 else 'stable'
-                }
-        
-        processed_data['baseball_statistics'] = baseball_stats
-        
-        return processed_data, csv_content
-        
-    except Exception as e:
-        raise ValueError(f"Erro ao processar CSV: {str(e)}")
+    processed_data['baseball_statistics'] = baseball_stats
+
+    return processed_data, format_csv_for_ai_analysis(processed_data)
 
 def calculate_trend(values: List[float]) -> str:
     """Calcula a tendência dos valores (ascending, descending, stable)"""
+    values = np.asarray(values, dtype=np.float64)
     if len(values) < 2:
         return 'stable'
-    
-    # Calcular a diferença média entre valores consecutivos
-    diffs = [values[i+1] - values[i] for i in range(len(values)-1)]
-    avg_diff = sum(diffs) / len(diffs)
-    
-    # Definir limiar para determinar tendência
-    threshold = abs(sum(values) / len(values)) * 0.05  # 5% da média
-    
-    if avg_diff > threshold:
-        return 'ascending'
-    elif avg_diff < -threshold:
-        return 'descending'
-    else:
-        return 'stable'
+    return str(trend_labels(values[0], values[-1], np.float64(len(values)), values.mean()))
 
 def validate_csv_structure(csv_file, required_columns: List[str] = None) -> Tuple[bool, str]:
     """
-    Valida a estrutura de um arquivo CSV
+    Valida a estrutura de um arquivo CSV (lê apenas o cabeçalho e a primeira linha)
     """
+    stream = getattr(csv_file, 'stream', csv_file)
     try:
-        csv_content = csv_file.read().decode('utf-8')
-        csv_file.seek(0)
-        
-        df = pd.read_csv(StringIO(csv_content))
+        df = pd.read_csv(stream, nrows=1, encoding='utf-8-sig')
         
         if df.empty:
             return False, "CSV está vazio"
@@ -176,8 +508,12 @@ def validate_csv_structure(csv_file, required_columns: List[str] = None) -> Tupl
         
         return True, "CSV válido"
         
+    except pd.errors.EmptyDataError:
+        return False, "CSV está vazio"
     except Exception as e:
         return False, f"Erro ao validar CSV: {str(e)}"
+    finally:
+        stream.seek(0)
 
 def format_csv_for_ai_analysis(processed_data: Dict) -> str:
     """
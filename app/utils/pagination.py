@@ -0,0 +1,85 @@
+import base64
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+class InvalidCursorError(ValueError):
+    """Cursor de paginação malformado"""
+
+
+def encode_cursor(timestamp: Optional[datetime], record_id: int) -> str:
+    """Gera um cursor opaco a partir de (timestamp, id)"""
+    raw = json.dumps([timestamp.isoformat() if timestamp else None, record_id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """Lê um cursor gerado por encode_cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, record_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return (datetime.fromisoformat(timestamp) if timestamp else None), int(record_id)
+    except (ValueError, TypeError, UnicodeError):
+        raise InvalidCursorError('Cursor inválido')
+
+
+def parse_pagination_args(args, default_limit: int = 50, max_limit: int = 100) -> Dict:
+    """Extrai limit/before/after/include_total dos parâmetros da requisição"""
+    limit = args.get('limit', type=int) or args.get('per_page', type=int) or default_limit
+    return {
+        'limit': max(1, min(limit, max_limit)),
+        'before': args.get('before'),
+        'after': args.get('after'),
+        'include_total': args.get('include_total', '').lower() in ('1', 'true', 'yes')
+    }
+
+
+def paginate_by_cursor(query, timestamp_column, id_column, limit: int = 50,
+                       before: Optional[str] = None, after: Optional[str] = None,
+                       include_total: bool = False) -> Tuple[List, Dict]:
+    """
+    Paginação por cursor (keyset) sobre (timestamp, id), do mais recente para o mais antigo
+    `before` avança para itens mais antigos e `after` volta para itens mais recentes.
+    Cada página custa O(limit); o total só é contado se include_total for pedido.
+    """
+    total = query.order_by(None).count() if include_total else None
+
+    if after:
+        timestamp, record_id = decode_cursor(after)
+        page_query = query.filter(
+            (timestamp_column > timestamp) |
+            ((timestamp_column == timestamp) & (id_column > record_id))
+        ).order_by(timestamp_column.asc(), id_column.asc())
+    else:
+        page_query = query.order_by(timestamp_column.desc(), id_column.desc())
+        if before:
+            timestamp, record_id = decode_cursor(before)
+            page_query = page_query.filter(
+                (timestamp_column < timestamp) |
+                ((timestamp_column == timestamp) & (id_column < record_id))
+            )
+
+    # Um item extra indica se existe outra página
+    items = page_query.limit(limit + 1).all()
+    has_more = len(items) > limit
+    items = items[:limit]
+    if after:
+        items.reverse()
+
+    timestamp_attr = timestamp_column.key
+    id_attr = id_column.key
+
+    def cursor_for(item):
+        return encode_cursor(getattr(item, timestamp_attr), getattr(item, id_attr))
+
+    pagination = {
+        'limit': limit,
+        'next_cursor': cursor_for(items[-1]) if items and (has_more or after) else None,
+        'prev_cursor': cursor_for(items[0]) if items and (before or (after and has_more)) else None,
+        'has_more': has_more
+    }
+    if include_total:
+        pagination['total'] = total
+
+    return items, pagination
@@ -0,0 +1,109 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache, partial
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash
+from typing import List, Optional, Tuple
+
+# Esquema padrão (o mesmo do Werkzeug 2.3); sobrescrito por PASSWORD_HASH_METHOD
+DEFAULT_HASH_METHOD = 'pbkdf2:sha256:600000'
+DEFAULT_SALT_LENGTH = 16
+
+# Abaixo disso o custo de enviar as senhas aos processos não compensa
+PARALLEL_THRESHOLD = 8
+
+_executor: Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def _worker_count() -> int:
+    """Processos do pool (PASSWORD_HASH_WORKERS ou as CPUs disponíveis)"""
+    configured = int(os.environ.get('PASSWORD_HASH_WORKERS', 0))
+    if configured:
+        return configured
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def get_hash_settings() -> Tuple[str, int]:
+    """Método e tamanho do salt configurados (app atual ou variáveis de ambiente)"""
+    if has_app_context():
+        config = current_app.config
+        return (config.get('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD),
+                config.get('PASSWORD_SALT_LENGTH', DEFAULT_SALT_LENGTH))
+    return (os.environ.get('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD),
+            int(os.environ.get('PASSWORD_SALT_LENGTH', DEFAULT_SALT_LENGTH)))
+
+
+def _hash_password(password: str, method: str = DEFAULT_HASH_METHOD,
+                   salt_length: int = DEFAULT_SALT_LENGTH) -> str:
+    return generate_password_hash(password, method=method, salt_length=salt_length)
+
+
+def hash_password(password: str) -> str:
+    """Gera o hash da senha com o esquema configurado"""
+    method, salt_length = get_hash_settings()
+    return _hash_password(password, method, salt_length)
+
+
+@lru_cache(maxsize=16)
+def _hash_signature(method: str, salt_length: int) -> Tuple[str, int]:
+    """
+    Forma completa do método (ex.: "scrypt" -> "scrypt:32768:8:1") e tamanho do salt,
+    obtidos de um hash de referência para seguir os padrões do Werkzeug instalado
+    """
+    reference = _hash_password('', method, salt_length)
+    full_method, salt, _ = reference.split('$', 2)
+    return full_method, len(salt)
+
+
+def needs_rehash(password_hash: Optional[str]) -> bool:
+    """Indica se o hash foi gerado com parâmetros diferentes dos configurados"""
+    if not password_hash or password_hash.count('$') < 2:
+        return True
+    stored_method, stored_salt, _ = password_hash.split('$', 2)
+    return (stored_method, len(stored_salt)) != _hash_signature(*get_hash_settings())
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    """Pool de processos compartilhado, criado no primeiro uso com `workers` processos"""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(max_workers=workers)
+    return _executor
+
+
+def _reset_executor() -> None:
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor:
+        executor.shutdown(wait=False)
+
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """
+    Gera os hashes de várias senhas, em paralelo entre processos
+    O hash é CPU-bound; processos separados não disputam CPU com as threads do servidor
+    """
+    # Os workers não têm contexto da aplicação: os parâmetros vão junto da tarefa
+    method, salt_length = get_hash_settings()
+    hash_one = partial(_hash_password, method=method, salt_length=salt_length)
+
+    workers = _worker_count()
+    if len(passwords) < PARALLEL_THRESHOLD or workers < 2:
+        return [hash_one(password) for password in passwords]
+
+    executor = _get_executor(workers)
+    chunksize = max(1, len(passwords) // (workers * 4))
+    try:
+        return list(executor.map(hash_one, passwords, chunksize=chunksize))
+    except BrokenProcessPool:
+        # Processo do pool morreu: recria na próxima chamada e conclui de forma serial
+        _reset_executor()
+        return [hash_one(password) for password in passwords]
@@ -0,0 +1,242 @@
+import threading
+import time
+from flask import g, has_request_context, request
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import joinedload, make_transient_to_detached
+from app import db
+from app.models import User, Player, UserType
+from typing import Dict, Optional, Tuple
+
+
+class Principal:
+    """
+    Identidade do usuário autenticado (papel e vínculos)
+    O papel vem do token; os vínculos de jogador e treinador vêm do cache ou do banco
+    """
+
+    __slots__ = ('user_id', 'user_type', 'player_id', 'trainer_id')
+
+    def __init__(self, user_id: int, user_type: UserType, player_id: Optional[int] = None,
+                 trainer_id: Optional[int] = None):
+        self.user_id = user_id
+        self.user_type = user_type
+        self.player_id = player_id
+        self.trainer_id = trainer_id
+
+    @property
+    def is_trainer(self) -> bool:
+        return self.user_type == UserType.TRAINER
+
+    @property
+    def is_player(self) -> bool:
+        return self.user_type == UserType.PLAYER
+
+    def __repr__(self):
+        return f'<Principal {self.user_id} {self.user_type.value}>'
+
+
+def principal_claims(user: User, player: Optional[Player] = None) -> Dict:
+    """
+    Claims adicionais do token de acesso (tipo de usuário, jogador e treinador)
+    Os vínculos são informativos: o token não expira, então as permissões usam
+    os vínculos atuais (get_current_principal), não os gravados no token
+    """
+    claims = {'user_type': user.user_type.value}
+    if player is not None:
+        claims['player_id'] = player.id
+        claims['trainer_id'] = player.trainer_id
+    return claims
+
+
+# Escopos de tokens restritos e o endpoint em que cada um é aceito
+TOKEN_SCOPE_ENDPOINTS = {
+    'chat_stream': 'chat.stream_events'
+}
+
+
+def token_scope_allowed(claims: Dict) -> bool:
+    """Tokens sem escopo valem em qualquer rota; os com escopo, só no endpoint dele"""
+    scope = claims.get('scope')
+    return scope is None or TOKEN_SCOPE_ENDPOINTS.get(scope) == request.endpoint
+
+
+class PrincipalCache:
+    """
+    Cache em memória (TTL curto) dos usuários autenticados
+    Guarda apenas os valores das colunas; cada requisição recebe uma instância
+    própria anexada à sua sessão, sem consultar o banco
+    """
+
+    def __init__(self, ttl: float = 30, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[int, tuple] = {}
+        # user_id -> ((player_id, trainer_id), expiração); (None, None) se não é jogador
+        self._links: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def init_app(self, app) -> None:
+        self.ttl = app.config.get('PRINCIPAL_CACHE_TTL', self.ttl)
+        app.extensions['principal_cache'] = self
+
+    def get(self, user_id: int) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[1] > now:
+                self.stats['hits'] += 1
+                return entry[0]
+            if entry:
+                del self._entries[user_id]
+            self.stats['misses'] += 1
+            return None
+
+    def set(self, user: User) -> None:
+        values = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                now = time.time()
+                for key in [k for k, entry in self._entries.items() if entry[1] <= now]:
+                    del self._entries[key]
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[user.id] = (values, time.time() + self.ttl)
+
+    def get_link(self, user_id: int) -> Optional[Tuple[Optional[int], Optional[int]]]:
+        """Vínculo (player_id, trainer_id) do usuário, se ainda válido no cache"""
+        with self._lock:
+            entry = self._links.get(user_id)
+            if entry and entry[1] > time.time():
+                return entry[0]
+            if entry:
+                del self._links[user_id]
+            return None
+
+    def set_link(self, user_id: int, player_id: Optional[int], trainer_id: Optional[int]) -> None:
+        with self._lock:
+            if len(self._links) >= self.max_entries:
+                self._links.clear()
+            self._links[user_id] = ((player_id, trainer_id), time.time() + self.ttl)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._links.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._links.clear()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {**self.stats, 'entries': len(self._entries)}
+
+
+# Cache compartilhado pelo processo (TTL configurado em create_app)
+principal_cache = PrincipalCache()
+
+
+def _current_user_id() -> Optional[int]:
+    identity = get_jwt_identity()
+    return int(identity) if identity is not None else None
+
+
+def _attach_cached_user(values: Dict) -> User:
+    """Anexa à sessão atual um usuário montado a partir do cache (sem query)"""
+    user = User(**values)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+
+def get_current_user() -> Optional[User]:
+    """Usuário autenticado, carregado no máximo uma vez por requisição"""
+    if 'current_user' in g:
+        return g.current_user
+
+    user_id = _current_user_id()
+    user = None
+    if user_id is not None:
+        values = principal_cache.get(user_id)
+        if values is not None:
+            user = _attach_cached_user(values)
+        else:
+            user = db.session.get(User, user_id)
+            if user:
+                principal_cache.set(user)
+
+    g.current_user = user
+    return user
+
+
+def _player_link(user_id: int) -> Tuple[Optional[int], Optional[int]]:
+    """(player_id, trainer_id) atuais do usuário: cache com TTL curto, senão uma query leve"""
+    link = principal_cache.get_link(user_id)
+    if link is None:
+        row = db.session.query(Player.id, Player.trainer_id).filter(Player.user_id == user_id).first()
+        link = (row.id, row.trainer_id) if row else (None, None)
+        principal_cache.set_link(user_id, *link)
+    return link
+
+
+def get_current_principal() -> Optional[Principal]:
+    """
+    Papel do usuário autenticado
+    O papel é lido das claims do token (tokens antigos, sem claims, caem no usuário
+    carregado); os vínculos de jogador nunca vêm do token, que não expira e
+    ficaria desatualizado após uma troca de treinador
+    """
+    if 'current_principal' in g:
+        return g.current_principal
+
+    principal = None
+    user_id = _current_user_id()
+    if user_id is not None:
+        claims = get_jwt()
+        if 'user_type' in claims:
+            user_type = UserType(claims['user_type'])
+        else:
+            user = get_current_user()
+            user_type = user.user_type if user else None
+        if user_type is not None:
+            player_id, trainer_id = _player_link(user_id) if user_type == UserType.PLAYER else (None, None)
+            principal = Principal(user_id, user_type, player_id, trainer_id)
+
+    g.current_principal = principal
+    return principal
+
+
+def get_current_player() -> Optional[Player]:
+    """Perfil de jogador do usuário autenticado (com o usuário na mesma query)"""
+    if 'current_player' in g:
+        return g.current_player
+
+    user_id = _current_user_id()
+    player = Player.query.options(joinedload(Player.user)).filter(Player.user_id == user_id).first()
+    principal_cache.set_link(user_id, player.id if player else None, player.trainer_id if player else None)
+
+    if player and 'current_user' not in g:
+        g.current_user = player.user
+        principal_cache.set(player.user)
+
+    g.current_player = player
+    return player
+
+
+@event.listens_for(Player, 'after_update')
+@event.listens_for(Player, 'after_delete')
+def _invalidate_player_link(mapper, connection, target) -> None:
+    # Troca de treinador ou remoção do jogador: o vínculo em cache deixa de valer
+    # neste processo; nos outros workers ele expira em PRINCIPAL_CACHE_TTL segundos
+    principal_cache.invalidate(target.user_id)
+
+
+def invalidate_principal(user_id: int) -> None:
+    """Descarta o usuário do cache (após alterações de perfil ou senha)"""
+    principal_cache.invalidate(user_id)
+    if has_request_context():
+        g.pop('current_user', None)
+        g.pop('current_principal', None)
+        g.pop('current_player', None)
@@ -0,0 +1,184 @@
+import math
+import threading
+import time
+from flask import jsonify
+from typing import Dict, Optional, Tuple
+
+
+def parse_rate(rate: str) -> Tuple[int, float]:
+    """Converte "5/60" (5 tentativas a cada 60 segundos) em (capacidade, tokens por segundo)"""
+    capacity, period = rate.split('/', 1)
+    capacity, period = int(capacity), float(period)
+    if capacity <= 0 or period <= 0:
+        raise ValueError(f'Limite inválido: {rate}')
+    return capacity, capacity / period
+
+
+class MemoryBackend:
+    """Baldes de tokens em memória (válidos apenas para este worker)"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        # chave -> (tokens, última atualização, segundos até o balde encher de novo)
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, capacity: int, refill_rate: float, cost: float = 1,
+                charge: bool = True) -> Tuple[bool, float]:
+        """
+        Retira `cost` tokens do balde; retorna (permitido, segundos até haver tokens)
+        Com charge=False só verifica se há tokens, sem retirá-los
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (capacity, now, 0))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+
+            if tokens >= cost:
+                if charge:
+                    tokens -= cost
+                allowed, retry_after = True, 0.0
+            else:
+                allowed, retry_after = False, (cost - tokens) / refill_rate
+            self._buckets[key] = (tokens, now, (capacity - tokens) / refill_rate)
+
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+
+        return allowed, retry_after
+
+    def _prune(self, now: float) -> None:
+        """Descarta baldes que já estariam cheios de novo (equivalem a um balde novo)"""
+        for key in [k for k, (_, updated, refill) in self._buckets.items() if now - updated >= refill]:
+            del self._buckets[key]
+
+
+class RedisBackend:
+    """
+    Baldes de tokens no Redis, compartilhados entre workers
+    A leitura e a atualização do balde acontecem atomicamente em um script Lua
+    """
+
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local now = tonumber(ARGV[4])
+    local charge = tonumber(ARGV[5])
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    local allowed = 0
+    if tokens >= cost then
+        if charge == 1 then
+            tokens = tokens - cost
+        end
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+    redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url: str, prefix: str = 'playball:ratelimit:'):
+        import redis  # Dependência opcional, só necessária com RATE_LIMIT_URL
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._script = self.client.register_script(self.SCRIPT)
+
+    def consume(self, key: str, capacity: int, refill_rate: float, cost: float = 1,
+                charge: bool = True) -> Tuple[bool, float]:
+        allowed, tokens = self._script(keys=[self.prefix + key],
+                                       args=[capacity, refill_rate, cost, time.time(), int(charge)])
+        if allowed:
+            return True, 0.0
+        return False, (cost - float(tokens)) / refill_rate
+
+
+class RateLimiter:
+    """
+    Limitador de tentativas por token bucket
+    Cada regra tem capacidade e taxa de reposição próprias; as chaves
+    (conta, IP) identificam os baldes dentro da regra
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or MemoryBackend()
+        self.enabled = True
+        self._rules: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self.backend_errors = 0
+
+    def init_app(self, app) -> None:
+        """Configura regras e backend a partir da configuração da aplicação"""
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+        for name, rate in app.config.get('RATE_LIMITS', {}).items():
+            self.add_rule(name, rate)
+        url = app.config.get('RATE_LIMIT_URL')
+        if url:
+            self.backend = RedisBackend(url)
+        app.extensions['rate_limiter'] = self
+
+    def add_rule(self, name: str, rate: str) -> None:
+        self._rules[name] = parse_rate(rate)
+        with self._lock:
+            self.stats.setdefault(name, {'allowed': 0, 'shed': 0})
+
+    def hit(self, rule: str, key: str, charge: bool = True) -> Tuple[bool, float]:
+        """
+        Registra uma tentativa na regra; retorna (permitido, retry_after em segundos)
+        Com charge=False só verifica se o balde ainda permite tentativas, sem consumir
+        Se o backend compartilhado falhar, a tentativa é permitida (fail-open)
+        """
+        if not self.enabled or rule not in self._rules:
+            return True, 0.0
+
+        capacity, refill_rate = self._rules[rule]
+        try:
+            allowed, retry_after = self.backend.consume(f'{rule}:{key}', capacity, refill_rate, charge=charge)
+        except Exception:
+            with self._lock:
+                self.backend_errors += 1
+            return True, 0.0
+
+        if charge or not allowed:
+            with self._lock:
+                self.stats[rule]['allowed' if allowed else 'shed'] += 1
+        return allowed, retry_after
+
+    def check(self, *hits: Tuple[str, str], charge: bool = True) -> Optional[float]:
+        """
+        Verifica várias regras em sequência, parando na primeira que negar
+        Retorna None se permitido ou os segundos até a próxima tentativa
+        """
+        for rule, key in hits:
+            allowed, retry_after = self.hit(rule, key, charge=charge)
+            if not allowed:
+                return retry_after
+        return None
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'rules': {name: dict(counts) for name, counts in self.stats.items()},
+                'backend': type(self.backend).__name__,
+                'backend_errors': self.backend_errors
+            }
+
+
+def rate_limited_response(retry_after: float):
+    """Resposta 429 com o cabeçalho Retry-After"""
+    seconds = max(1, math.ceil(retry_after))
+    response = jsonify({
+        'error': f'Muitas tentativas. Tente novamente em {seconds} segundos',
+        'retry_after': seconds
+    })
+    response.headers['Retry-After'] = str(seconds)
+    return response, 429
+
+
+# Limitador compartilhado pelo processo (inicializado em create_app)
+limiter = RateLimiter()
@@ -0,0 +1,187 @@
+import json
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import Date, DateTime, Enum, Time, inspect
+from sqlalchemy.orm import load_only, noload, selectinload
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import orjson  # Dependência opcional; sem ela o módulo json da biblioteca padrão é usado
+except ImportError:
+    orjson = None
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def _enum_value(value):
+    return value.value if value is not None else None
+
+
+def _column_converter(column) -> Optional[Callable]:
+    """Conversão do valor da coluna para JSON, decidida uma vez pelo tipo da coluna"""
+    if isinstance(column.type, (DateTime, Date, Time)):
+        return _isoformat
+    if isinstance(column.type, Enum) and column.type.enum_class is not None:
+        return _enum_value
+    return None
+
+
+class ModelSerializer:
+    """
+    Plano de serialização de um modelo, compilado uma única vez
+    As colunas, os nomes dos atributos e as conversões (datas, enums) são
+    resolvidos na compilação; serializar uma linha é só percorrer o plano
+    """
+
+    def __init__(self, model, include: Optional[Iterable[str]] = None, exclude: Iterable[str] = (),
+                 nested: Optional[Dict[str, Tuple[str, 'ModelSerializer']]] = None):
+        self.model = model
+        self.include = tuple(include) if include is not None else None
+        self.exclude = set(exclude)
+        # chave no JSON -> (relacionamento, serializador do modelo relacionado)
+        self.nested = nested or {}
+        self._plan: Optional[List[Tuple[str, str, Optional[Callable]]]] = None
+
+    def _compile(self) -> List[Tuple[str, str, Optional[Callable]]]:
+        mapper = inspect(self.model)
+        attributes = {attr.key: attr for attr in mapper.column_attrs}
+        names = self.include if self.include is not None else list(attributes)
+        plan = []
+        for name in names:
+            if name in self.exclude:
+                continue
+            column = attributes[name].columns[0]
+            plan.append((name, name, _column_converter(column)))
+        return plan
+
+    @property
+    def plan(self) -> List[Tuple[str, str, Optional[Callable]]]:
+        # Compilado no primeiro uso, quando os mapeamentos já estão configurados
+        if self._plan is None:
+            self._plan = self._compile()
+        return self._plan
+
+    def dump(self, obj, fields=None) -> Dict[str, Any]:
+        """Serializa um objeto (apenas os campos pedidos, se `fields` for informado)"""
+        data = {}
+        # Valores já carregados são lidos direto do __dict__ da instância, sem passar
+        # pelos descritores do SQLAlchemy; atributos expirados ou adiados usam getattr
+        loaded = obj.__dict__
+        for key, attribute, convert in self.plan:
+            if fields is not None and key not in fields:
+                continue
+            value = loaded[attribute] if attribute in loaded else getattr(obj, attribute)
+            data[key] = convert(value) if convert is not None else value
+
+        for key, (relationship, serializer) in self.nested.items():
+            if fields is not None and key not in fields:
+                continue
+            related = loaded[relationship] if relationship in loaded else getattr(obj, relationship)
+            subfields = fields.get(key) if fields is not None else None
+            if related is None:
+                data[key] = None
+            elif isinstance(related, (list, tuple)):
+                data[key] = serializer.dump_many(related, subfields)
+            else:
+                data[key] = serializer.dump(related, subfields)
+        return data
+
+    def dump_many(self, objs: Iterable, fields=None) -> List[Dict[str, Any]]:
+        dump = self.dump
+        return [dump(obj, fields) for obj in objs]
+
+    def load_options(self, fields=None, always_load: Iterable[str] = ()) -> List:
+        """
+        Opções de carregamento da query para serializar apenas `fields`
+        Só as colunas pedidas (e as de `always_load`, ex.: as do cursor da paginação)
+        são lidas; relacionamentos aninhados pedidos vêm em uma query extra
+        (selectinload) e os não pedidos nem são carregados
+        """
+        options = []
+        if fields is not None:
+            names = [attribute for key, attribute, _ in self.plan if key in fields]
+            names.extend(always_load)
+            primary_key = [column.key for column in inspect(self.model).primary_key]
+            options.append(load_only(*(getattr(self.model, name) for name in dict.fromkeys(primary_key + names))))
+
+        for key, (relationship, serializer) in self.nested.items():
+            attribute = getattr(self.model, relationship)
+            if fields is None or key in fields:
+                subfields = fields.get(key) if fields is not None else None
+                options.append(selectinload(attribute).options(*serializer.load_options(subfields)))
+            else:
+                options.append(noload(attribute))
+        return options
+
+
+_serializers: Dict[type, ModelSerializer] = {}
+
+
+def get_serializer(model) -> ModelSerializer:
+    """
+    Serializador padrão do modelo (cacheado por classe)
+    Colunas ocultas, a lista explícita de colunas e os relacionamentos aninhados
+    ({chave: (relacionamento, modelo)}) vêm dos atributos __serialize_exclude__,
+    __serialize_columns__ e __serialize_nested__ do modelo
+    """
+    serializer = _serializers.get(model)
+    if serializer is None:
+        nested = {
+            key: (relationship, get_serializer(related_model))
+            for key, (relationship, related_model) in getattr(model, '__serialize_nested__', {}).items()
+        }
+        serializer = _serializers.setdefault(model, ModelSerializer(
+            model,
+            include=getattr(model, '__serialize_columns__', None),
+            exclude=getattr(model, '__serialize_exclude__', ()),
+            nested=nested
+        ))
+    return serializer
+
+
+def load_options_for(model, fields=None, always_load: Iterable[str] = ()) -> List:
+    """Opções de carregamento para serializar `fields` de `model` (ver ModelSerializer.load_options)"""
+    return get_serializer(model).load_options(fields, always_load)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Provedor JSON da aplicação usando orjson quando instalado
+    Mantém o comportamento do provedor padrão (chaves ordenadas, datas no formato
+    HTTP, Decimal, UUID); valores que o orjson não aceita caem no json padrão
+    """
+
+    def _orjson_options(self, indent: bool = False) -> int:
+        # Datas passam pelo default() para manter o formato do provedor padrão
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _dumps_bytes(self, obj: Any, indent: bool = False) -> bytes:
+        if orjson is not None:
+            try:
+                return orjson.dumps(obj, default=self.default, option=self._orjson_options(indent))
+            except TypeError:
+                pass  # Ex.: inteiros acima de 64 bits
+        kwargs = {'indent': 2, 'separators': (', ', ': ')} if indent else {'separators': (',', ':')}
+        return json.dumps(obj, default=self.default, ensure_ascii=self.ensure_ascii,
+                          sort_keys=self.sort_keys, **kwargs).encode('utf-8')
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(self._dumps_bytes(obj, indent) + b'\n', mimetype=self.mimetype)
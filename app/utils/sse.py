@@ -0,0 +1,55 @@
+import json
+from flask import Response, request, stream_with_context
+from typing import Any, Callable, Iterator, Optional
+
+
+def format_sse(data: Any, event: Optional[str] = None, event_id: Optional[str] = None) -> str:
+    """Formata uma mensagem no protocolo Server-Sent Events"""
+    payload = data if isinstance(data, str) else json.dumps(data, ensure_ascii=False)
+
+    message = ''
+    if event_id is not None:
+        message += f'id: {event_id}\n'
+    if event:
+        message += f'event: {event}\n'
+    for line in payload.splitlines() or ['']:
+        message += f'data: {line}\n'
+    return message + '\n'
+
+
+def format_sse_comment(comment: str = 'keep-alive') -> str:
+    """Comentário SSE, usado como heartbeat para manter a conexão aberta"""
+    return f': {comment}\n\n'
+
+
+def sse_response(generator) -> Response:
+    """Resposta HTTP de stream SSE (mantém o contexto da requisição no gerador)"""
+    return Response(stream_with_context(generator), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+def is_stream_requested(data: Optional[dict] = None) -> bool:
+    """Verifica se o cliente pediu resposta em stream (?stream=1 ou "stream": true)"""
+    if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return bool(data and data.get('stream') is True)
+
+
+def relay_ai_stream(chunks: Iterator[str], on_complete: Optional[Callable[[str], dict]] = None) -> Iterator[str]:
+    """
+    Repassa os trechos gerados pela AI como eventos SSE
+    Ao final chama on_complete(texto_completo) e envia o retorno no evento "done"
+    """
+    parts = []
+    try:
+        for chunk in chunks:
+            parts.append(chunk)
+            yield format_sse({'content': chunk}, event='chunk')
+
+        full_text = ''.join(parts)
+        extra = on_complete(full_text) if on_complete else None
+        yield format_sse({'content': full_text, **(extra or {})}, event='done')
+    except Exception as e:
+        yield format_sse({'error': f'Erro na geração: {str(e)}'}, event='error')
@@ -0,0 +1,19 @@
+import re
+from typing import Tuple
+
+
+def is_valid_email(email):
+    """Valida formato do email"""
+    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+    return re.match(pattern, email) is not None
+
+
+def is_strong_password(password) -> Tuple[bool, str]:
+    """Valida se a senha é forte o suficiente"""
+    if len(password) < 6:
+        return False, "Senha deve ter pelo menos 6 caracteres"
+    if not re.search(r'[A-Za-z]', password):
+        return False, "Senha deve conter pelo menos uma letra"
+    if not re.search(r'\d', password):
+        return False, "Senha deve conter pelo menos um número"
+    return True, "Senha válida"
@@ -0,0 +1,106 @@
+"""
+Benchmark de queries do /api/chat/conversations
+
+Mede quantas queries o resumo de conversas executa para elencos de
+10 a 5.000 jogadores. O número deve permanecer constante.
+
+Uso:
+    python -m benchmarks.bench_conversations
+"""
+import os
+import time
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+
+from sqlalchemy import event
+from app import create_app, db
+from app.models import User, Player, UserType, ChatMessage
+from app.services.conversation_service import get_conversation_summaries
+
+ROSTER_SIZES = [10, 100, 1000, 5000]
+MESSAGES_PER_PLAYER = 3
+
+
+class QueryCounter:
+    """Conta as queries executadas pela engine enquanto ativo"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+def seed_roster(size):
+    """Cria um treinador com `size` jogadores e algumas mensagens por conversa"""
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+
+    trainer = User(
+        username='bench_trainer', email='trainer@bench.local',
+        user_type=UserType.TRAINER, first_name='Bench', last_name='Trainer',
+        password_hash='-'
+    )
+    db.session.add(trainer)
+    db.session.flush()
+
+    users = [User(
+        username=f'bench_player_{i}', email=f'player{i}@bench.local',
+        user_type=UserType.PLAYER, first_name='Player', last_name=str(i),
+        password_hash='-'
+    ) for i in range(size)]
+    db.session.add_all(users)
+    db.session.flush()
+
+    db.session.add_all([Player(user_id=u.id, trainer_id=trainer.id) for u in users])
+
+    messages = []
+    for u in users:
+        for n in range(MESSAGES_PER_PLAYER):
+            sender, receiver = (u.id, trainer.id) if n % 2 == 0 else (trainer.id, u.id)
+            messages.append(ChatMessage(sender_id=sender, receiver_id=receiver, message=f'msg {n}'))
+    db.session.add_all(messages)
+    db.session.commit()
+
+    return trainer.id
+
+
+def main():
+    app = create_app()
+
+    print("📊 Benchmark: resumo de conversas")
+    print(f"{'jogadores':>10} {'queries':>8} {'tempo (ms)':>11}")
+
+    query_counts = []
+    with app.app_context():
+        for size in ROSTER_SIZES:
+            trainer_id = seed_roster(size)
+            db.session.expunge_all()
+            trainer = db.session.get(User, trainer_id)
+
+            with QueryCounter(db.engine) as counter:
+                start = time.perf_counter()
+                conversations = get_conversation_summaries(trainer)
+                elapsed = (time.perf_counter() - start) * 1000
+
+            assert len(conversations) == size
+            query_counts.append(counter.count)
+            print(f"{size:>10} {counter.count:>8} {elapsed:>11.1f}")
+
+    if len(set(query_counts)) == 1:
+        print(f"\n✅ Número de queries constante ({query_counts[0]})")
+    else:
+        print(f"\n❌ Número de queries variou: {query_counts}")
+
+
+if __name__ == '__main__':
+    main()
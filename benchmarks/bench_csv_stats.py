@@ -0,0 +1,125 @@
+"""
+Benchmark das estatísticas de CSV de jogadores
+
+Gera dois arquivos sintéticos, um largo (200 colunas) e um longo (1.000.000
+de linhas), e compara a agregação coluna a coluna (mean/max/min/std em passadas
+separadas por coluna e tendência em Python) com a agregação vetorizada de
+app.utils.file_utils (um bloco inteiro por vez, como matriz). Mede também o
+mapeamento de colunas (laço aninhado sobre os apelidos contra o índice
+pré-compilado) e o process_player_csv completo, com a leitura do arquivo.
+
+Uso:
+    python -m benchmarks.bench_csv_stats
+    BENCH_WIDE_COLUMNS=500 BENCH_LONG_ROWS=200000 python -m benchmarks.bench_csv_stats
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.utils.file_utils import (
+    BASEBALL_FIELDS, CSV_CHUNK_ROWS, StatsAccumulator, map_baseball_fields, process_player_csv
+)
+
+WIDE_COLUMNS = int(os.environ.get('BENCH_WIDE_COLUMNS', 200))
+WIDE_ROWS = int(os.environ.get('BENCH_WIDE_ROWS', 20000))
+LONG_ROWS = int(os.environ.get('BENCH_LONG_ROWS', 1000000))
+MAPPING_ROUNDS = int(os.environ.get('BENCH_MAPPING_ROUNDS', 200))
+
+
+def build_frame(rows, columns, seed=42):
+    """Colunas de baseball conhecidas, colunas numéricas extras com lacunas e uma coluna de texto"""
+    rng = np.random.default_rng(seed)
+    data = {
+        'Date': pd.date_range('2000-01-01', periods=rows, freq='h').strftime('%Y-%m-%d'),
+        'Opponent': rng.choice(['NYY', 'BOS', 'LAD', 'SFG'], rows),
+        'AVG': rng.normal(0.270, 0.030, rows).round(3),
+        'HR': rng.poisson(0.2, rows),
+        'ERA': rng.normal(3.8, 0.9, rows).round(2),
+        'SO': rng.poisson(1.1, rows),
+    }
+    for i in range(max(0, columns - len(data))):
+        values = rng.normal(50, 15, rows).round(2)
+        values[rng.random(rows) < 0.05] = np.nan
+        data[f'metric_{i}'] = values
+    return pd.DataFrame(data)
+
+
+def legacy_aggregate(chunks):
+    """Agregação coluna a coluna: uma passada por estatística e por coluna, tendência em Python"""
+    stats = {}
+    for chunk in chunks:
+        for col in chunk.select_dtypes(include=['number']).columns:
+            values = chunk[col].dropna()
+            if not len(values):
+                continue
+            entry = stats.setdefault(col, {'parts': [], 'max': None, 'min': None})
+            entry['parts'].append((len(values), float(values.mean()), float(values.var(ddof=0)) * len(values)))
+            entry['max'] = max(float(values.max()), entry['max'] if entry['max'] is not None else float('-inf'))
+            entry['min'] = min(float(values.min()), entry['min'] if entry['min'] is not None else float('inf'))
+            entry.setdefault('first', float(values.iloc[0]))
+            entry['last'] = float(values.iloc[-1])
+            diffs = [b - a for a, b in zip(values.tolist(), values.tolist()[1:])]
+            entry.setdefault('diffs', []).extend(diffs)
+    return stats
+
+
+def legacy_map_fields(columns):
+    """Mapeamento original: normaliza os apelidos de cada campo a cada chamada"""
+    mapped_fields = {}
+    for standard_name, possible_names in BASEBALL_FIELDS.items():
+        normalized_names = [name.replace('_', '').replace(' ', '') for name in possible_names]
+        for col in columns:
+            if col.lower().replace('_', '').replace(' ', '') in normalized_names:
+                mapped_fields[standard_name] = col
+                break
+    return mapped_fields
+
+
+def vectorized_aggregate(chunks):
+    accumulator = StatsAccumulator(chunks[0].columns.tolist())
+    for chunk in chunks:
+        accumulator.update(chunk)
+    return accumulator.summary()
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def run_case(label, frame, directory):
+    path = os.path.join(directory, f'{label}.csv')
+    frame.to_csv(path, index=False)
+    size_mb = os.path.getsize(path) / 1024 / 1024
+    chunks = list(pd.read_csv(path, chunksize=CSV_CHUNK_ROWS))
+    columns = chunks[0].columns.tolist()
+
+    legacy_time, _ = timed(legacy_aggregate, chunks)
+    vector_time, _ = timed(vectorized_aggregate, chunks)
+    legacy_map_time, _ = timed(lambda: [legacy_map_fields(columns) for _ in range(MAPPING_ROUNDS)])
+    index_map_time, _ = timed(lambda: [map_baseball_fields(columns) for _ in range(MAPPING_ROUNDS)])
+    with open(path, 'rb') as csv_file:
+        full_time, _ = timed(process_player_csv, csv_file)
+
+    print(f"\n{label}: {len(frame):,} linhas x {len(columns)} colunas ({size_mb:.0f} MB)")
+    print(f"{'etapa':<38} {'ms':>10}")
+    print(f"{'agregação coluna a coluna':<38} {legacy_time * 1000:>10.1f}")
+    print(f"{'agregação vetorizada':<38} {vector_time * 1000:>10.1f}")
+    print(f"{f'mapeamento laço aninhado (x{MAPPING_ROUNDS})':<38} {legacy_map_time * 1000:>10.1f}")
+    print(f"{f'mapeamento por índice (x{MAPPING_ROUNDS})':<38} {index_map_time * 1000:>10.1f}")
+    print(f"{'process_player_csv (com leitura)':<38} {full_time * 1000:>10.1f}")
+
+
+def main():
+    print("📊 Benchmark: estatísticas de CSV de jogadores")
+    with tempfile.TemporaryDirectory() as directory:
+        run_case('largo', build_frame(WIDE_ROWS, WIDE_COLUMNS), directory)
+        run_case('longo', build_frame(LONG_ROWS, 10), directory)
+
+
+if __name__ == '__main__':
+    main()
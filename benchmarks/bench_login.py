@@ -0,0 +1,89 @@
+"""
+Benchmark de throughput do /api/auth/login
+
+Mede logins por segundo em um único worker para cada esquema de hash
+de senha e confere a atualização automática do hash no primeiro login
+após uma mudança de PASSWORD_HASH_METHOD.
+
+Uso:
+    python -m benchmarks.bench_login
+    BENCH_LOGINS=50 python -m benchmarks.bench_login
+"""
+import os
+import time
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+# O benchmark repete o login da mesma conta; o limite de tentativas o bloquearia
+os.environ.setdefault('RATE_LIMIT_ENABLED', 'false')
+
+from app import create_app, db
+from app.models import User, UserType
+
+HASH_METHODS = [
+    'pbkdf2:sha256:600000',
+    'pbkdf2:sha256:260000',
+    'pbkdf2:sha256:100000',
+    'scrypt:32768:8:1',
+    'scrypt:16384:8:1',
+]
+LOGINS = int(os.environ.get('BENCH_LOGINS', 20))
+PASSWORD = 'bench123'
+
+
+def seed_trainer():
+    """Recria o banco com um único treinador"""
+    db.drop_all()
+    db.create_all()
+
+    trainer = User(
+        username='bench_trainer', email='trainer@bench.local',
+        user_type=UserType.TRAINER, first_name='Bench', last_name='Trainer'
+    )
+    trainer.set_password(PASSWORD)
+    db.session.add(trainer)
+    db.session.commit()
+    db.session.remove()
+
+
+def login(client):
+    response = client.post('/api/auth/login', json={
+        'username': 'bench_trainer', 'password': PASSWORD, 'user_type': 'trainer'
+    })
+    assert response.status_code == 200, response.get_json()
+
+
+def stored_method(app):
+    """Método do hash gravado no banco para o treinador"""
+    with app.app_context():
+        password_hash = User.query.filter_by(username='bench_trainer').first().password_hash
+    return password_hash.split('$', 1)[0]
+
+
+def main():
+    app = create_app()
+    client = app.test_client()
+
+    print("📊 Benchmark: login por esquema de hash")
+    print(f"{'método':<24} {'logins/s':>9} {'ms/login':>9} {'rehash':>7}")
+
+    app.config['PASSWORD_HASH_METHOD'] = HASH_METHODS[0]
+    with app.app_context():
+        seed_trainer()
+
+    for method in HASH_METHODS:
+        # O primeiro login com o novo método atualiza o hash armazenado
+        app.config['PASSWORD_HASH_METHOD'] = method
+        login(client)
+        rehashed = stored_method(app) == method
+
+        start = time.perf_counter()
+        for _ in range(LOGINS):
+            login(client)
+        elapsed = time.perf_counter() - start
+
+        print(f"{method:<24} {LOGINS / elapsed:>9.1f} {elapsed / LOGINS * 1000:>9.1f} "
+              f"{'✅' if rehashed else '❌':>7}")
+
+
+if __name__ == '__main__':
+    main()
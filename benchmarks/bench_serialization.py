@@ -0,0 +1,150 @@
+"""
+Benchmark de serialização de treinos
+
+Compara o custo de transformar 10.000 treinos (com exercícios) em JSON:
+dicionários montados à mão, como nos to_dict() antigos, + json padrão contra
+Training.to_dict() (plano compilado de app.utils.serialization) + o provedor
+JSON da aplicação (orjson, se instalado).
+
+Uso:
+    python -m benchmarks.bench_serialization
+    BENCH_TRAININGS=2000 BENCH_EXERCISES=3 python -m benchmarks.bench_serialization
+"""
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+
+from sqlalchemy import insert
+from sqlalchemy.orm import selectinload
+from app import create_app, db
+from app.models import User, Player, UserType, Training, Exercise
+from app.utils.serialization import get_serializer, orjson
+
+TRAININGS = int(os.environ.get('BENCH_TRAININGS', 10000))
+EXERCISES_PER_TRAINING = int(os.environ.get('BENCH_EXERCISES', 5))
+ROUNDS = int(os.environ.get('BENCH_ROUNDS', 3))
+
+
+def seed():
+    """Cria um treinador, um jogador e os treinos com exercícios"""
+    db.drop_all()
+    db.create_all()
+
+    trainer = User(
+        username='bench_trainer', email='trainer@bench.local',
+        user_type=UserType.TRAINER, first_name='Bench', last_name='Trainer',
+        password_hash='-'
+    )
+    player_user = User(
+        username='bench_player', email='player@bench.local',
+        user_type=UserType.PLAYER, first_name='Bench', last_name='Player',
+        password_hash='-'
+    )
+    db.session.add_all([trainer, player_user])
+    db.session.flush()
+    player = Player(user_id=player_user.id, trainer_id=trainer.id)
+    db.session.add(player)
+    db.session.flush()
+
+    start = datetime(2024, 1, 1, 8, 0)
+    training_ids = db.session.execute(insert(Training).returning(Training.id), [
+        {
+            'title': f'Treino {i}',
+            'description': 'Rebatidas, arremessos e condicionamento',
+            'trainer_id': trainer.id,
+            'player_id': player.id,
+            'scheduled_date': start + timedelta(hours=i),
+            'duration_minutes': 60
+        }
+        for i in range(TRAININGS)
+    ]).scalars().all()
+
+    db.session.execute(insert(Exercise), [
+        {
+            'training_id': training_id,
+            'name': f'Exercício {j}',
+            'description': 'Séries com descanso entre elas',
+            'category': 'batting',
+            'sets': 3,
+            'reps': 12,
+            'duration_minutes': 10,
+            'rest_seconds': 60,
+            'order_index': j
+        }
+        for training_id in training_ids
+        for j in range(EXERCISES_PER_TRAINING)
+    ])
+    db.session.commit()
+    db.session.remove()
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def legacy_exercise_dict(exercise):
+    return {
+        'id': exercise.id, 'training_id': exercise.training_id, 'name': exercise.name,
+        'description': exercise.description, 'category': exercise.category,
+        'sets': exercise.sets, 'reps': exercise.reps, 'duration_minutes': exercise.duration_minutes,
+        'rest_seconds': exercise.rest_seconds, 'order_index': exercise.order_index,
+        'is_completed': exercise.is_completed, 'notes': exercise.notes
+    }
+
+
+def legacy_training_dict(training):
+    """to_dict() escrito à mão: um getattr por coluna, datas convertidas uma a uma"""
+    return {
+        'id': training.id, 'title': training.title, 'description': training.description,
+        'trainer_id': training.trainer_id, 'player_id': training.player_id,
+        'created_at': _isoformat(training.created_at),
+        'scheduled_date': _isoformat(training.scheduled_date),
+        'duration_minutes': training.duration_minutes, 'is_completed': training.is_completed,
+        'completion_date': _isoformat(training.completion_date),
+        'exercises': [legacy_exercise_dict(exercise) for exercise in training.exercises]
+    }
+
+
+def best_of(func):
+    """Menor tempo entre ROUNDS execuções (em segundos) e o último resultado"""
+    best, result = float('inf'), None
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    app = create_app()
+
+    with app.app_context():
+        seed()
+        trainings = Training.query.options(selectinload(Training.exercises)).all()
+
+        serializer = get_serializer(Training)
+
+        # Mesmas opções do provedor padrão do Flask (chaves ordenadas)
+        dicts_time, hand_dicts = best_of(lambda: [legacy_training_dict(training) for training in trainings])
+        stdlib_time, stdlib_payload = best_of(lambda: json.dumps(hand_dicts, sort_keys=True))
+        plan_time, plan_dicts = best_of(lambda: serializer.dump_many(trainings))
+        fast_time, fast_payload = best_of(lambda: app.json.dumps(plan_dicts))
+        assert plan_dicts == hand_dicts
+
+    print(f"📊 Benchmark: {TRAININGS} treinos x {EXERCISES_PER_TRAINING} exercícios "
+          f"(encoder: {'orjson' if orjson else 'json padrão'})")
+    print(f"{'etapa':<32} {'ms':>9}")
+    print(f"{'dicionários à mão':<32} {dicts_time * 1000:>9.1f}")
+    print(f"{'json.dumps':<32} {stdlib_time * 1000:>9.1f}")
+    print(f"{'to_dict() (plano compilado)':<32} {plan_time * 1000:>9.1f}")
+    print(f"{'provedor da aplicação':<32} {fast_time * 1000:>9.1f}")
+    print(f"{'total manual':<32} {(dicts_time + stdlib_time) * 1000:>9.1f}")
+    print(f"{'total compilado':<32} {(plan_time + fast_time) * 1000:>9.1f}")
+    print(f"payload: {len(stdlib_payload) / 1024:.0f} KiB (manual) / {len(fast_payload.encode('utf-8')) / 1024:.0f} KiB (compilado)")
+
+
+if __name__ == '__main__':
+    main()
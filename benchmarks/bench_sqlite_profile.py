@@ -0,0 +1,150 @@
+"""
+Benchmark de carga mista (leitura/escrita) no SQLite
+
+Simula vários workers do Gunicorn (processos, cada um com algumas threads)
+sobre o mesmo arquivo SQLite: a maior parte das requisições lê o perfil do
+treinador com o elenco e o restante atualiza o perfil. Compara o SQLite com
+as configurações padrão (DB_PROFILE_ENABLED=false) com o perfil de produção
+de app/db_profile.py (WAL, pragmas, busy timeout e, com DB_READ_ONLY_GET=true,
+pool somente leitura para as GETs).
+
+Uso:
+    python -m benchmarks.bench_sqlite_profile
+    BENCH_WORKERS=8 BENCH_SECONDS=10 BENCH_WRITE_RATIO=0.3 python -m benchmarks.bench_sqlite_profile
+    TMPDIR=/var/tmp python -m benchmarks.bench_sqlite_profile   # banco em disco, não em tmpfs
+    DB_READ_ONLY_GET=true python -m benchmarks.bench_sqlite_profile   # com o pool somente leitura
+"""
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+
+WORKERS = int(os.environ.get('BENCH_WORKERS', 4))
+THREADS = int(os.environ.get('BENCH_THREADS', 2))
+SECONDS = float(os.environ.get('BENCH_SECONDS', 5))
+WRITE_RATIO = float(os.environ.get('BENCH_WRITE_RATIO', 0.2))
+ROSTER_SIZE = int(os.environ.get('BENCH_ROSTER', 200))
+TRAINERS = 20
+
+
+def seed(database_url, profile_enabled):
+    """Cria os treinadores (cada um com um elenco) e retorna um token por treinador"""
+    # O modo WAL fica gravado no arquivo, então o banco já nasce com o perfil testado
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['DB_PROFILE_ENABLED'] = 'true' if profile_enabled else 'false'
+    from flask_jwt_extended import create_access_token
+    from app import create_app, db
+    from app.models import User, Player, UserType
+    from app.utils.principal import principal_claims
+
+    app = create_app()
+    with app.app_context():
+        trainers = [User(
+            username=f'bench_trainer_{t}', email=f'trainer{t}@bench.local',
+            user_type=UserType.TRAINER, first_name='Bench', last_name=str(t), password_hash='-'
+        ) for t in range(TRAINERS)]
+        db.session.add_all(trainers)
+        db.session.flush()
+
+        for trainer in trainers:
+            users = [User(
+                username=f'bench_player_{trainer.id}_{i}', email=f'player{trainer.id}_{i}@bench.local',
+                user_type=UserType.PLAYER, first_name='Player', last_name=str(i), password_hash='-'
+            ) for i in range(ROSTER_SIZE)]
+            db.session.add_all(users)
+            db.session.flush()
+            db.session.add_all([Player(user_id=user.id, trainer_id=trainer.id) for user in users])
+        db.session.commit()
+
+        tokens = [create_access_token(identity=str(trainer.id), additional_claims=principal_claims(trainer))
+                  for trainer in trainers]
+        db.session.remove()
+        db.engine.dispose()
+    return tokens
+
+
+def worker(database_url, profile_enabled, tokens, results):
+    """Um worker: cria a aplicação e dispara requisições com THREADS threads até o tempo acabar"""
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['DB_PROFILE_ENABLED'] = 'true' if profile_enabled else 'false'
+    os.environ['RATE_LIMIT_ENABLED'] = 'false'
+    from app import create_app
+
+    app = create_app()
+    counts = {'reads': 0, 'writes': 0, 'locked': 0, 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + SECONDS
+
+    def run(seed_value):
+        rng = random.Random(seed_value)
+        client = app.test_client()
+        while time.monotonic() < deadline:
+            headers = {'Authorization': f'Bearer {rng.choice(tokens)}'}
+            writing = rng.random() < WRITE_RATIO
+            if writing:
+                response = client.put('/api/auth/profile', headers=headers,
+                                      json={'first_name': f'Bench {rng.randint(0, 9999)}'})
+            else:
+                response = client.get('/api/auth/profile?per_page=50', headers=headers)
+
+            # Leitura só conta se o elenco veio inteiro na página
+            ok = response.status_code == 200 and (
+                writing or len(response.get_json().get('my_players', [])) == min(50, ROSTER_SIZE)
+            )
+            with lock:
+                if ok:
+                    counts['writes' if writing else 'reads'] += 1
+                elif 'locked' in (response.get_json() or {}).get('error', ''):
+                    counts['locked'] += 1
+                else:
+                    counts['errors'] += 1
+
+    threads = [threading.Thread(target=run, args=(os.getpid() * 100 + i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put(counts)
+
+
+def run_scenario(profile_enabled):
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        tokens = seed(database_url, profile_enabled)
+
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        processes = [context.Process(target=worker, args=(database_url, profile_enabled, tokens, results))
+                     for _ in range(WORKERS)]
+        for process in processes:
+            process.start()
+        totals = {'reads': 0, 'writes': 0, 'locked': 0, 'errors': 0}
+        for _ in processes:
+            for key, value in results.get().items():
+                totals[key] += value
+        for process in processes:
+            process.join()
+    return totals
+
+
+def main():
+    print(f"📊 Benchmark: {WORKERS} workers x {THREADS} threads, {SECONDS:.0f}s, "
+          f"{WRITE_RATIO:.0%} escritas, elenco de {ROSTER_SIZE}")
+    print(f"{'perfil':<10} {'req/s':>8} {'leituras':>9} {'escritas':>9} {'locked':>7} {'outros':>7}")
+    failed = False
+    for label, enabled in (('padrão', False), ('produção', True)):
+        totals = run_scenario(enabled)
+        throughput = (totals['reads'] + totals['writes']) / SECONDS
+        print(f"{label:<10} {throughput:>8.1f} {totals['reads']:>9} {totals['writes']:>9} "
+              f"{totals['locked']:>7} {totals['errors']:>7}")
+        failed = failed or totals['errors'] > 0
+
+    if failed:
+        print("\n❌ Requisições com erro; os números acima não medem o caminho real")
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark da importação de estatísticas por formato de arquivo
+
+Grava a mesma exportação (colunas de baseball, data, texto e muitas métricas
+extras) em CSV, Parquet, Arrow/Feather e XLSX e mede o process_player_file de
+cada uma em um processo separado: tempo e pico de memória acima do processo
+já carregado. Parquet, Arrow e XLSX leem só as colunas mapeadas; o CSV, que
+é o caminho de quem converte a exportação para texto antes, lê todas.
+Formatos sem biblioteca instalada (pyarrow, openpyxl) são pulados.
+
+Uso:
+    python -m benchmarks.bench_stat_formats
+    BENCH_ROWS=500000 BENCH_XLSX_ROWS=50000 python -m benchmarks.bench_stat_formats
+"""
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.utils.file_utils import pa, openpyxl
+
+ROWS = int(os.environ.get('BENCH_ROWS', 200000))
+XLSX_ROWS = int(os.environ.get('BENCH_XLSX_ROWS', 20000))  # escrever XLSX grande é lento
+EXTRA_COLUMNS = int(os.environ.get('BENCH_EXTRA_COLUMNS', 60))
+
+
+def build_frame(rows, seed=7):
+    rng = np.random.default_rng(seed)
+    data = {
+        'Date': pd.date_range('2000-01-01', periods=rows, freq='h').strftime('%Y-%m-%d'),
+        'Opponent': rng.choice(['NYY', 'BOS', 'LAD', 'SFG'], rows),
+        'Notes': rng.choice(['dia', 'noite', 'chuva', 'clássico regional'], rows),
+        'AVG': rng.normal(0.270, 0.030, rows).round(3),
+        'HR': rng.poisson(0.2, rows),
+        'RBI': rng.poisson(0.6, rows),
+        'ERA': rng.normal(3.8, 0.9, rows).round(2),
+        'SO': rng.poisson(1.1, rows),
+    }
+    for i in range(EXTRA_COLUMNS):
+        data[f'tracking_{i}'] = rng.normal(50, 15, rows).round(2)
+    return pd.DataFrame(data)
+
+
+def write(frame, path):
+    if path.endswith('.csv'):
+        frame.to_csv(path, index=False)
+    elif path.endswith('.parquet'):
+        frame.to_parquet(path, index=False)
+    elif path.endswith('.feather'):
+        frame.to_feather(path)
+    elif path.endswith('.xlsx'):
+        frame.to_excel(path, index=False)
+
+
+def peak_rss_mb():
+    """Pico de memória residente do processo (VmHWM; o ru_maxrss herda o pico do processo pai)"""
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(path, results):
+    """Roda em um processo novo: tempo e pico de memória (MB) do processamento"""
+    from app.utils.file_utils import process_player_file
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    with open(path, 'rb') as stat_file:
+        processed_data, _ = process_player_file(stat_file, os.path.basename(path))
+    elapsed = time.perf_counter() - start
+    results.put((elapsed, peak_rss_mb() - baseline, processed_data['row_count']))
+
+
+def run(path):
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=measure, args=(path, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def report(label, frame, extensions, directory):
+    print(f"\n{label}: {len(frame):,} linhas x {len(frame.columns)} colunas")
+    print(f"{'formato':<10} {'MB arquivo':>11} {'ms':>9} {'MB pico':>9}")
+    for ext in extensions:
+        path = os.path.join(directory, f'{label}.{ext}')
+        write(frame, path)
+        elapsed, peak_mb, row_count = run(path)
+        assert row_count == len(frame)
+        print(f"{ext:<10} {os.path.getsize(path) / 1024 / 1024:>11.1f} {elapsed * 1000:>9.0f} {peak_mb:>9.0f}")
+
+
+def main():
+    print("📊 Benchmark: importação de estatísticas por formato "
+          f"(pyarrow: {'sim' if pa else 'não'}, openpyxl: {'sim' if openpyxl else 'não'})")
+    with tempfile.TemporaryDirectory() as directory:
+        report('colunar', build_frame(ROWS), ['csv'] + (['parquet', 'feather'] if pa else []), directory)
+        if openpyxl:
+            report('planilha', build_frame(XLSX_ROWS), ['csv', 'xlsx'], directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+import pytest
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """Cria aplicações sobre um banco SQLite em arquivo temporário"""
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv('RATE_LIMIT_ENABLED', 'false')
+    monkeypatch.setenv('STATS_UPLOAD_FOLDER', str(tmp_path / 'stat_uploads'))
+    monkeypatch.setenv('UPLOAD_FOLDER', str(tmp_path / 'uploads'))
+    from app import create_app, db, db_profile
+
+    apps = []
+
+    def factory():
+        app = create_app()
+        app.config['TESTING'] = True
+        apps.append(app)
+        return app
+
+    yield factory
+
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        db_profile.dispose(app)
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,64 @@
+import pytest
+from app import db
+from app.models import User, UserType
+
+PASSWORD = 'Senha123'
+
+
+@pytest.fixture
+def chat_client(app):
+    with app.app_context():
+        trainer = User(username='treinador', email='t@exemplo.com', user_type=UserType.TRAINER,
+                       first_name='T', last_name='C')
+        trainer.set_password(PASSWORD)
+        db.session.add(trainer)
+        db.session.commit()
+    return app.test_client()
+
+
+def access_token(client):
+    response = client.post('/api/auth/login', json={
+        'username': 'treinador', 'password': PASSWORD, 'user_type': 'trainer'
+    })
+    return response.get_json()['access_token']
+
+
+def stream_token(client, token):
+    response = client.post('/api/chat/stream-token', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 201
+    return response.get_json()['stream_token']
+
+
+def open_stream(client, **kwargs):
+    response = client.get('/api/chat/stream', buffered=False, **kwargs)
+    status = response.status_code
+    first_event = next(response.response) if status == 200 else None
+    response.close()
+    return status, first_event
+
+
+def test_query_string_only_accepted_on_stream(chat_client):
+    token = access_token(chat_client)
+    assert chat_client.get(f'/api/auth/validate-token?jwt={token}').status_code == 401
+    assert chat_client.get('/api/auth/validate-token',
+                           headers={'Authorization': f'Bearer {token}'}).status_code == 200
+
+
+def test_stream_requires_stream_token_in_url(chat_client):
+    token = access_token(chat_client)
+    status, _ = open_stream(chat_client, query_string={'jwt': token})
+    assert status == 401
+
+    status, first_event = open_stream(chat_client, query_string={'jwt': stream_token(chat_client, token)})
+    assert status == 200
+    assert b'unread_count' in first_event
+
+    # Pelo cabeçalho o token normal continua valendo
+    status, _ = open_stream(chat_client, headers={'Authorization': f'Bearer {token}'})
+    assert status == 200
+
+
+def test_stream_token_rejected_on_other_routes(chat_client):
+    scoped = stream_token(chat_client, access_token(chat_client))
+    response = chat_client.get('/api/auth/profile', headers={'Authorization': f'Bearer {scoped}'})
+    assert response.status_code == 401
@@ -0,0 +1,54 @@
+import pytest
+from app import db
+from app.models import Player, User, UserType
+
+PASSWORD = 'Senha123'
+
+
+@pytest.fixture
+def users(app):
+    with app.app_context():
+        trainer = User(username='treinador', email='t@exemplo.com', user_type=UserType.TRAINER,
+                       first_name='T', last_name='C')
+        player = User(username='jogador', email='j@exemplo.com', user_type=UserType.PLAYER,
+                      first_name='J', last_name='S')
+        for user in (trainer, player):
+            user.set_password(PASSWORD)
+            db.session.add(user)
+        db.session.flush()
+        db.session.add(Player(user_id=player.id, trainer_id=trainer.id))
+        db.session.commit()
+        return {'trainer': trainer.id, 'player': player.id}
+
+
+def headers(client, username, user_type):
+    response = client.post('/api/auth/login', json={
+        'username': username, 'password': PASSWORD, 'user_type': user_type
+    })
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+
+def last_message(client, auth):
+    response = client.get('/api/chat/conversations', headers=auth)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['conversations'][0]['last_message']
+
+
+def test_last_message_is_read_follows_the_read_watermark(client, users):
+    trainer, player = headers(client, 'treinador', 'trainer'), headers(client, 'jogador', 'player')
+
+    response = client.post('/api/chat/messages', headers=trainer,
+                           json={'receiver_id': users['player'], 'message': 'Treino às 8h'})
+    assert response.status_code == 201, response.get_json()
+
+    assert last_message(client, trainer)['is_read'] is False
+    assert last_message(client, player)['is_read'] is False
+
+    # Abrir a conversa avança a marca de leitura do jogador
+    assert client.get(f"/api/chat/messages/{users['trainer']}", headers=player).status_code == 200
+
+    assert last_message(client, trainer)['is_read'] is True
+    assert last_message(client, player)['is_read'] is True
+
+    response = client.get('/api/chat/conversations?fields=last_message.message,unread_count', headers=trainer)
+    assert response.get_json()['conversations'] == [{'last_message': {'message': 'Treino às 8h'}, 'unread_count': 0}]
@@ -0,0 +1,35 @@
+from app import db, db_profile
+from app.models import User, UserType
+
+PASSWORD = 'Senha123'
+
+
+def read_only_engine(app):
+    return app.extensions['db_profile']['read_only_engine']
+
+
+def test_read_only_pool_is_off_by_default(app):
+    assert read_only_engine(app) is None
+
+
+def test_read_only_pool_serves_gets_and_is_disposed(make_app, monkeypatch):
+    monkeypatch.setenv('DB_READ_ONLY_GET', 'true')
+    app = make_app()
+    with app.app_context():
+        user = User(username='treinador', email='t@exemplo.com', user_type=UserType.TRAINER,
+                    first_name='T', last_name='C')
+        user.set_password(PASSWORD)
+        db.session.add(user)
+        db.session.commit()
+
+    client = app.test_client()
+    token = client.post('/api/auth/login', json={
+        'username': 'treinador', 'password': PASSWORD, 'user_type': 'trainer'
+    }).get_json()['access_token']
+    response = client.get('/api/auth/profile', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 200, response.get_json()
+
+    engine = read_only_engine(app)
+    assert engine.pool.checkedin() > 0
+    db_profile.dispose(app)
+    assert engine.pool.checkedin() == 0
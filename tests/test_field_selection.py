@@ -0,0 +1,99 @@
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app import db
+from app.models import AIAnalysis, Exercise, Player, Training, User, UserType
+
+PASSWORD = 'Senha123'
+
+
+@contextmanager
+def recorded_queries():
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    # Em todas as engines: GETs podem usar o pool somente leitura
+    event.listen(Engine, 'before_cursor_execute', on_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, 'before_cursor_execute', on_execute)
+
+
+@pytest.fixture
+def player_headers(app, client):
+    with app.app_context():
+        trainer = User(username='treinador', email='t@exemplo.com', user_type=UserType.TRAINER,
+                       first_name='T', last_name='C')
+        user = User(username='jogador', email='j@exemplo.com', user_type=UserType.PLAYER,
+                    first_name='J', last_name='S')
+        for account in (trainer, user):
+            account.set_password(PASSWORD)
+            db.session.add(account)
+        db.session.flush()
+        player = Player(user_id=user.id, trainer_id=trainer.id)
+        db.session.add(player)
+        db.session.flush()
+        for index in range(20):
+            db.session.add(Training(title=f'Treino {index}', description='d' * 200, trainer_id=trainer.id,
+                                    player_id=player.id, exercises=[
+                                        Exercise(name=f'Exercício {index}.{order}', order_index=order)
+                                        for order in range(2)
+                                    ]))
+            db.session.add(AIAnalysis(player_id=player.id, trainer_id=trainer.id, analysis_type='performance',
+                                      prompt='p', response='r' * 500))
+        db.session.commit()
+
+    response = client.post('/api/auth/login', json={
+        'username': 'jogador', 'password': PASSWORD, 'user_type': 'player'
+    })
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+
+def test_trainings_load_exercises_in_one_query(client, player_headers):
+    client.get('/api/player/trainings', headers=player_headers)  # aquece o cache do usuário
+
+    with recorded_queries() as statements:
+        response = client.get('/api/player/trainings', headers=player_headers)
+    assert response.status_code == 200, response.get_json()
+    trainings = response.get_json()['trainings']
+    assert len(trainings) == 20
+    assert [exercise['name'] for exercise in trainings[0]['exercises']] == ['Exercício 19.0', 'Exercício 19.1']
+    assert sum('FROM exercises' in statement for statement in statements) == 1
+
+
+def test_trainings_fields_skip_unrequested_columns_and_relationships(client, player_headers):
+    client.get('/api/player/trainings', headers=player_headers)
+
+    with recorded_queries() as statements:
+        response = client.get('/api/player/trainings?fields=id,title', headers=player_headers)
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['trainings'][0] == {'id': response.get_json()['trainings'][0]['id'],
+                                                   'title': 'Treino 19'}
+    assert response.get_json()['pagination']['has_more'] is False
+    assert not any('FROM exercises' in statement for statement in statements)
+    training_queries = [statement for statement in statements if 'FROM trainings' in statement]
+    assert len(training_queries) == 1
+    assert 'trainings.description' not in training_queries[0]
+
+    response = client.get('/api/player/trainings?fields=title,exercises.name', headers=player_headers)
+    assert response.get_json()['trainings'][0]['exercises'] == [{'name': 'Exercício 19.0'}, {'name': 'Exercício 19.1'}]
+
+
+def test_analysis_history_reads_only_requested_columns(client, player_headers):
+    client.get('/api/player/trainings', headers=player_headers)
+
+    with recorded_queries() as statements:
+        response = client.get('/api/ai/analysis-history?fields=id,analysis_type&limit=5', headers=player_headers)
+    assert response.status_code == 200, response.get_json()
+    data = response.get_json()
+    assert [set(analysis) for analysis in data['analyses']] == [{'id', 'analysis_type'}] * 5
+    assert data['pagination']['next_cursor']
+    assert not any('ai_analyses.response' in statement for statement in statements)
+
+    response = client.get(f"/api/ai/analysis-history?fields=id&limit=5&before={data['pagination']['next_cursor']}",
+                          headers=player_headers)
+    assert len(response.get_json()['analyses']) == 5
@@ -0,0 +1,74 @@
+import io
+import numpy as np
+import pandas as pd
+import pytest
+from app.utils.file_utils import StatsAccumulator, calculate_trend, process_player_csv
+
+
+def pandas_summary(frame):
+    """Referência: o cálculo original, com o pandas sobre o arquivo inteiro"""
+    summary = {}
+    for col in frame.select_dtypes(include=['number']).columns:
+        values = frame[col]
+        summary[col] = {
+            'mean': float(values.mean()),
+            'max': float(values.max()),
+            'min': float(values.min()),
+            'std': float(values.std()),
+            'latest': float(values.iloc[-1]),
+            'trend': calculate_trend(values.tolist())
+        }
+    return summary
+
+
+def accumulate(frame, chunk_rows):
+    accumulator = StatsAccumulator(frame.columns.tolist())
+    for start in range(0, len(frame), chunk_rows):
+        accumulator.update(frame.iloc[start:start + chunk_rows])
+    return accumulator.summary()
+
+
+def assert_same(summary, expected):
+    assert list(summary) == list(expected)
+    for col, stats in expected.items():
+        for name, value in stats.items():
+            if isinstance(value, float):
+                np.testing.assert_allclose(summary[col][name], value, equal_nan=True, err_msg=f'{col}.{name}')
+            else:
+                assert summary[col][name] == value, f'{col}.{name}'
+
+
+EDGE_CASES = {
+    'última linha vazia': pd.DataFrame({'AVG': [0.250, 0.300, np.nan], 'HR': [1, 2, 3]}),
+    'uma linha': pd.DataFrame({'AVG': [0.300], 'HR': [2]}),
+    'coluna sem valores': pd.DataFrame({'AVG': [np.nan, np.nan, np.nan], 'HR': [1, 2, 3]}),
+    'lacuna no meio': pd.DataFrame({'AVG': [0.200, np.nan, 0.300, 0.400], 'HR': [0, 1, 2, 3]}),
+    'vazia só num bloco': pd.DataFrame({'AVG': [np.nan, np.nan, 0.250, 0.350, 0.450]}),
+}
+
+
+@pytest.mark.parametrize('case', list(EDGE_CASES))
+@pytest.mark.parametrize('chunk_rows', [1, 2, 1000])
+def test_accumulator_matches_pandas(case, chunk_rows):
+    frame = EDGE_CASES[case]
+    assert_same(accumulate(frame, chunk_rows), pandas_summary(frame))
+
+
+def test_accumulator_matches_pandas_on_random_data():
+    rng = np.random.default_rng(3)
+    values = rng.normal(50, 15, (5000, 6))
+    values[rng.random(values.shape) < 0.1] = np.nan
+    frame = pd.DataFrame(values, columns=[f'm{i}' for i in range(6)])
+    frame['trend_up'] = np.arange(len(frame), dtype=float)
+    assert_same(accumulate(frame, 700), pandas_summary(frame))
+
+
+def test_process_player_csv_edge_values():
+    csv = b'Date,AVG,ERA,HR\n2024-04-01,0.250,,1\n2024-04-02,0.300,,2\n2024-04-03,,,3\n'
+    processed_data, _ = process_player_csv(io.BytesIO(csv))
+
+    batting = processed_data['baseball_statistics']['batting_average']
+    assert np.isnan(batting['latest'])
+    assert batting['average'] == pytest.approx(0.275)
+    assert np.isnan(processed_data['statistics']['ERA']['mean'])
+    assert processed_data['baseball_statistics']['home_runs']['trend'] == 'ascending'
@@ -0,0 +1,80 @@
+import pytest
+import requests
+from app.services.http_client import CircuitBreaker, CircuitOpenError, ResilientHTTPClient
+
+
+class FakeResponse(requests.Response):
+    def __init__(self, status_code):
+        super().__init__()
+        self.status_code = status_code
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    """Devolve (ou levanta) os resultados programados, um por chamada"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        result = self.results.pop(0)
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+
+def make_client(*results, failure_threshold=1):
+    client = ResilientHTTPClient(max_retries=2, backoff_base=0, backoff_max=0,
+                                 breaker=CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=0))
+    client.session = FakeSession(*results)
+    return client
+
+
+def open_circuit(client):
+    client.breaker.record_failure()
+    assert client.breaker.state == 'half_open'  # reset_timeout=0: a próxima chamada é de teste
+
+
+def test_probe_released_after_unexpected_exception():
+    client = make_client(ValueError('hook com defeito'), FakeResponse(200))
+    open_circuit(client)
+
+    with pytest.raises(ValueError):
+        client.request('GET', 'http://servico')
+    # Sem a liberação, todas as chamadas seguintes seriam rejeitadas para sempre
+    assert client.request('GET', 'http://servico').status_code == 200
+    assert client.breaker.state == 'closed'
+
+
+def test_other_request_errors_count_as_failure_without_retry():
+    client = make_client(requests.exceptions.TooManyRedirects())
+    open_circuit(client)
+
+    with pytest.raises(requests.exceptions.TooManyRedirects):
+        client.request('GET', 'http://servico')
+    assert client.session.calls == 1
+    assert client.breaker.state == 'half_open'
+    assert client.breaker.allow_request()
+
+
+def test_discarded_responses_are_closed():
+    first, second, last = FakeResponse(503), FakeResponse(502), FakeResponse(200)
+    client = make_client(first, second, last)
+
+    assert client.request('GET', 'http://servico') is last
+    assert first.closed and second.closed and not last.closed
+
+
+def test_retries_exhausted_opens_circuit():
+    client = make_client(FakeResponse(503), FakeResponse(503), FakeResponse(503))
+    client.breaker.reset_timeout = 60
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.request('GET', 'http://servico')
+    with pytest.raises(CircuitOpenError):
+        client.request('GET', 'http://servico')
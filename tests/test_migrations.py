@@ -0,0 +1,98 @@
+from datetime import datetime
+import pytest
+import sqlalchemy as sa
+from app import db, migrations
+
+
+def test_hot_queries_use_their_indexes(app):
+    with app.app_context():
+        report = migrations.explain_hot_queries()
+
+    assert report
+    for name, result in report.items():
+        assert result['uses_index'], f"{name} não usa {result['index']}: {result['plan']}"
+
+
+def test_every_hot_query_index_exists(app):
+    with app.app_context(), db.engine.connect() as connection:
+        inspector = sa.inspect(connection)
+        for _, index_name, table_name, columns, _ in migrations.HOT_QUERIES:
+            indexes = {index['name']: tuple(index['column_names']) for index in inspector.get_indexes(table_name)}
+            assert indexes.get(index_name) == columns, index_name
+
+
+def test_migration_fails_loudly_without_its_table(tmp_path):
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'vazio.db'}")
+    with engine.begin() as connection:
+        for _, _, migrate in migrations.MIGRATIONS:
+            with pytest.raises(RuntimeError, match='requer a tabela'):
+                migrate(connection)
+    engine.dispose()
+
+
+def test_upgrade_records_every_migration(app):
+    with app.app_context(), db.engine.begin() as connection:
+        assert migrations.current_version(connection) == migrations.MIGRATIONS[-1][0]
+    with app.app_context():
+        assert migrations.upgrade() == []
+
+
+def test_failed_migration_does_not_block_startup(make_app, monkeypatch):
+    def broken(connection):
+        connection.execute(sa.text('ALTER TABLE tabela_inexistente ADD COLUMN x INTEGER'))
+
+    failing_version = migrations.MIGRATIONS[-1][0] + 1
+    monkeypatch.setattr(migrations, 'MIGRATIONS', migrations.MIGRATIONS + [(failing_version, 'Quebrada', broken)])
+
+    app = make_app()
+    with app.app_context(), db.engine.begin() as connection:
+        assert migrations.current_version(connection) == failing_version - 1
+    assert app.test_client().get('/api/auth/validate-token').status_code == 401
+
+
+def test_upgrade_adds_player_profile_columns(make_app, tmp_path):
+    # Banco criado antes do perfil esportivo: players só com as colunas originais, versão 2
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            'CREATE TABLE players (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, '
+            'trainer_id INTEGER NOT NULL, created_at DATETIME)'
+        )
+        migrations.schema_version.create(connection)
+        for version in (1, 2):
+            connection.execute(sa.insert(migrations.schema_version).values(
+                version=version, name='anterior', applied_at=datetime.utcnow()
+            ))
+    engine.dispose()
+
+    app = make_app()
+    with app.app_context(), db.engine.begin() as connection:
+        inspector = sa.inspect(connection)
+        columns = {column['name'] for column in inspector.get_columns('players')}
+        indexes = {index['name'] for index in inspector.get_indexes('players')}
+        assert migrations.current_version(connection) == migrations.MIGRATIONS[-1][0]
+    assert {'position', 'team', 'jersey_number', 'csv_data'} <= columns
+    assert 'ix_players_trainer_position' in indexes
+
+
+def test_upgrade_adds_analysis_index_to_databases_past_version_one(make_app, tmp_path):
+    # Banco em que a migração 1 rodou sem o índice de ai_analyses
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            'CREATE TABLE ai_analyses (id INTEGER PRIMARY KEY, player_id INTEGER NOT NULL, '
+            'trainer_id INTEGER NOT NULL, analysis_type VARCHAR(50) NOT NULL, prompt TEXT, '
+            'response TEXT, created_at DATETIME)'
+        )
+        migrations.schema_version.create(connection)
+        for version in (1, 2, 3):
+            connection.execute(sa.insert(migrations.schema_version).values(
+                version=version, name='anterior', applied_at=datetime.utcnow()
+            ))
+    engine.dispose()
+
+    app = make_app()
+    with app.app_context(), db.engine.connect() as connection:
+        indexes = {index['name'] for index in sa.inspect(connection).get_indexes('ai_analyses')}
+        assert migrations.current_version(connection) == migrations.MIGRATIONS[-1][0]
+    assert 'ix_ai_analyses_player_created_at' in indexes
@@ -0,0 +1,63 @@
+import pytest
+import sqlalchemy as sa
+from app import db
+from app.models import Player, User, UserType
+from app.utils.principal import principal_cache
+
+PASSWORD = 'Senha123'
+
+
+@pytest.fixture
+def roster(app):
+    with app.app_context():
+        users = {}
+        for username, user_type in (('treinador_a', UserType.TRAINER), ('treinador_b', UserType.TRAINER),
+                                    ('jogador', UserType.PLAYER)):
+            user = User(username=username, email=f'{username}@exemplo.com', user_type=user_type,
+                        first_name=username, last_name='Teste')
+            user.set_password(PASSWORD)
+            db.session.add(user)
+            db.session.flush()
+            users[username] = user.id
+        db.session.add(Player(user_id=users['jogador'], trainer_id=users['treinador_a']))
+        db.session.commit()
+    principal_cache.clear()
+    return users
+
+
+def player_headers(client):
+    response = client.post('/api/auth/login', json={
+        'username': 'jogador', 'password': PASSWORD, 'user_type': 'player'
+    })
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+
+def send(client, headers, receiver_id):
+    return client.post('/api/chat/messages', headers=headers,
+                       json={'receiver_id': receiver_id, 'message': 'oi'}).status_code
+
+
+def test_trainer_change_applies_to_existing_tokens(app, client, roster):
+    headers = player_headers(client)  # claims com o treinador A
+    assert send(client, headers, roster['treinador_a']) == 201
+
+    with app.app_context():
+        player = Player.query.filter_by(user_id=roster['jogador']).one()
+        player.trainer_id = roster['treinador_b']
+        db.session.commit()
+
+    assert send(client, headers, roster['treinador_a']) == 403
+    assert send(client, headers, roster['treinador_b']) == 201
+
+
+def test_claims_never_authorize_a_stale_link(app, client, roster):
+    headers = player_headers(client)
+
+    # Alteração feita por outro processo: sem evento neste, só a expiração do cache
+    with app.app_context():
+        db.session.execute(sa.update(Player).where(Player.user_id == roster['jogador'])
+                           .values(trainer_id=roster['treinador_b']))
+        db.session.commit()
+    principal_cache.clear()
+
+    assert send(client, headers, roster['treinador_a']) == 403
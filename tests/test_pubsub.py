@@ -0,0 +1,52 @@
+import json
+import threading
+from app.services.pubsub import PubSubHub, RedisBackend
+
+
+class FlakyPubSub:
+    """Imita o pubsub do redis-py: a primeira conexão cai, a segunda entrega as mensagens"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def psubscribe(self, pattern):
+        self.client.connections += 1
+        if self.client.connections == 1:
+            raise ConnectionError('Redis indisponível')
+
+    def listen(self):
+        yield {'channel': b'playball:user:1', 'data': b'nao-e-json'}
+        for message in self.client.messages:
+            yield {'channel': b'playball:user:1', 'data': json.dumps(message).encode()}
+        self.client.delivered.set()
+        self.client.release.wait()
+
+    def close(self):
+        pass
+
+
+class FakeRedis:
+    def __init__(self, messages):
+        self.messages = messages
+        self.connections = 0
+        self.delivered = threading.Event()
+        self.release = threading.Event()
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FlakyPubSub(self)
+
+
+def test_redis_listener_reconnects_after_connection_loss(caplog):
+    client = FakeRedis([{'event': 'new_message', 'data': {'id': 1}}])
+    backend = RedisBackend(client=client, min_backoff=0.01)
+    hub = PubSubHub(backend=backend)
+    subscription = hub.subscribe('user:1')
+    try:
+        assert client.delivered.wait(5)
+        assert subscription.get(timeout=1) == {'event': 'new_message', 'data': {'id': 1}}
+        assert client.connections == 2
+        assert 'Conexão do pub/sub com o Redis perdida' in caplog.text
+        assert 'Mensagem inválida descartada' in caplog.text
+    finally:
+        backend.stop()
+        client.release.set()
@@ -0,0 +1,75 @@
+import pytest
+from app import db
+from app.models import Player, User, UserType
+from app.utils.rate_limit import MemoryBackend, limiter
+
+PASSWORD = 'Senha123'
+
+
+@pytest.fixture
+def limited_app(make_app, monkeypatch):
+    monkeypatch.setenv('RATE_LIMIT_ENABLED', 'true')
+    monkeypatch.setenv('LOGIN_LIMIT_PER_ACCOUNT', '3/60')
+    monkeypatch.setenv('LOGIN_LIMIT_PER_IP', '10/60')
+    monkeypatch.setenv('TRUSTED_PROXY_COUNT', '1')
+    # Baldes novos a cada teste (o limitador é compartilhado pelo processo)
+    monkeypatch.setattr(limiter, 'backend', MemoryBackend())
+    monkeypatch.setattr(limiter, 'stats', {})
+    app = make_app()
+    with app.app_context():
+        trainer = User(username='treinador', email='t@exemplo.com', user_type=UserType.TRAINER,
+                       first_name='T', last_name='C')
+        player = User(username='jogador', email='j@exemplo.com', user_type=UserType.PLAYER,
+                      first_name='J', last_name='S')
+        for user in (trainer, player):
+            user.set_password(PASSWORD)
+            db.session.add(user)
+        db.session.flush()
+        db.session.add(Player(user_id=player.id, trainer_id=trainer.id))
+        db.session.commit()
+    return app
+
+
+def login(client, username, password=PASSWORD, user_type='trainer', ip='203.0.113.1'):
+    return client.post('/api/auth/login', json={
+        'username': username, 'password': password, 'user_type': user_type
+    }, headers={'X-Forwarded-For': ip})
+
+
+def test_successful_logins_do_not_charge_the_account(limited_app):
+    client = limited_app.test_client()
+    for _ in range(6):
+        assert login(client, 'treinador').status_code == 200
+
+
+def test_failed_logins_lock_the_account(limited_app):
+    client = limited_app.test_client()
+    for _ in range(3):
+        assert login(client, 'treinador', password='errada').status_code == 401
+
+    response = login(client, 'treinador')
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    # Outra conta do mesmo IP não é afetada
+    assert login(client, 'jogador', user_type='player').status_code == 200
+
+
+def test_ip_limit_uses_the_forwarded_client_address(limited_app):
+    client = limited_app.test_client()
+    for _ in range(10):
+        login(client, 'treinador', ip='198.51.100.7')
+    assert login(client, 'treinador', ip='198.51.100.7').status_code == 429
+    assert login(client, 'treinador', ip='198.51.100.8').status_code == 200
+
+
+def test_rate_limit_stats_only_for_trainers(limited_app):
+    client = limited_app.test_client()
+    player_token = login(client, 'jogador', user_type='player').get_json()['access_token']
+    trainer_token = login(client, 'treinador').get_json()['access_token']
+
+    response = client.get('/api/auth/rate-limit-stats', headers={'Authorization': f'Bearer {player_token}'})
+    assert response.status_code == 403
+
+    response = client.get('/api/auth/rate-limit-stats', headers={'Authorization': f'Bearer {trainer_token}'})
+    assert response.status_code == 200
+    assert response.get_json()['rules']['login_ip']['allowed'] == 2
@@ -0,0 +1,72 @@
+from app import db
+from app.models import Player, Position, User, UserType
+
+PASSWORD = 'Senha123'
+
+
+def login(client, username, user_type):
+    response = client.post('/api/auth/login', json={
+        'username': username, 'password': PASSWORD, 'user_type': user_type
+    })
+    assert response.status_code == 200, response.get_json()
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+
+def seed_roster(app):
+    with app.app_context():
+        trainer = User(username='treinador', email='treinador@exemplo.com', user_type=UserType.TRAINER,
+                       first_name='Tereza', last_name='Costa')
+        trainer.set_password(PASSWORD)
+        db.session.add(trainer)
+        db.session.flush()
+        roster = [
+            ('Ana', 'Silva', Position.PITCHER, 21),
+            ('Bruno', 'Silva', Position.CATCHER, 7),
+            ('Carla', 'Almeida', Position.PITCHER, 3),
+        ]
+        for index, (first_name, last_name, position, jersey_number) in enumerate(roster):
+            user = User(username=f'jogador{index}', email=f'jogador{index}@exemplo.com',
+                        user_type=UserType.PLAYER, first_name=first_name, last_name=last_name)
+            user.set_password(PASSWORD)
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Player(user_id=user.id, trainer_id=trainer.id, position=position,
+                                  team='Tigres', jersey_number=jersey_number))
+        db.session.commit()
+
+
+def test_trainer_profile_lists_roster(app, client):
+    seed_roster(app)
+    headers = login(client, 'treinador', 'trainer')
+
+    response = client.get('/api/auth/profile', headers=headers)
+    assert response.status_code == 200, response.get_json()
+    players = response.get_json()['my_players']
+    assert [p['user_info']['first_name'] for p in players] == ['Carla', 'Ana', 'Bruno']
+    assert players[0]['position'] == 'pitcher'
+    assert players[0]['jersey_number'] == 3
+    assert 'csv_data' not in players[0]
+
+
+def test_roster_sort_by_name_and_filter_by_position(app, client):
+    seed_roster(app)
+    headers = login(client, 'treinador', 'trainer')
+
+    response = client.get('/api/auth/profile?sort=-name', headers=headers)
+    assert [p['user_info']['first_name'] for p in response.get_json()['my_players']] == ['Bruno', 'Ana', 'Carla']
+
+    response = client.get('/api/auth/profile?position=PITCHER&sort=jersey_number', headers=headers)
+    assert [p['jersey_number'] for p in response.get_json()['my_players']] == [3, 21]
+
+    assert client.get('/api/auth/profile?sort=altura', headers=headers).status_code == 400
+
+
+def test_player_profile(app, client):
+    seed_roster(app)
+    headers = login(client, 'jogador1', 'player')
+
+    response = client.get('/api/auth/profile', headers=headers)
+    assert response.status_code == 200, response.get_json()
+    data = response.get_json()
+    assert data['player_info']['position'] == 'catcher'
+    assert data['trainer_info']['username'] == 'treinador'
@@ -0,0 +1,31 @@
+from datetime import datetime
+from app import db
+from app.models import Exercise, Player, Training, User, UserType
+
+
+def test_training_to_dict_nests_exercises(app):
+    with app.app_context():
+        trainer = User(username='treinador', email='t@exemplo.com', user_type=UserType.TRAINER,
+                       first_name='T', last_name='C', password_hash='-')
+        player_user = User(username='jogador', email='j@exemplo.com', user_type=UserType.PLAYER,
+                           first_name='J', last_name='S', password_hash='-')
+        db.session.add_all([trainer, player_user])
+        db.session.flush()
+        player = Player(user_id=player_user.id, trainer_id=trainer.id)
+        db.session.add(player)
+        db.session.flush()
+        training = Training(title='Rebatidas', trainer_id=trainer.id, player_id=player.id,
+                            scheduled_date=datetime(2024, 5, 1, 8, 30))
+        training.exercises = [Exercise(name='Tee', order_index=1), Exercise(name='Soft toss', order_index=0)]
+        db.session.add(training)
+        db.session.commit()
+        db.session.expire_all()
+
+        data = Training.query.one().to_dict()
+        assert data['scheduled_date'] == '2024-05-01T08:30:00'
+        assert data['completion_date'] is None
+        assert [exercise['name'] for exercise in data['exercises']] == ['Soft toss', 'Tee']
+        assert data['exercises'][0]['training_id'] == data['id']
+
+        data = Training.query.one().to_dict({'title': None, 'exercises': {'name': None}})
+        assert data == {'title': 'Rebatidas', 'exercises': [{'name': 'Soft toss'}, {'name': 'Tee'}]}
@@ -0,0 +1,252 @@
+import io
+import time
+import pytest
+from app import db
+from app.models import AIAnalysis, BackgroundJob, JobStatus, Player, Position, User, UserType
+
+PASSWORD = 'Senha123'
+
+STATS_CSV = (
+    'date,hr,avg\n'
+    '2024-04-01,1,0.250\n'
+    '2024-04-02,0,0.240\n'
+    '2024-04-03,2,0.275\n'
+)
+
+
+@pytest.fixture
+def roster(app, monkeypatch):
+    # Sem chave da API: as chamadas à AI retornam a mensagem de erro, sem acessar a rede
+    monkeypatch.delenv('PERPLEXITY_API_KEY', raising=False)
+    with app.app_context():
+        trainer = User(username='treinador', email='treinador@exemplo.com', user_type=UserType.TRAINER,
+                       first_name='Tereza', last_name='Costa')
+        trainer.set_password(PASSWORD)
+        db.session.add(trainer)
+        db.session.flush()
+        player_ids = []
+        for index, (first_name, position) in enumerate((('Ana', Position.PITCHER), ('Bruno', Position.CATCHER))):
+            user = User(username=f'jogador{index}', email=f'jogador{index}@exemplo.com',
+                        user_type=UserType.PLAYER, first_name=first_name, last_name='Silva')
+            user.set_password(PASSWORD)
+            db.session.add(user)
+            db.session.flush()
+            player = Player(user_id=user.id, trainer_id=trainer.id, position=position, team='Tigres')
+            db.session.add(player)
+            db.session.flush()
+            player_ids.append(player.id)
+        db.session.commit()
+        return {'trainer_id': trainer.id, 'player_ids': player_ids}
+
+
+def login(client, username, user_type):
+    response = client.post('/api/auth/login', json={
+        'username': username, 'password': PASSWORD, 'user_type': user_type
+    })
+    assert response.status_code == 200, response.get_json()
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+
+def wait_for_job(client, headers, status_url, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(status_url, headers=headers).get_json()['job']
+        if job['status'] in ('succeeded', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'Job não terminou: {job}')
+
+
+def upload_stats(client, headers, player_id, query=''):
+    return client.post(f'/api/trainer/players/{player_id}/csv-upload{query}', headers=headers,
+                       data={'csv_file': (io.BytesIO(STATS_CSV.encode()), 'stats.csv')},
+                       content_type='multipart/form-data')
+
+
+def test_roster_listing_and_permissions(app, client, roster):
+    headers = login(client, 'treinador', 'trainer')
+
+    response = client.get('/api/trainer/players?sort=name&fields=id,user_info.first_name', headers=headers)
+    assert response.status_code == 200, response.get_json()
+    players = response.get_json()['players']
+    assert [p['user_info'] for p in players] == [{'first_name': 'Ana'}, {'first_name': 'Bruno'}]
+    assert set(players[0]) == {'id', 'user_info'}
+
+    player_headers = login(client, 'jogador0', 'player')
+    assert client.get('/api/trainer/players', headers=player_headers).status_code == 403
+
+
+def test_bulk_roster_import(app, client, roster):
+    headers = login(client, 'treinador', 'trainer')
+
+    response = client.post('/api/trainer/players/import', headers=headers, json={'players': [
+        {'username': 'novo1', 'email': 'novo1@exemplo.com', 'password': 'Senha123',
+         'first_name': 'Caio', 'last_name': 'Lima', 'position': 'shortstop'},
+        {'username': 'jogador0', 'email': 'outro@exemplo.com', 'password': 'Senha123',
+         'first_name': 'Ana', 'last_name': 'Silva', 'position': 'pitcher'},
+        {'username': 'novo2', 'email': 'novo2@exemplo.com', 'password': 'Senha123',
+         'first_name': 'Duda', 'last_name': 'Reis', 'position': 'goleiro'},
+    ]})
+    assert response.status_code == 201, response.get_json()
+    data = response.get_json()
+    assert (data['total'], data['created']) == (3, 1)
+    assert [result['status'] for result in data['results']] == ['created', 'error', 'error']
+
+    csv_body = ('username,email,password,first_name,last_name,position\n'
+                'novo3,novo3@exemplo.com,Senha123,Eva,Rocha,catcher\n')
+    response = client.post('/api/trainer/players/import', headers=headers, data=csv_body,
+                           content_type='text/csv')
+    assert response.status_code == 201, response.get_json()
+
+    with app.app_context():
+        assert Player.query.filter_by(trainer_id=roster['trainer_id']).count() == 4
+
+
+def test_bulk_roster_import_validates_rows(app, client, roster):
+    headers = login(client, 'treinador', 'trainer')
+    base = {'first_name': 'Caio', 'last_name': 'Lima', 'position': 'shortstop'}
+
+    response = client.post('/api/trainer/players/import', headers=headers, json=[
+        {**base, 'username': 'novo0', 'email': 'bad-email0', 'password': 'Senha123'},
+        {**base, 'username': 'novo1', 'email': 'novo1@exemplo.com', 'password': '1'},
+        {**base, 'username': 'n' * 81, 'email': 'novo2@exemplo.com', 'password': 'Senha123'},
+        {**base, 'username': 'novo3', 'email': 'novo3@exemplo.com', 'password': 'Senha123', 'team': 't' * 101},
+    ])
+    assert response.status_code == 400, response.get_json()
+    errors = [result['error'] for result in response.get_json()['results']]
+    assert errors[0] == 'Email inválido'
+    assert errors[1].startswith('Senha deve ter')
+    assert 'username' in errors[2] and 'team' in errors[3]
+
+    with app.app_context():
+        assert User.query.filter(User.username.like('novo%')).count() == 0
+
+
+def test_stats_upload_and_series(app, client, roster):
+    headers = login(client, 'treinador', 'trainer')
+    player_id = roster['player_ids'][0]
+
+    response = upload_stats(client, headers, player_id)
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['import']['row_count'] == 3
+
+    response = client.get(f'/api/trainer/players/{player_id}/stats?metric=home_runs', headers=headers)
+    assert response.status_code == 200, response.get_json()
+    data = response.get_json()
+    assert list(data['series']) == ['home_runs']
+    assert [point['value'] for point in data['series']['home_runs']] == [1.0, 0.0, 2.0]
+    assert data['series']['home_runs'][0]['game_date'] == '2024-04-01'
+    assert [summary['metric'] for summary in data['summaries']] == ['home_runs']
+
+    response = client.get(f'/api/trainer/players/{player_id}/stats?from=2024-04-02&to=2024-04-02',
+                          headers=headers)
+    assert all(len(points) == 1 for points in response.get_json()['series'].values())
+
+    assert client.get(f"/api/trainer/players/{roster['player_ids'][1]}/stats",
+                      headers=headers).status_code == 404
+
+
+def test_async_stats_upload_job(app, client, roster):
+    headers = login(client, 'treinador', 'trainer')
+    player_id = roster['player_ids'][1]
+
+    response = upload_stats(client, headers, player_id, '?async=true')
+    assert response.status_code == 202, response.get_json()
+    job = wait_for_job(client, headers, response.get_json()['status_url'])
+    assert job['status'] == 'succeeded', job
+    assert job['result']['row_count'] == 3
+
+    response = client.get(f'/api/trainer/players/{player_id}/stats', headers=headers)
+    assert response.status_code == 200, response.get_json()
+
+
+def test_job_status_is_scoped_to_owner(app, client, roster):
+    with app.app_context():
+        other = User(username='treinador_b', email='b@exemplo.com', user_type=UserType.TRAINER,
+                     first_name='B', last_name='B')
+        other.set_password(PASSWORD)
+        db.session.add(other)
+        db.session.commit()
+
+    headers = login(client, 'treinador', 'trainer')
+    response = upload_stats(client, headers, roster['player_ids'][0], '?async=true')
+    status_url = response.get_json()['status_url']
+    wait_for_job(client, headers, status_url)
+
+    assert client.get(status_url, headers=login(client, 'treinador_b', 'trainer')).status_code == 404
+    assert client.get('/api/trainer/jobs/inexistente', headers=headers).status_code == 404
+
+
+def test_batch_analysis_reports_failures(app, client, roster):
+    headers = login(client, 'treinador', 'trainer')
+
+    response = client.post('/api/trainer/players/ai-analysis/batch', headers=headers,
+                           json={'position': 'pitcher', 'concurrency': 2})
+    assert response.status_code == 202, response.get_json()
+    job = wait_for_job(client, headers, response.get_json()['status_url'])
+    assert job['status'] == 'succeeded', job
+    assert (job['result']['total'], job['result']['succeeded'], job['result']['failed']) == (1, 0, 1)
+
+    with app.app_context():
+        assert AIAnalysis.query.count() == 0
+
+    response = client.post('/api/trainer/players/ai-analysis/batch', headers=headers, json={'team': 'Leões'})
+    assert response.status_code == 404
+
+
+def test_analysis_history(app, client, roster):
+    with app.app_context():
+        for player_id in roster['player_ids']:
+            db.session.add(AIAnalysis(player_id=player_id, trainer_id=roster['trainer_id'],
+                                      analysis_type='performance', prompt='p', response='r'))
+        db.session.commit()
+
+    response = client.get('/api/ai/analysis-history?fields=id,player_id',
+                          headers=login(client, 'treinador', 'trainer'))
+    assert response.status_code == 200, response.get_json()
+    analyses = response.get_json()['analyses']
+    assert len(analyses) == 2
+    assert set(analyses[0]) == {'id', 'player_id'}
+
+    response = client.get('/api/ai/analysis-history', headers=login(client, 'jogador1', 'player'))
+    assert [a['player_id'] for a in response.get_json()['analyses']] == [roster['player_ids'][1]]
+
+
+def test_analysis_job_fails_on_ai_error(app, client, roster):
+    headers = login(client, 'treinador', 'trainer')
+
+    response = client.post(f"/api/trainer/players/{roster['player_ids'][0]}/ai-analysis?async=true",
+                           headers=headers, json={'analysis_type': 'performance'})
+    assert response.status_code == 202, response.get_json()
+    job = wait_for_job(client, headers, response.get_json()['status_url'])
+    assert job['status'] == 'failed', job
+    assert 'Chave da API' in job['error']
+
+    with app.app_context():
+        assert AIAnalysis.query.count() == 0
+
+
+def test_interrupted_jobs_fail_on_start(make_app, roster):
+    app = make_app()
+    with app.app_context():
+        db.session.add_all([
+            BackgroundJob(id='fila', job_type='ai_analysis', status=JobStatus.QUEUED, owner_id=roster['trainer_id']),
+            BackgroundJob(id='rodando', job_type='stats_import', status=JobStatus.RUNNING,
+                          owner_id=roster['trainer_id']),
+            BackgroundJob(id='pronto', job_type='ai_analysis', status=JobStatus.SUCCEEDED,
+                          owner_id=roster['trainer_id'])
+        ])
+        db.session.commit()
+
+    restarted = make_app()
+    with restarted.app_context():
+        statuses = {job.id: job.status for job in BackgroundJob.query.all()}
+    assert statuses == {'fila': JobStatus.FAILED, 'rodando': JobStatus.FAILED, 'pronto': JobStatus.SUCCEEDED}
+
+
+def test_cache_stats_only_for_trainers(app, client, roster):
+    assert client.get('/api/ai/cache-stats', headers=login(client, 'jogador0', 'player')).status_code == 403
+
+    response = client.get('/api/ai/cache-stats', headers=login(client, 'treinador', 'trainer'))
+    assert response.status_code == 200, response.get_json()
+    assert {'cache', 'inflight'} <= set(response.get_json())